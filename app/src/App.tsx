@@ -10,14 +10,18 @@ import { Footer } from './sections/Footer';
 import { ScholarshipModal } from './components/ScholarshipModal';
 import { Toaster } from '@/components/ui/sonner';
 import { mockScholarships } from './data/mockScholarships';
-import type { Scholarship } from './types/scholarship';
+import type { Scholarship, ScholarshipManifest, ScholarshipPage } from './types/scholarship';
 import './App.css';
 
+// Page shards fetched at once after the first
+const SHARD_CONCURRENCY = 4;
+
 function App() {
   const { i18n } = useTranslation();
   const [currentView, setCurrentView] = useState('home');
   const [searchQuery, setSearchQuery] = useState('');
   const [scholarships, setScholarships] = useState<Scholarship[]>([]);
+  const [manifest, setManifest] = useState<ScholarshipManifest | null>(null);
   const [selectedScholarship, setSelectedScholarship] = useState<Scholarship | null>(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
@@ -27,12 +31,63 @@ function App() {
     document.dir = i18n.language === 'ar' ? 'rtl' : 'ltr';
   }, [i18n.language]);
 
-  // Fetch scholarships from JSON file
+  // Fetch scholarships from JSON files
   useEffect(() => {
+    const basePath = import.meta.env.BASE_URL || '/';
+    const pageUrl = (page: number) =>
+      `${basePath}scholarships/page-${String(page).padStart(4, '0')}.json`;
+
+    // Sorted page shards: the first page renders straight away, the rest
+    // load a few at a time in the background and are appended in order
+    const fetchPages = async () => {
+      // The manifest only adds totals and facets, so the pages load without it
+      const [manifestResponse, response] = await Promise.all([
+        fetch(`${basePath}scholarships/manifest.json`).catch(() => null),
+        fetch(pageUrl(1)),
+      ]);
+      if (!response.ok) {
+        return false;
+      }
+      const first: ScholarshipPage = await response.json();
+      const shards: ScholarshipManifest | null = manifestResponse?.ok
+        ? await manifestResponse.json()
+        : null;
+      setManifest(shards);
+      setScholarships(first.items);
+      setIsLoading(false);
+
+      const pages = shards?.pages ?? first.pages;
+      const loaded: Scholarship[][] = [first.items];
+      let nextPage = 2;
+      let shown = 1;
+      const worker = async () => {
+        while (nextPage <= pages) {
+          const page = nextPage++;
+          const shard = await fetch(pageUrl(page));
+          loaded[page - 1] = shard.ok ? ((await shard.json()) as ScholarshipPage).items : [];
+          // Publish the pages that are now complete up to the first gap
+          const ready: Scholarship[] = [];
+          while (shown < pages && loaded[shown] !== undefined) {
+            ready.push(...loaded[shown++]);
+          }
+          if (ready.length) {
+            setScholarships((current) => current.concat(ready));
+          }
+        }
+      };
+      await Promise.all(
+        Array.from({ length: Math.min(SHARD_CONCURRENCY, pages - 1) }, worker)
+      );
+      console.info(`Loaded ${shards?.total ?? first.total} scholarships from ${pages} pages`);
+      return true;
+    };
+
     const fetchScholarships = async () => {
       try {
-        // Try to fetch from the scholarships.json file
-        const basePath = import.meta.env.BASE_URL || '/';
+        if (await fetchPages()) {
+          return;
+        }
+        // Older deployments only have the single scholarships.json file
         const response = await fetch(`${basePath}scholarships.json`);
         
         if (response.ok) {
@@ -75,7 +130,7 @@ function App() {
       case 'home':
         return (
           <>
-            <Hero onSearch={handleSearch} onViewChange={setCurrentView} />
+            <Hero onSearch={handleSearch} onViewChange={setCurrentView} manifest={manifest} />
             <FeaturedScholarships
               scholarships={scholarships}
               onViewChange={setCurrentView}
@@ -110,7 +165,7 @@ function App() {
       default:
         return (
           <>
-            <Hero onSearch={handleSearch} onViewChange={setCurrentView} />
+            <Hero onSearch={handleSearch} onViewChange={setCurrentView} manifest={manifest} />
             <FeaturedScholarships
               scholarships={scholarships}
               onViewChange={setCurrentView}
@@ -3,13 +3,15 @@ import { useTranslation } from 'react-i18next';
 import { Search, GraduationCap, Globe, RefreshCw } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
+import type { ScholarshipManifest } from '@/types/scholarship';
 
 interface HeroProps {
   onSearch: (query: string) => void;
   onViewChange: (view: string) => void;
+  manifest?: ScholarshipManifest | null;
 }
 
-export function Hero({ onSearch, onViewChange }: HeroProps) {
+export function Hero({ onSearch, onViewChange, manifest }: HeroProps) {
   const { t } = useTranslation();
   const [searchQuery, setSearchQuery] = useState('');
 
@@ -20,8 +22,16 @@ export function Hero({ onSearch, onViewChange }: HeroProps) {
   };
 
   const stats = [
-    { icon: GraduationCap, value: '10,000+', label: t('hero.stats.scholarships') },
-    { icon: Globe, value: '150+', label: t('hero.stats.countries') },
+    {
+      icon: GraduationCap,
+      value: manifest ? manifest.total.toLocaleString() : '10,000+',
+      label: t('hero.stats.scholarships'),
+    },
+    {
+      icon: Globe,
+      value: manifest ? Object.keys(manifest.facets.country).length.toLocaleString() : '150+',
+      label: t('hero.stats.countries'),
+    },
     { icon: RefreshCw, value: '24/7', label: t('hero.stats.dailyUpdates') },
   ];
 
@@ -16,6 +16,24 @@ export interface Scholarship {
   created_at?: string;
 }
 
+// One page shard written by scraper_github_actions.py --output shards
+export interface ScholarshipPage {
+  page: number;
+  pages: number;
+  total: number;
+  items: Scholarship[];
+}
+
+// scholarships/manifest.json, written alongside the page shards
+export interface ScholarshipManifest {
+  total: number;
+  page_size: number;
+  pages: number;
+  page_file: string;
+  sort: string[];
+  facets: Record<'country' | 'degree_level' | 'subject', Record<string, number>>;
+}
+
 export interface FilterOptions {
   country: string;
   degreeLevel: string;
@@ -0,0 +1 @@
+# Read side of the scholarships database: queries and the HTTP API
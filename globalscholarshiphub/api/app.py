@@ -0,0 +1,262 @@
+"""
+Read API over the scholarships database
+
+An async FastAPI service on a psycopg 3 AsyncConnectionPool, serving the
+endpoints listed in SYSTEM_ARCHITECTURE.md. Run it from this directory's
+parent with:
+
+    uvicorn api.app:app --host 0.0.0.0 --port 8000
+
+Every response is cached in process (cache.py) with a strong ETag, so a
+repeat request is served from memory and a client revalidating with
+If-None-Match gets a bodiless 304. Concurrent misses for the same URL
+share one query. The data only changes when a scraper run finishes, so
+the cache is cleared on each new scraper_logs row: by LISTEN on the
+`scraper_runs` channel, which a trigger in database/schema.sql notifies,
+or with API_INVALIDATION=poll by polling the newest run id, for
+connection poolers that do not pass notifications through.
+"""
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import urlencode
+
+import psycopg
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from . import queries
+from .cache import ResponseCache, etag_matches
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def connection_params():
+    """Connection settings from the environment, as the scrapers read them"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'dbname': os.getenv('DB_NAME', 'scholarships'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', 'password'),
+    }
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(data):
+    return json.dumps(data, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+async def fetch(pool, sql, params=None):
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchall()
+
+
+async def listen_for_runs(cache):
+    """Clear the cache on every scraper_runs notification, reconnecting as needed"""
+    while True:
+        try:
+            conn = await psycopg.AsyncConnection.connect(**connection_params(), autocommit=True)
+            async with conn:
+                await conn.execute('LISTEN scraper_runs')
+                # Runs may have finished while nobody was listening
+                cache.clear()
+                async for _ in conn.notifies():
+                    cache.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Lost scraper_runs listener, retrying: {e}")
+            await asyncio.sleep(5)
+
+
+async def poll_for_runs(pool, cache, interval):
+    """Clear the cache whenever the newest scraper_logs id changes"""
+    latest = None
+    while True:
+        try:
+            run_id = (await fetch(pool, queries.LATEST_RUN))[0]['run_id']
+            if run_id != latest:
+                cache.clear()
+                latest = run_id
+        except Exception as e:
+            logger.error(f"Error polling scraper runs: {e}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    pool = AsyncConnectionPool(
+        kwargs=connection_params(),
+        min_size=int(os.getenv('API_POOL_MIN', '2')),
+        max_size=int(os.getenv('API_POOL_MAX', '10')),
+        open=False,
+    )
+    await pool.open(wait=True)
+    cache = ResponseCache(
+        maxsize=int(os.getenv('API_CACHE_SIZE', '1024')),
+        ttl=float(os.getenv('API_CACHE_TTL', '300')),
+    )
+    if os.getenv('API_INVALIDATION', 'listen') == 'poll':
+        watcher = asyncio.create_task(
+            poll_for_runs(pool, cache, float(os.getenv('API_POLL_INTERVAL', '5'))))
+    else:
+        watcher = asyncio.create_task(listen_for_runs(cache))
+    app.state.pool = pool
+    app.state.cache = cache
+    app.state.inflight = {}
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+        await pool.close()
+
+
+app = FastAPI(title='Global Scholarship Hub API', lifespan=lifespan)
+
+
+async def cached(request, compute):
+    """
+    Respond with the JSON of `await compute(pool)`, from the cache when
+    possible, or 304 if the client already has it.
+    """
+    state = request.app.state
+    key = request.url.path + '?' + urlencode(sorted(request.query_params.multi_items()))
+    entry = state.cache.get(key)
+    if entry is None:
+        task = state.inflight.get(key)
+        if task is None:
+            generation = state.cache.generation
+
+            async def respond():
+                body = encode(await compute(state.pool))
+                return state.cache.put(key, body, generation)
+
+            task = asyncio.ensure_future(respond())
+            state.inflight[key] = task
+            task.add_done_callback(lambda _: state.inflight.pop(key, None))
+        entry = await asyncio.shield(task)
+
+    headers = {'ETag': entry.etag, 'Cache-Control': CACHE_CONTROL}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type='application/json', headers=headers)
+
+
+def _listing(cursor, country, degree, subject, limit):
+    try:
+        params = queries.page_params(cursor, country, degree, subject, limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    async def compute(pool):
+        rows = await fetch(pool, queries.ACTIVE_SCHOLARSHIPS_PAGE, params)
+        rows, next_cursor = queries.split_page(rows, params['limit'])
+        return {'items': rows, 'next_cursor': next_cursor}
+    return compute
+
+
+@app.get('/api/scholarships')
+async def list_scholarships(request: Request, cursor: str = None, country: str = None,
+                            degree: str = None, subject: str = None,
+                            limit: int = Query(50, ge=1, le=100)):
+    """Active scholarships, featured first, then by deadline; pass next_cursor for more"""
+    return await cached(request, _listing(cursor, country, degree, subject, limit))
+
+
+@app.get('/api/scholarships/filter')
+async def filter_scholarships(request: Request, country: str = None, degree: str = None,
+                              subject: str = None, cursor: str = None,
+                              limit: int = Query(50, ge=1, le=100)):
+    """Active scholarships with exactly this country, degree level and/or subject"""
+    return await cached(request, _listing(cursor, country, degree, subject, limit))
+
+
+@app.get('/api/scholarships/featured')
+async def featured_scholarships(request: Request, limit: int = Query(12, ge=1, le=100)):
+    async def compute(pool):
+        return {'items': await fetch(pool, queries.FEATURED, {'limit': limit})}
+    return await cached(request, compute)
+
+
+@app.get('/api/scholarships/search')
+async def search_scholarships(request: Request, q: str = Query(..., min_length=1),
+                              country: str = None, degree: str = None, subject: str = None,
+                              limit: int = Query(50, ge=1, le=100),
+                              offset: int = Query(0, ge=0)):
+    """Ranked web-style search: "exact phrase", -exclude, or"""
+    params = queries.search_params(q, country, degree, subject, limit, offset)
+
+    async def compute(pool):
+        return {'items': await fetch(pool, queries.ACTIVE_SCHOLARSHIPS, params)}
+    return await cached(request, compute)
+
+
+@app.get('/api/scholarships/{scholarship_id}')
+async def get_scholarship(request: Request, scholarship_id: int):
+    async def compute(pool):
+        rows = await fetch(pool, queries.SCHOLARSHIP, {'id': scholarship_id})
+        if not rows:
+            raise HTTPException(404, 'Scholarship not found')
+        return rows[0]
+    return await cached(request, compute)
+
+
+def _facet(name):
+    async def compute(pool):
+        return queries.facet_lists(
+            (row['facet'], row['value'], row['active_count'])
+            for row in await fetch(pool, queries.FACETS)
+        )[name]
+    return compute
+
+
+@app.get('/api/countries')
+async def countries(request: Request):
+    return await cached(request, _facet('country'))
+
+
+@app.get('/api/degree-levels')
+async def degree_levels(request: Request):
+    return await cached(request, _facet('degree_level'))
+
+
+@app.get('/api/subjects')
+async def subjects(request: Request):
+    return await cached(request, _facet('subject'))
+
+
+@app.get('/api/stats')
+async def stats(request: Request):
+    async def compute(pool):
+        rows = await fetch(pool, queries.STATS)
+        return rows[0] if rows else {}
+    return await cached(request, compute)
+
+
+@app.get('/api/translations/{lang}')
+async def translations(request: Request, lang: str):
+    async def compute(pool):
+        rows = await fetch(pool, queries.TRANSLATIONS, {'lang': lang})
+        if not rows:
+            raise HTTPException(404, f"No translations for {lang!r}")
+        return {row['key']: row['value'] for row in rows}
+    return await cached(request, compute)
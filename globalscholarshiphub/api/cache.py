@@ -0,0 +1,80 @@
+"""
+In-process response cache for the read API
+
+Entries are the encoded response body and its ETag, keyed by path and
+query string. Each lives `ttl` seconds; past `maxsize` entries the least
+recently used one is evicted. The data only changes when a scraper run
+finishes, so the app clears the whole cache on that signal (see app.py)
+and the TTL only bounds staleness if the signal is missed.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    expires: float
+
+
+def etag_for(body):
+    """Strong ETag of a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(header, etag):
+    """Whether an If-None-Match header value covers `etag`"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+class ResponseCache:
+    """
+    TTL + LRU map of request keys to CachedResponse.
+
+    Only touched from the event loop, so it needs no lock. A maxsize of
+    0 disables caching.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+        # Bumped by clear(); a response computed before a clear must not
+        # be stored after it
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.expires <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, body, generation=None):
+        """Store a body and return its CachedResponse"""
+        entry = CachedResponse(body, etag_for(body), self._clock() + self.ttl)
+        if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.generation += 1
@@ -0,0 +1,204 @@
+"""
+Read queries over the scholarships database
+
+SQL lives here as module constants with psycopg-style parameters, so the
+same statements serve psycopg2 scripts and benchmarks as well as an async
+psycopg 3 pool. The helpers take an open connection and return rows as
+dicts.
+
+Searching goes through get_active_scholarships() in database/schema.sql,
+which matches the stored, weighted search_vector with websearch_to_tsquery
+(GIN index) and scholarship names by trigram similarity (pg_trgm index),
+and ranks the matches.
+
+Browsing without a search pages by keyset through
+get_active_scholarships_page(): each page ends with an opaque cursor
+naming its last row, and the next page is one index range scan from
+there, so page 1000 costs the same as page 1.
+
+Counts (stats() and facets()) come from materialized views the scrapers
+refresh after each run.
+"""
+import base64
+import datetime
+import json
+
+ACTIVE_SCHOLARSHIPS = """
+    SELECT * FROM get_active_scholarships(
+        %(country)s, %(degree)s, %(subject)s, %(search)s, %(limit)s, %(offset)s
+    )
+"""
+
+# One row more than the page holds, which shows whether another page follows
+ACTIVE_SCHOLARSHIPS_PAGE = """
+    SELECT * FROM get_active_scholarships_page(
+        %(country)s, %(degree)s, %(subject)s,
+        %(after_featured)s, %(after_deadline)s, %(after_id)s, %(limit)s + 1
+    )
+"""
+
+SCHOLARSHIP = """
+    SELECT id, name, provider, description, eligibility, amount, currency,
+           amount_min, amount_max, amount_period, deadline, country, degree_level,
+           subject, application_link, is_featured, status, source_name, updated_at
+    FROM scholarships
+    WHERE id = %(id)s
+"""
+
+FEATURED = """
+    SELECT id, name, provider, amount, deadline, country, degree_level, subject
+    FROM featured_scholarships
+    LIMIT %(limit)s
+"""
+
+TRANSLATIONS = """
+    SELECT t.key, t.value
+    FROM languages l
+    JOIN translations t ON t.language_code = l.code
+    WHERE l.code = %(lang)s AND l.is_active
+"""
+
+# Newest scraper run; the API clears its cache when this changes
+LATEST_RUN = 'SELECT max(id) AS run_id FROM scraper_logs'
+
+# Materialized by database/schema.sql and refreshed after each scrape, so
+# both reads are a handful of rows
+STATS = """
+    SELECT total_scholarships, active_scholarships, featured_count,
+           countries_count, degree_levels_count, refreshed_at
+    FROM scholarship_stats
+"""
+
+FACETS = """
+    SELECT facet, value, active_count
+    FROM scholarship_facets
+    ORDER BY facet, active_count DESC, value
+"""
+
+# Longest search string passed to the database; websearch_to_tsquery never
+# fails on its input, so only the length needs bounding
+MAX_SEARCH_LENGTH = 200
+
+
+def search_params(search=None, country=None, degree=None, subject=None, limit=50, offset=0):
+    """Parameters for ACTIVE_SCHOLARSHIPS; blank strings mean no filter"""
+    search = (search or '').strip()[:MAX_SEARCH_LENGTH] or None
+    return {
+        'country': country or None,
+        'degree': degree or None,
+        'subject': subject or None,
+        'search': search,
+        'limit': max(1, min(int(limit), 100)),
+        'offset': max(0, int(offset)),
+    }
+
+
+def fetch_dicts(cursor):
+    """Remaining rows of an executed cursor as dicts"""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def search_scholarships(connection, search=None, **filters):
+    """
+    Active scholarships matching a web-style search (`"exact phrase"`,
+    `-exclude`, `or`) and optional exact country/degree/subject filters, best
+    matches first. Without a search they come featured first, then by
+    deadline.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(ACTIVE_SCHOLARSHIPS, search_params(search, **filters))
+        return fetch_dicts(cursor)
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past `row`, a page row as a dict"""
+    deadline = row['deadline']
+    key = [bool(row['is_featured']), deadline.isoformat() if deadline else None, row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(is_featured, deadline, id) of an encode_cursor() value; ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        featured, deadline, scholarship_id = json.loads(base64.urlsafe_b64decode(padded))
+        deadline = datetime.date.fromisoformat(deadline) if deadline is not None else None
+        if not isinstance(featured, bool) or not isinstance(scholarship_id, int):
+            raise TypeError(scholarship_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    return featured, deadline, scholarship_id
+
+
+def page_params(cursor=None, country=None, degree=None, subject=None, limit=50):
+    """Parameters for ACTIVE_SCHOLARSHIPS_PAGE; blank strings mean no filter"""
+    featured, deadline, after_id = decode_cursor(cursor) if cursor else (None, None, None)
+    return {
+        'country': country or None,
+        'degree': degree or None,
+        'subject': subject or None,
+        'after_featured': featured,
+        'after_deadline': deadline,
+        'after_id': after_id,
+        'limit': max(1, min(int(limit), 100)),
+    }
+
+
+def scholarships_page(connection, cursor=None, **filters):
+    """
+    One page of active scholarships, featured first, then by deadline,
+    and the cursor of the next page (None after the last one).
+    """
+    params = page_params(cursor, **filters)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(ACTIVE_SCHOLARSHIPS_PAGE, params)
+        rows = fetch_dicts(db_cursor)
+    return split_page(rows, params['limit'])
+
+
+def split_page(rows, limit):
+    """
+    The page in `rows`, fetched with ACTIVE_SCHOLARSHIPS_PAGE, and the
+    cursor of the page after it, or None if no row is left for one
+    """
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def iter_scholarships(connection, page_size=100, **filters):
+    """Every active scholarship matching the filters, fetched page by page"""
+    cursor = None
+    while True:
+        rows, cursor = scholarships_page(connection, cursor, limit=page_size, **filters)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def stats(connection):
+    """Scholarship counts as of the last refresh, as a dict"""
+    with connection.cursor() as cursor:
+        cursor.execute(STATS)
+        rows = fetch_dicts(cursor)
+    return rows[0] if rows else {}
+
+
+def facets(connection):
+    """
+    Filter values with their active scholarship counts, most common
+    first: {'country': [{'value': 'UK', 'count': 120}, ...],
+    'degree_level': [...], 'subject': [...]}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS)
+        return facet_lists(cursor.fetchall())
+
+
+def facet_lists(rows):
+    """Group FACETS rows by facet"""
+    result = {'country': [], 'degree_level': [], 'subject': []}
+    for facet, value, count in rows:
+        result.setdefault(facet, []).append({'value': value, 'count': count})
+    return result
@@ -0,0 +1,61 @@
+from api.cache import ResponseCache, etag_for, etag_matches
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put('/a', b'{}')
+    clock.now = 9.9
+    assert cache.get('/a').body == b'{}'
+    clock.now = 10
+    assert cache.get('/a') is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2, clock=Clock())
+    cache.put('/a', b'a')
+    cache.put('/b', b'b')
+    cache.get('/a')
+    cache.put('/c', b'c')
+    assert cache.get('/b') is None
+    assert cache.get('/a') is not None and cache.get('/c') is not None
+
+
+def test_clear_drops_responses_computed_before_it():
+    cache = ResponseCache(clock=Clock())
+    generation = cache.generation
+    cache.clear()
+    # A query that started before the scraper run finished is served
+    # once but not stored
+    entry = cache.put('/a', b'stale', generation)
+    assert entry.body == b'stale'
+    assert cache.get('/a') is None
+    cache.put('/a', b'fresh', cache.generation)
+    assert cache.get('/a').body == b'fresh'
+
+
+def test_zero_maxsize_disables_caching():
+    cache = ResponseCache(maxsize=0, clock=Clock())
+    assert cache.put('/a', b'a').etag == etag_for(b'a')
+    assert cache.get('/a') is None
+
+
+def test_etag_matches_if_none_match():
+    etag = etag_for(b'body')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_for(b'other') != etag
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"x", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"x"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Load test: the read API with its response cache off, on, and with
+clients revalidating by ETag.
+
+Loads generated scholarships into a scratch schema built from
+database/schema.sql on a local PostgreSQL (DB_HOST, DB_PORT, DB_NAME,
+DB_USER, DB_PASSWORD), starts `uvicorn api.app:app` on it once per
+scenario and fires a mix of listing, search, facet and detail requests
+from concurrent keep-alive clients. Reports requests per second and
+p50/p99 latency. The schema is dropped afterwards.
+
+Needs the packages in api/requirements.txt.
+
+Usage:
+    python benchmarks/bench_api.py                         # 50,000 rows
+    python benchmarks/bench_api.py --requests 20000 --concurrency 64
+    python benchmarks/bench_api.py --url http://localhost:8000   # a running server
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+
+SCHEMA = 'bench_api'
+
+# The server inherits this, so its pool resolves tables in the scratch schema
+os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA},public'
+
+import httpx  # noqa: E402
+import psycopg2  # noqa: E402
+
+from corpus import COUNTRIES, DEGREES, LISTING_COLUMNS, SUBJECTS, listing_rows  # noqa: E402
+from scraper.db import connection_params  # noqa: E402
+
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '..')
+SCHEMA_SQL = os.path.join(PROJECT_DIR, 'database', 'schema.sql')
+
+SEARCH_TERMS = ['engineering', 'fulbright', 'chevening', 'research', 'full tuition',
+                '"living allowance"', 'medicine -usa', 'erasmus']
+
+# (scenario, environment for the server, revalidate with If-None-Match)
+SCENARIOS = [
+    ('no cache', {'API_CACHE_SIZE': '0'}, False),
+    ('cache', {}, False),
+    ('cache + ETag', {}, True),
+]
+
+
+def create_schema(connection, rows):
+    with open(SCHEMA_SQL, encoding='utf-8') as f:
+        schema_sql = f.read()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+        cursor.execute(schema_sql)
+        cursor.execute('TRUNCATE scholarships CASCADE')
+        cursor.copy_expert(
+            f"COPY scholarships ({', '.join(LISTING_COLUMNS)}) FROM STDIN", listing_rows(rows)
+        )
+        cursor.execute('ANALYZE scholarships')
+        cursor.execute('SELECT refresh_scholarship_stats()')
+    connection.commit()
+
+
+def request_mix(count, rows, seed=1):
+    """`count` request paths, weighted roughly like page views"""
+    generator = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        roll = generator.random()
+        if roll < 0.3:
+            paths.append('/api/scholarships')
+        elif roll < 0.5:
+            paths.append(f'/api/scholarships/search?q={generator.choice(SEARCH_TERMS)}')
+        elif roll < 0.65:
+            paths.append(f'/api/scholarships/filter?country={generator.choice(COUNTRIES)}'
+                         f'&degree={generator.choice(DEGREES)}')
+        elif roll < 0.75:
+            paths.append(generator.choice(['/api/countries', '/api/degree-levels',
+                                           '/api/subjects', '/api/stats']))
+        elif roll < 0.85:
+            paths.append(f'/api/scholarships/filter?subject={generator.choice(SUBJECTS)}')
+        elif roll < 0.9:
+            paths.append('/api/scholarships/featured')
+        else:
+            # Detail pages have a long tail, most of them cache misses
+            paths.append(f'/api/scholarships/{generator.randint(1, rows)}')
+    return paths
+
+
+async def load(url, paths, concurrency, revalidate):
+    """Latencies of every request in `paths`, and the wall time taken"""
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies = []
+    statuses = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def client_loop(client):
+        etags = {}
+        while not queue.empty():
+            path = queue.get_nowait()
+            headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if 'etag' in response.headers:
+                etags[path] = response.headers['etag']
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed, statuses
+
+
+def start_server(port, env):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api.app:app', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=PROJECT_DIR, env=dict(os.environ, **env),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/api/stats', timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError('API server did not start')
+
+
+def report(label, latencies, elapsed, statuses):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    codes = ' '.join(f'{code}:{count}' for code, count in sorted(statuses.items()))
+    print(f"{label:<16}{len(latencies) / elapsed:>10.0f}{p50:>10.2f}ms{p99:>10.2f}ms  {codes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=10_000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help='load test a running server instead')
+    args = parser.parse_args()
+
+    paths = request_mix(args.requests, args.rows)
+    print(f"{'scenario':<16}{'req/s':>10}{'p50':>12}{'p99':>12}  status codes")
+    if args.url:
+        for label, _, revalidate in SCENARIOS[1:]:
+            report(label, *asyncio.run(load(args.url, paths, args.concurrency, revalidate)))
+        return
+
+    connection = psycopg2.connect(**connection_params())
+    try:
+        create_schema(connection, args.rows)
+        for label, env, revalidate in SCENARIOS:
+            server = start_server(args.port, env)
+            try:
+                url = f'http://127.0.0.1:{args.port}'
+                # Warm the pool and, where enabled, the cache
+                asyncio.run(load(url, paths[:args.concurrency * 4], args.concurrency, False))
+                report(label, *asyncio.run(load(url, paths, args.concurrency, revalidate)))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        connection.rollback()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        connection.commit()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: COPY + set-based merge vs prepared array upserts.
+
+Drives the standalone scraper's own insert_scholarships against a local
+PostgreSQL (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD). Everything
+runs inside a scratch schema built from database/schema.sql, which is
+dropped afterwards, so existing data is never touched.
+
+For each write mode and batch size it measures three passes over the same
+records: an initial load, a re-load with nothing changed, and a re-load
+with 10% of the records changed.
+
+Usage:
+    python benchmarks/bench_bulk_ingest.py                 # 20,000 records
+    python benchmarks/bench_bulk_ingest.py --rows 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+os.environ.setdefault('SCRAPER_CACHE_PATH', '')
+os.environ.setdefault('SCRAPER_SEEN_PATH', '')
+os.environ.setdefault('SCRAPER_DEDUP', '0')
+
+SCHEMA = 'bench_ingest'
+
+# Every pooled connection resolves tables in the scratch schema
+os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA},public'
+
+import psycopg2  # noqa: E402
+
+from corpus import load_descriptions  # noqa: E402
+import standalone_scraper  # noqa: E402
+from scraper import extraction  # noqa: E402
+from scraper.db import Database, connection_params  # noqa: E402
+
+
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '..', 'database', 'schema.sql')
+
+# (write mode, rows per insert_scholarships call)
+CONFIGURATIONS = [
+    ('values', 50),
+    ('values', 1000),
+    ('copy', 1000),
+    ('copy', 10000),
+]
+
+
+def make_records(count):
+    descriptions = load_descriptions()
+    records = []
+    for i in range(count):
+        description = descriptions[i % len(descriptions)]
+        records.append({
+            'name': f'Benchmark Scholarship {i}',
+            'description': description,
+            'provider': f'Provider {i % 97}',
+            'eligibility': 'Open to international students',
+            'amount': extraction.extract_amount(description),
+            'currency': 'USD',
+            'deadline': extraction.extract_deadline(description),
+            'application_link': f'https://example.com/scholarships/{i}',
+            'country': 'International',
+            'degree_level': 'Master',
+            'subject': 'Any',
+            'source_url': 'https://example.com/',
+            'source_name': 'benchmark',
+        })
+    return records
+
+
+def change_some(records, fraction=0.1):
+    step = int(1 / fraction)
+    return [
+        dict(record, description=record['description'] + ' (updated)') if i % step == 0 else record
+        for i, record in enumerate(records)
+    ]
+
+
+def create_schema(connection):
+    with open(SCHEMA_SQL, encoding='utf-8') as f:
+        schema_sql = f.read()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+        cursor.execute(schema_sql)
+        cursor.execute('TRUNCATE scholarships CASCADE')
+    connection.commit()
+
+
+def run_pass(scraper, records, batch_size):
+    for key in ('inserted', 'updated', 'unchanged', 'errors'):
+        scraper.stats[key] = 0
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch_size):
+        scraper.insert_scholarships(records[offset:offset + batch_size], 'benchmark')
+    elapsed = time.perf_counter() - start
+    counts = {key: scraper.stats[key] for key in ('inserted', 'updated', 'unchanged', 'errors')}
+    return elapsed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='records per pass')
+    args = parser.parse_args()
+
+    # insert_scholarships logs every batch
+    standalone_scraper.logger.setLevel(logging.WARNING)
+
+    records = make_records(args.rows)
+    changed = change_some(records)
+    connection = psycopg2.connect(**connection_params())
+    try:
+        print(f"{'mode':<8}{'batch':>7}  {'pass':<10}{'time':>9}{'rows/s':>10}  counts")
+        for mode, batch_size in CONFIGURATIONS:
+            create_schema(connection)
+            scraper = standalone_scraper.ScholarshipScraper(write_mode=mode)
+            scraper.db = Database()
+            for label, rows in (('initial', records), ('unchanged', records), ('10% diff', changed)):
+                elapsed, counts = run_pass(scraper, rows, batch_size)
+                summary = ', '.join(f'{key} {value}' for key, value in counts.items())
+                print(f"{mode:<8}{batch_size:>7}  {label:<10}{elapsed:>8.2f}s"
+                      f"{len(rows) / elapsed:>10.0f}  {summary}")
+            scraper.db.close()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        connection.commit()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled single-pass deadline/amount extraction vs the previous
+per-pattern re.search + strptime implementation.
+
+Usage:
+    python benchmarks/bench_extraction.py [--repeat 200]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+
+from corpus import load_descriptions  # noqa: E402
+from scraper import extraction  # noqa: E402
+
+
+# Previous implementation, kept verbatim for comparison
+
+def legacy_parse_date(date_str):
+    formats = ['%d %B %Y', '%B %d %Y', '%B %d, %Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str.strip(), fmt).date()
+        except Exception:
+            continue
+    return None
+
+
+def legacy_extract_deadline(text):
+    if not text:
+        return None
+    patterns = [
+        r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
+        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
+        r'(\d{4})-(\d{2})-(\d{2})',
+        r'(\d{1,2})/(\d{1,2})/(\d{4})',
+        r'Deadline:\s*(.+?)(?:\n|$)',
+        r'Closing\s*Date:\s*(.+?)(?:\n|$)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            try:
+                return legacy_parse_date(match.group(0))
+            except Exception:
+                continue
+    return None
+
+
+def legacy_extract_amount(text):
+    if not text:
+        return ''
+    patterns = [
+        r'\$[\d,]+(?:\.\d{2})?', r'€[\d,]+(?:\.\d{2})?', r'£[\d,]+(?:\.\d{2})?',
+        r'full\s+tuition', r'full\s+funding', r'fully\s+funded',
+        r'partial\s+funding', r'\d+%\s+tuition',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(0)
+    return ''
+
+
+def timed(fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_descriptions()
+    calls = len(corpus) * args.repeat
+
+    def legacy(text):
+        return legacy_extract_deadline(text), legacy_extract_amount(text)
+
+    def compiled_cold(text):
+        extraction.extract.cache_clear()
+        return extraction.extract_deadline(text), extraction.extract_amount(text)
+
+    def compiled(text):
+        return extraction.extract_deadline(text), extraction.extract_amount(text)
+
+    mismatches = [(text, legacy(text), compiled_cold(text)) for text in corpus
+                  if legacy(text) != compiled_cold(text)]
+
+    extraction.extract.cache_clear()
+    results = [
+        ('legacy re.search + strptime', timed(legacy, corpus, args.repeat)),
+        ('compiled, uncached', timed(compiled_cold, corpus, args.repeat)),
+        ('compiled, memoized', timed(compiled, corpus, args.repeat)),
+    ]
+
+    print(f"{len(corpus)} descriptions x {args.repeat} = {calls} extractions")
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"  {label:<30} {seconds * 1e6 / calls:8.2f} us/text  "
+              f"{baseline / seconds:6.1f}x")
+    print(f"  cache: {extraction.extract.cache_info()}")
+
+    if mismatches:
+        print(f"\n{len(mismatches)} texts extracted differently:")
+        for text, old, new in mismatches:
+            print(f"  {text[:70]!r}\n    legacy:   {old}\n    compiled: {new}")
+
+
+if __name__ == '__main__':
+    main()
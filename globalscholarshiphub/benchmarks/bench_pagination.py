@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyset pages vs LIMIT/OFFSET pages of the active listing.
+
+Loads generated scholarships into a scratch schema built from
+database/schema.sql on a local PostgreSQL (DB_HOST, DB_PORT, DB_NAME,
+DB_USER, DB_PASSWORD), which is dropped afterwards. Pages at increasing
+depth are fetched through the previous get_active_scholarships() with
+p_offset and through get_active_scholarships_page() with a cursor, then
+the whole listing is walked both ways. Before timing, EXPLAIN checks that
+the deepest page starts its scan of idx_scholarships_active_order from
+the cursor (an Index Cond on the row comparison), with custom and with
+generic plans.
+
+Usage:
+    python benchmarks/bench_pagination.py                  # 200,000 rows
+    python benchmarks/bench_pagination.py --rows 1000000 --page-size 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+
+# The previous get_active_scholarships(), with p_offset paging
+from bench_search import LEGACY_FUNCTION, LEGACY_QUERY  # noqa: E402
+
+SCHEMA = 'bench_pagination'
+
+# Every connection resolves tables in the scratch schema
+os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA},public'
+
+import psycopg2  # noqa: E402
+
+from api import queries  # noqa: E402
+from corpus import LISTING_COLUMNS, listing_rows  # noqa: E402
+from scraper.db import connection_params  # noqa: E402
+
+
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '..', 'database', 'schema.sql')
+
+DEPTHS = [1, 10, 100, 1000]
+
+PREPARE_PAGE = ('PREPARE deep_page (varchar, varchar, varchar, boolean, date, integer, integer) '
+                'AS {sql}')
+EXPLAIN_PAGE = 'EXPLAIN EXECUTE deep_page (NULL, NULL, NULL, %s, %s, %s, %s)'
+
+
+def create_schema(connection, rows):
+    with open(SCHEMA_SQL, encoding='utf-8') as f:
+        schema_sql = f.read()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+        cursor.execute(schema_sql)
+        cursor.execute(LEGACY_FUNCTION)
+        cursor.execute('TRUNCATE scholarships CASCADE')
+        cursor.copy_expert(
+            f"COPY scholarships ({', '.join(LISTING_COLUMNS)}) FROM STDIN", listing_rows(rows)
+        )
+        cursor.execute('ANALYZE scholarships')
+    connection.commit()
+
+
+def offset_page(connection, page, page_size):
+    params = queries.search_params(limit=page_size, offset=page * page_size)
+    with connection.cursor() as cursor:
+        cursor.execute(LEGACY_QUERY, params)
+        return cursor.fetchall()
+
+
+def cursors_at(connection, depths, page_size):
+    """Cursor leading to each page number in `depths`, found by walking"""
+    cursors, cursor, page = {0: None}, None, 0
+    while page < max(depths):
+        _, cursor = queries.scholarships_page(connection, cursor, limit=page_size)
+        if cursor is None:
+            break
+        page += 1
+        cursors[page] = cursor
+    return cursors
+
+
+def page_plans(connection, cursor_value, page_size):
+    """EXPLAIN output of the statement behind a page, per plan_cache_mode"""
+    featured, deadline, after_id = queries.decode_cursor(cursor_value)
+    plans = {}
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT active_scholarships_page_sql(NULL, NULL, NULL, %s)', (after_id,))
+        cursor.execute(PREPARE_PAGE.format(sql=cursor.fetchone()[0]))
+        try:
+            for mode in ('force_custom_plan', 'force_generic_plan'):
+                cursor.execute(f'SET plan_cache_mode = {mode}')
+                cursor.execute(EXPLAIN_PAGE, (featured, deadline, after_id, page_size))
+                plans[mode] = '\n'.join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute('RESET plan_cache_mode')
+            cursor.execute('DEALLOCATE deep_page')
+    return plans
+
+
+def check_plans(plans):
+    """Exit unless every plan seeks the index from the cursor"""
+    for mode, plan in plans.items():
+        if 'idx_scholarships_active_order' not in plan or 'Index Cond: (ROW(' not in plan:
+            print(f"Deep page does not seek idx_scholarships_active_order ({mode}):\n{plan}")
+            sys.exit(1)
+    print("Deep page plans seek idx_scholarships_active_order from the cursor")
+
+
+def timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(**connection_params())
+    try:
+        start = time.perf_counter()
+        create_schema(connection, args.rows)
+        print(f"Loaded {args.rows} rows in {time.perf_counter() - start:.1f}s\n")
+
+        depths = [depth for depth in DEPTHS if depth * args.page_size < args.rows]
+        cursors = cursors_at(connection, depths, args.page_size)
+        check_plans(page_plans(connection, cursors[depths[-1]], args.page_size))
+        print(f"{'page':>8}{'OFFSET':>12}{'keyset':>12}{'speedup':>9}")
+        for depth in depths:
+            offset_time = timed(lambda: offset_page(connection, depth, args.page_size), args.repeat)
+            keyset_time = timed(lambda: queries.scholarships_page(
+                connection, cursors[depth], limit=args.page_size), args.repeat)
+            print(f"{depth:>8}{offset_time * 1000:>10.2f}ms{keyset_time * 1000:>10.2f}ms"
+                  f"{offset_time / keyset_time:>8.1f}x")
+
+        start = time.perf_counter()
+        page = walked = 0
+        while rows := offset_page(connection, page, args.page_size):
+            walked += len(rows)
+            page += 1
+        offset_walk = time.perf_counter() - start
+        start = time.perf_counter()
+        keyset_walked = sum(1 for _ in queries.iter_scholarships(connection, args.page_size))
+        keyset_walk = time.perf_counter() - start
+        print(f"\nFull walk: OFFSET {offset_walk:.1f}s ({walked} rows), "
+              f"keyset {keyset_walk:.1f}s ({keyset_walked} rows)")
+    finally:
+        connection.rollback()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        connection.commit()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
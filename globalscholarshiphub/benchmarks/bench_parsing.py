@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: targeted lxml pull parsing vs full-document BeautifulSoup trees
+for the standalone scraper's listing-page parsers.
+
+Reports parse time and peak memory per source. Each measurement runs in a
+fresh process so peak RSS is not polluted by earlier runs; the Python-heap
+peak comes from tracemalloc, the RSS growth covers libxml2 allocations too.
+
+Usage:
+    python benchmarks/bench_parsing.py                 # synthetic pages
+    python benchmarks/bench_parsing.py --articles 2000 # bigger pages
+    python benchmarks/bench_parsing.py --live          # fetch the real sources
+"""
+import argparse
+from dataclasses import replace
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+os.environ.setdefault('SCRAPER_CACHE_PATH', '')
+os.environ.setdefault('SCRAPER_SEEN_PATH', '')
+
+from corpus import DESCRIPTIONS  # noqa: E402
+import standalone_scraper  # noqa: E402
+from scraper.classifier import classify  # noqa: E402
+
+
+SOURCES = {
+    'scholarship_positions': ('post', 'entry-content'),
+    'opportunities_corners': ('type-post', 'entry-excerpt'),
+    'scholarship_roar': ('post', 'entry-content'),
+}
+
+
+def synthetic_page(article_class, body_class, articles):
+    """A WordPress-style listing page with long entries and heavy chrome"""
+    chrome = '<script>' + 'var tracking = {};' * 2000 + '</script>'
+    nav = '<nav>' + ''.join(f'<a href="/c/{i}">Category {i}</a>' for i in range(500)) + '</nav>'
+    entries = []
+    for i in range(articles):
+        text = DESCRIPTIONS[i % len(DESCRIPTIONS)]
+        paragraphs = ''.join(f'<p>{text}</p>' for _ in range(10))
+        entries.append(
+            f'<article class="{article_class} hentry"><h2 class="entry-title">'
+            f'<a href="https://example.com/s/{i}">Scholarship {i}: {text[:60]}</a></h2>'
+            f'<div class="{body_class}">{paragraphs}</div></article>'
+        )
+    return (f'<html><head>{chrome}</head><body>{nav}<main>{"".join(entries)}</main>'
+            f'<footer>{nav}</footer></body></html>')
+
+
+def legacy_parse(html, article_class, body_class, limit=20):
+    """Previous implementation: full BeautifulSoup tree, get_text() then truncate"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'lxml')
+    scholarships = []
+    for article in soup.find_all('article', class_=article_class)[:limit]:
+        title_elem = article.find('h2', class_='entry-title')
+        if not title_elem:
+            continue
+        name = title_elem.get_text().strip()
+        link_elem = title_elem.find('a')
+        content = article.find('div', class_=body_class)
+        description = content.get_text().strip()[:500] if content else ''
+        classification = classify(f'{name} {description}')
+        scholarships.append({
+            'name': name,
+            'description': description,
+            'application_link': link_elem['href'] if link_elem else '',
+            'deadline': standalone_scraper.extraction.extract_deadline(description),
+            'amount': standalone_scraper.extraction.extract_amount(description),
+            'degree_level': classification.degree_level,
+        })
+    return scholarships
+
+
+def targeted_parse(source_name, html):
+    """Current implementation via the scraper's own parser"""
+    scraper = standalone_scraper.ScholarshipScraper()
+    scraper.fetch_page = lambda url, **kwargs: html
+    source = scraper.sources[source_name]
+    return scraper.parse_source(type(source)(replace(source.definition, max_pages=1)))
+
+
+def measure(queue, impl, source_name, html):
+    article_class, body_class = SOURCES[source_name]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    if impl == 'before':
+        items = legacy_parse(html, article_class, body_class)
+    else:
+        items = targeted_parse(source_name, html)
+    elapsed = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    queue.put((elapsed, heap_peak, rss_growth, [(i['name'], i['description']) for i in items]))
+
+
+def run_isolated(impl, source_name, html):
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    process = ctx.Process(target=measure, args=(queue, impl, source_name, html))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=500,
+                        help='articles per synthetic listing page')
+    parser.add_argument('--live', action='store_true',
+                        help='benchmark the live source pages instead')
+    args = parser.parse_args()
+
+    pages = {}
+    if args.live:
+        import requests
+        scraper = standalone_scraper.ScholarshipScraper()
+        for source_name, source in scraper.sources.items():
+            response = requests.get(source.definition.url, timeout=30,
+                                    headers=dict(scraper.session.headers))
+            pages[source_name] = response.text
+    else:
+        for source_name, (article_class, body_class) in SOURCES.items():
+            pages[source_name] = synthetic_page(article_class, body_class, args.articles)
+
+    print(f"{'source':<24}{'page':>9}  {'impl':<7}{'time':>10}{'py heap':>11}"
+          f"{'rss +':>10}  items")
+    for source_name, html in pages.items():
+        results = {}
+        for impl in ('before', 'after'):
+            elapsed, heap, rss, items = run_isolated(impl, source_name, html)
+            results[impl] = (elapsed, items)
+            print(f"{source_name:<24}{len(html) / 1024:>7.0f}KB  {impl:<7}"
+                  f"{elapsed * 1000:>8.1f}ms{heap / 1024 / 1024:>9.1f}MB"
+                  f"{rss / 1024:>8.1f}MB  {len(items)}")
+        speedup = results['before'][0] / results['after'][0]
+        same = 'identical' if results['before'][1] == results['after'][1] else 'DIFFERENT'
+        print(f"{'':<24}{'':>9}  speedup {speedup:.1f}x, items {same}")
+
+
+if __name__ == '__main__':
+    main()
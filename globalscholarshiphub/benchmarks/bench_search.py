@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ranked full-text search vs the previous ILIKE scans.
+
+Loads generated scholarships into a scratch schema built from
+database/schema.sql on a local PostgreSQL (DB_HOST, DB_PORT, DB_NAME,
+DB_USER, DB_PASSWORD), which is dropped afterwards. The previous
+get_active_scholarships() is created next to the new one, and both run
+the same searches through api.queries.
+
+Usage:
+    python benchmarks/bench_search.py                  # 100,000 rows
+    python benchmarks/bench_search.py --rows 500000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+
+SCHEMA = 'bench_search'
+
+# Every connection resolves tables in the scratch schema
+os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA},public'
+
+import psycopg2  # noqa: E402
+
+from api import queries  # noqa: E402
+from corpus import LISTING_COLUMNS, listing_rows  # noqa: E402
+from scraper.db import connection_params  # noqa: E402
+
+
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '..', 'database', 'schema.sql')
+
+# Previous implementation, kept verbatim for comparison
+LEGACY_FUNCTION = """
+CREATE OR REPLACE FUNCTION legacy_get_active_scholarships(
+    p_country VARCHAR DEFAULT NULL,
+    p_degree VARCHAR DEFAULT NULL,
+    p_subject VARCHAR DEFAULT NULL,
+    p_search VARCHAR DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id INTEGER,
+    name VARCHAR,
+    provider VARCHAR,
+    amount VARCHAR,
+    deadline DATE,
+    country VARCHAR,
+    degree_level VARCHAR,
+    subject VARCHAR
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT s.id, s.name, s.provider, s.amount, s.deadline, s.country, s.degree_level, s.subject
+    FROM scholarships s
+    WHERE s.status = 'active'
+        AND (p_country IS NULL OR s.country ILIKE '%' || p_country || '%')
+        AND (p_degree IS NULL OR s.degree_level ILIKE '%' || p_degree || '%')
+        AND (p_subject IS NULL OR s.subject ILIKE '%' || p_subject || '%')
+        AND (p_search IS NULL OR 
+             s.name ILIKE '%' || p_search || '%' OR 
+             s.description ILIKE '%' || p_search || '%' OR
+             s.provider ILIKE '%' || p_search || '%')
+    ORDER BY s.is_featured DESC, s.deadline ASC NULLS LAST
+    LIMIT p_limit OFFSET p_offset;
+END;
+$$ LANGUAGE plpgsql;
+"""
+LEGACY_QUERY = queries.ACTIVE_SCHOLARSHIPS.replace('get_active_scholarships',
+                                                   'legacy_get_active_scholarships')
+
+SEARCHES = [
+    ('common word', 'engineering', {}),
+    ('rare name', 'fulbright', {}),
+    ('phrase', '"living allowance"', {}),
+    ('misspelt name', 'chevning', {}),
+    ('with filter', 'research', {'country': 'Germany'}),
+]
+
+
+def create_schema(connection, rows):
+    with open(SCHEMA_SQL, encoding='utf-8') as f:
+        schema_sql = f.read()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+        cursor.execute(schema_sql)
+        cursor.execute(LEGACY_FUNCTION)
+        cursor.execute('TRUNCATE scholarships CASCADE')
+        cursor.copy_expert(
+            f"COPY scholarships ({', '.join(LISTING_COLUMNS)}) FROM STDIN", listing_rows(rows)
+        )
+        cursor.execute('ANALYZE scholarships')
+    connection.commit()
+
+
+def time_query(connection, sql, params, repeat):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+    return (time.perf_counter() - start) / repeat, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(**connection_params())
+    try:
+        start = time.perf_counter()
+        create_schema(connection, args.rows)
+        print(f"Loaded {args.rows} rows in {time.perf_counter() - start:.1f}s\n")
+        print(f"{'search':<16}{'query':<22}{'ILIKE':>10}{'ranked':>10}{'speedup':>9}  rows")
+        for label, search, filters in SEARCHES:
+            params = queries.search_params(search, limit=20, **filters)
+            legacy_time, legacy_rows = time_query(connection, LEGACY_QUERY, params, args.repeat)
+            ranked_time, ranked_rows = time_query(connection, queries.ACTIVE_SCHOLARSHIPS,
+                                                  params, args.repeat)
+            print(f"{label:<16}{search:<22}{legacy_time * 1000:>8.1f}ms{ranked_time * 1000:>8.1f}ms"
+                  f"{legacy_time / ranked_time:>8.1f}x  {legacy_rows} / {ranked_rows}")
+    finally:
+        connection.rollback()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        connection.commit()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ScholarshipSpider's precompiled field plans vs the previous
+per-alternative .css() queries and BeautifulSoup re-parse.
+
+Both versions run on the same HtmlResponse, whose lxml tree is built
+before timing starts, as it is inside a crawl.
+
+Usage:
+    python benchmarks/bench_spider.py                # 200 entries per page
+    python benchmarks/bench_spider.py --entries 1000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scraper'))
+
+from scrapy.http import HtmlResponse, Request  # noqa: E402
+
+from corpus import DESCRIPTIONS  # noqa: E402
+from scraper.items import ScholarshipItem  # noqa: E402
+from scraper.spiders.scholarship_spider import ScholarshipSpider  # noqa: E402
+
+
+def listing_page(entries):
+    """A scholarships.com-style listing page"""
+    cards = []
+    for i in range(entries):
+        text = DESCRIPTIONS[i % len(DESCRIPTIONS)]
+        cards.append(
+            f'<div class="scholarship-item"><h2>Scholarship {i}: {text[:40]}</h2>'
+            f'<span class="sponsor">Provider {i % 17}</span>'
+            f'<span class="award">${1000 + i:,}</span>'
+            f'<span class="date">March {i % 28 + 1}, 2026</span>'
+            f'<p>{text}</p><div class="requirements">Open to all</div>'
+            f'<span class="level">Master</span>'
+            f'<a class="details" href="/s/{i}">Details</a></div>'
+        )
+    return ('<html><body><nav>' + '<a href="/c">c</a>' * 200 + '</nav>'
+            + ''.join(cards) + '<a class="next" href="?page=2">Next</a></body></html>')
+
+
+def generic_page(entries):
+    """An unknown site with article entries"""
+    articles = ''.join(
+        f'<article><h3>Generic Scholarship number {i}</h3>'
+        f'<p>{DESCRIPTIONS[i % len(DESCRIPTIONS)] * 3}</p></article>'
+        for i in range(entries)
+    )
+    return f'<html><body>{articles}</body></html>'
+
+
+# Previous implementation, kept verbatim for comparison
+
+def legacy_extract_text(selector, css_selectors):
+    for css in css_selectors.split(', '):
+        text = selector.css(f'{css}::text').get('').strip()
+        if text:
+            return text
+    return ''
+
+
+def legacy_scholarships_com(response):
+    items = []
+    for scholarship in response.css('div.scholarship-item, .scholarship-listing'):
+        item = ScholarshipItem()
+        item['name'] = legacy_extract_text(scholarship, 'h2, .scholarship-title, .title')
+        item['provider'] = legacy_extract_text(scholarship, '.provider, .sponsor, .organization')
+        item['amount'] = legacy_extract_text(scholarship, '.amount, .award, .value')
+        item['deadline'] = legacy_extract_text(scholarship, '.deadline, .date')
+        item['description'] = legacy_extract_text(scholarship, '.description, .summary, p')
+        item['eligibility'] = legacy_extract_text(scholarship, '.eligibility, .requirements')
+        item['country'] = legacy_extract_text(scholarship, '.location, .country') or 'International'
+        item['degree_level'] = legacy_extract_text(scholarship, '.degree, .level') or 'Any'
+        item['subject'] = legacy_extract_text(scholarship, '.subject, .field, .major') or 'Any'
+        if item['name']:
+            items.append(item)
+    response.css('a.next::attr(href), .pagination a:last-child::attr(href)').get()
+    return items
+
+
+def legacy_generic(response):
+    from bs4 import BeautifulSoup
+
+    def from_soup(element, tags):
+        for tag in tags:
+            found = element.find(tag)
+            if found:
+                return found.get_text().strip()
+        return ''
+
+    soup = BeautifulSoup(response.text, 'lxml')
+    items = []
+    for selector in ['article', '.scholarship', '.scholarship-item',
+                     '[class*="scholarship"]', '[class*="award"]']:
+        elements = soup.select(selector)
+        if elements:
+            for elem in elements[:10]:
+                item = ScholarshipItem()
+                item['name'] = from_soup(elem, ['h2', 'h3', '.title'])
+                item['description'] = from_soup(elem, ['.description', 'p'])[:500]
+                if item['name'] and len(item['name']) > 10:
+                    items.append(item)
+            break
+    return items
+
+
+COMPARED_FIELDS = ('name', 'provider', 'amount', 'deadline', 'description',
+                   'eligibility', 'country', 'degree_level', 'subject')
+
+
+def time_calls(func, response, repeat):
+    func(response)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(response)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=200, help='entries per page')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    spider = ScholarshipSpider()
+    cases = [
+        ('scholarships.com', 'https://www.scholarships.com/list', listing_page(args.entries),
+         legacy_scholarships_com,
+         lambda r: [i for i in spider.parse_scholarships_com(r) if isinstance(i, ScholarshipItem)]),
+        ('generic', 'https://example.org/awards', generic_page(args.entries),
+         legacy_generic, spider.parse_generic),
+    ]
+
+    print(f"{'page':<18}{'legacy':>11}{'compiled':>11}{'speedup':>9}  items")
+    for label, url, body, legacy, compiled in cases:
+        response = HtmlResponse(url, body=body, encoding='utf-8', request=Request(url))
+        response.selector.root  # build the tree up front, as Scrapy does
+        legacy_time, legacy_items = time_calls(legacy, response, args.repeat)
+        compiled_time, compiled_items = time_calls(compiled, response, args.repeat)
+        fields = COMPARED_FIELDS if label != 'generic' else ('name', 'description')
+        same = [[item.get(f) for f in fields] for item in legacy_items] == \
+               [[item.get(f) for f in fields] for item in compiled_items]
+        print(f"{label:<18}{legacy_time * 1000:>9.2f}ms{compiled_time * 1000:>9.2f}ms"
+              f"{legacy_time / compiled_time:>8.1f}x  {len(compiled_items)}"
+              f"{'' if same else '  (results differ)'}")
+
+
+if __name__ == '__main__':
+    main()
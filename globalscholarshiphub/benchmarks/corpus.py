@@ -0,0 +1,119 @@
+"""
+Sample scholarship descriptions used by the benchmarks
+
+Excerpts follow the shape of listing pages on the scraped sources: a
+title followed by the first few hundred characters of the entry content.
+"""
+import io
+import json
+import os
+import random
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+DESCRIPTIONS = [
+    "Fulbright Foreign Student Program 2025-2026 in USA. The Fulbright Foreign Student "
+    "Program enables graduate students, young professionals and artists from abroad to "
+    "study and conduct research in the United States. Deadline: 15 October 2025. "
+    "The scholarship covers full tuition, airfare and a living stipend.",
+    "Chevening Scholarships in UK for International Students. Chevening Scholarships are "
+    "the UK government's global scholarship programme, funded by the Foreign, Commonwealth "
+    "& Development Office. Fully funded master's degree. Application Deadline: November 5, 2025",
+    "Erasmus Mundus Joint Masters Scholarships. Erasmus Mundus Joint Masters are delivered "
+    "by multiple higher education institutions. Monthly allowance of €1,400 for the full "
+    "duration. Closing Date: 2025-12-15",
+    "DAAD Scholarships for Development-Related Postgraduate Courses in Germany. DAAD "
+    "scholarships offer graduates the opportunity to continue their education in Germany. "
+    "Monthly payments of €934 for graduates, €1,300 for doctoral candidates. "
+    "Deadline varies by course, typically 31/08/2025.",
+    "Gates Cambridge Scholarship for PhD and MPhil students. Full-cost scholarships to "
+    "outstanding applicants from countries outside the UK. The award covers the University "
+    "Composition Fee and a maintenance allowance of £20,000. Deadline: 3 December 2025",
+    "Australia Awards Scholarships for Developing Countries. Long-term development awards "
+    "administered by the Department of Foreign Affairs and Trade. Full funding including "
+    "return air travel and establishment allowance. Applications close 30 April 2026.",
+    "University of Toronto Lester B. Pearson International Scholarship. Covers tuition, "
+    "books, incidental fees and full residence support for four years. Undergraduate "
+    "students only. School nomination deadline 01/15/2026",
+    "Swedish Institute Scholarships for Global Professionals. Covers tuition fees, living "
+    "expenses of SEK 12,000 per month, travel grant and insurance. Masters programmes in "
+    "Sweden. Application period: February 10 2026 to February 27 2026",
+    "Orange Knowledge Programme in the Netherlands. Partial funding for short courses and "
+    "master's degree programmes for mid-career professionals. No deadline specified.",
+    "Rhodes Scholarship at University of Oxford. Postgraduate award supporting exceptional "
+    "students. The scholarship pays all University and college fees and provides a "
+    "stipend of £18,180 per annum. Deadline: July 2025 (varies by constituency)",
+    "Knight-Hennessy Scholars Program at Stanford University. Up to three years of "
+    "financial support for graduate study in any discipline, including law, medicine and "
+    "business. Apply by October 8, 2025.",
+    "MEXT Japanese Government Scholarship for research students. Monthly stipend of "
+    "143,000 JPY, exemption from tuition and round-trip airfare. Embassy recommendation "
+    "deadline 2025-05-20",
+    "Vanier Canada Graduate Scholarships. Valued at $50,000 per year for three years "
+    "during doctoral studies in health research, natural sciences, engineering, social "
+    "sciences and humanities. Deadline: 1 November 2025",
+    "Commonwealth Shared Scholarships for developing countries. Fully funded Masters "
+    "degree in the United Kingdom, covering tuition fees, airfare and living allowance.",
+    "Global Korea Scholarship for undergraduate and graduate degrees. 100% tuition waiver, "
+    "monthly allowance of 1,000,000 KRW and Korean language training. "
+    "Closing Date: 28 February 2026",
+    "Mastercard Foundation Scholars Program at partner universities. Comprehensive support "
+    "for academically talented yet economically disadvantaged young people from Africa. "
+    "Applications due March 31, 2026. Covers full tuition and accommodation.",
+    "Eiffel Excellence Scholarship Programme in France. Monthly allowance of €1,181 for "
+    "Master's students and €1,400 for PhD students, plus travel and health insurance. "
+    "Deadline 10 January 2026",
+    "Schwarzman Scholars at Tsinghua University. One-year master's degree in global "
+    "affairs. Fully funded including travel, room and board, and a stipend. "
+    "Deadline: September 16, 2025",
+    "OFID Scholarship Award for master's studies. Up to $50,000 covering tuition, "
+    "monthly allowance for living expenses, housing and insurance. 50% tuition for "
+    "shortlisted candidates. Deadline 31 March 2026",
+    "Joint Japan World Bank Graduate Scholarship Program. Tuition, monthly living "
+    "stipend, round-trip airfare and health insurance for development-related graduate "
+    "programmes. Second call closes 2025-09-30",
+]
+
+
+def load_descriptions():
+    """Return the sample corpus plus descriptions from the published dataset"""
+    descriptions = list(DESCRIPTIONS)
+    path = os.path.join(REPO_ROOT, 'scholarships.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for scholarship in json.load(f):
+                descriptions.append(f"{scholarship['name']} {scholarship['description']} "
+                                    f"{scholarship['amount']}")
+    return descriptions
+
+
+COUNTRIES = ['USA', 'UK', 'Canada', 'Australia', 'Germany', 'France', 'International']
+DEGREES = ['Bachelor', 'Master', 'PhD', 'Any']
+SUBJECTS = ['Engineering', 'Medicine', 'Business', 'Arts', 'Any']
+PROVIDERS = ['Ministry of Education', 'University Trust', 'Research Council',
+             'Foundation for Learning', 'Development Agency']
+
+# Columns of listing_rows(), in order
+LISTING_COLUMNS = ('name', 'description', 'provider', 'deadline', 'country',
+                   'degree_level', 'subject', 'is_featured')
+
+
+def listing_rows(count, seed=1):
+    """A COPY buffer of `count` generated active scholarships, LISTING_COLUMNS"""
+    generator = random.Random(seed)
+    descriptions = load_descriptions()
+    buffer = io.StringIO()
+    for i in range(count):
+        description = descriptions[i % len(descriptions)]
+        description = description.replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ')
+        name = f"{description.split('.')[0][:120]} {i}"
+        # One in ten is open-ended
+        deadline = (f'2026-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}'
+                    if i % 10 else '\\N')
+        buffer.write('\t'.join([
+            name, description, generator.choice(PROVIDERS), deadline,
+            generator.choice(COUNTRIES), generator.choice(DEGREES), generator.choice(SUBJECTS),
+            't' if i % 500 == 0 else 'f',
+        ]) + '\n')
+    buffer.seek(0)
+    return buffer
@@ -7,6 +7,9 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Trigram matching for fuzzy scholarship name search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ============================================
 -- MAIN TABLES
 -- ============================================
@@ -29,17 +32,43 @@ CREATE TABLE IF NOT EXISTS scholarships (
     is_featured BOOLEAN DEFAULT false,
     source_url TEXT,
     source_name VARCHAR(100),
+    content_hash VARCHAR(64),
+    amount_min NUMERIC,
+    amount_max NUMERIC,
+    amount_period VARCHAR(20),
+    amount_min_base NUMERIC,
+    amount_max_base NUMERIC,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(name, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(provider, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(eligibility, '')), 'D')
+    ) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    
-    -- Prevent duplicates based on name, provider, and deadline
-    CONSTRAINT unique_scholarship UNIQUE (name, provider, deadline)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    -- Duplicates are prevented by unique_scholarship_key below
 );
 
 -- Comments for scholarships table
 COMMENT ON TABLE scholarships IS 'Stores all scholarship opportunities';
 COMMENT ON COLUMN scholarships.degree_level IS 'Bachelor, Master, PhD, High School, Any';
 COMMENT ON COLUMN scholarships.status IS 'active, expired, archived';
+COMMENT ON COLUMN scholarships.content_hash IS 'Fingerprint of the upserted content; unchanged rows are not rewritten';
+COMMENT ON COLUMN scholarships.amount_min IS 'Lower bound parsed from amount, in currency; NULL when not stated';
+COMMENT ON COLUMN scholarships.amount_max IS 'Upper bound parsed from amount, in currency; NULL when not stated';
+COMMENT ON COLUMN scholarships.amount_period IS 'month, year, semester, week, once; NULL when not stated';
+COMMENT ON COLUMN scholarships.amount_min_base IS 'amount_min in the base currency of currency_rates (per amount_period)';
+COMMENT ON COLUMN scholarships.amount_max_base IS 'amount_max in the base currency of currency_rates (per amount_period)';
+COMMENT ON COLUMN scholarships.search_vector IS 'Full-text search document, weighted name > provider > description > eligibility';
+
+-- Exchange rates used to convert parsed amounts to one base currency (USD)
+CREATE TABLE IF NOT EXISTS currency_rates (
+    currency VARCHAR(10) PRIMARY KEY,
+    rate_to_base NUMERIC(18, 8) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE currency_rates IS 'Units of the base currency (USD) per unit of currency; run rebase_scholarship_amounts() after changing';
 
 -- Languages table for i18n
 CREATE TABLE IF NOT EXISTS languages (
@@ -64,14 +93,18 @@ CREATE TABLE IF NOT EXISTS translations (
     UNIQUE(language_code, key)
 );
 
--- Scraper logs table
+-- Scraper logs table: one row per run of a scraper, or per source for the
+-- Scrapy spiders, which the crawl budget ranks by new items per request
 CREATE TABLE IF NOT EXISTS scraper_logs (
     id SERIAL PRIMARY KEY,
     source_name VARCHAR(100),
     items_scraped INTEGER DEFAULT 0,
     items_inserted INTEGER DEFAULT 0,
     items_duplicates INTEGER DEFAULT 0,
+    items_updated INTEGER DEFAULT 0,
+    items_unchanged INTEGER DEFAULT 0,
     items_errors INTEGER DEFAULT 0,
+    requests_made INTEGER DEFAULT 0,
     started_at TIMESTAMP,
     completed_at TIMESTAMP,
     duration_seconds INTEGER,
@@ -80,6 +113,21 @@ CREATE TABLE IF NOT EXISTS scraper_logs (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Near-duplicate clusters: every scholarship maps to the canonical row of
+-- the programme it lists, so one programme scraped from several sites can
+-- be shown once (see scraper/dedup.py)
+CREATE TABLE IF NOT EXISTS scholarship_clusters (
+    scholarship_id INTEGER PRIMARY KEY REFERENCES scholarships(id) ON DELETE CASCADE,
+    canonical_id INTEGER NOT NULL REFERENCES scholarships(id) ON DELETE CASCADE,
+    similarity REAL NOT NULL,
+    signature BYTEA NOT NULL,
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON COLUMN scholarship_clusters.canonical_id IS 'Equal to scholarship_id for the canonical row of a cluster';
+COMMENT ON COLUMN scholarship_clusters.similarity IS 'Estimated Jaccard similarity to the closest row when assigned';
+COMMENT ON COLUMN scholarship_clusters.signature IS 'MinHash signature, reused to rebuild the LSH index';
+
 -- Contact messages table
 CREATE TABLE IF NOT EXISTS contact_messages (
     id SERIAL PRIMARY KEY,
@@ -105,10 +153,59 @@ CREATE TABLE IF NOT EXISTS subscriptions (
     unsubscribed_at TIMESTAMP
 );
 
+-- Columns added after the initial release (no-ops on fresh installs)
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS items_updated INTEGER DEFAULT 0;
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS items_unchanged INTEGER DEFAULT 0;
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS requests_made INTEGER DEFAULT 0;
+-- Existing rows get their amounts parsed with `python -m scraper.db backfill-amounts`
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS amount_min NUMERIC;
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS amount_max NUMERIC;
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS amount_period VARCHAR(20);
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS amount_min_base NUMERIC;
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS amount_max_base NUMERIC;
+ALTER TABLE scholarships ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(name, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(provider, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(eligibility, '')), 'D')
+    ) STORED;
+
 -- ============================================
 -- INDEXES FOR PERFORMANCE
 -- ============================================
 
+-- Prevent duplicates based on name, provider, and deadline. A missing
+-- deadline counts as one value: with the plain UNIQUE (name, provider,
+-- deadline) constraint NULLs never conflicted, so deadline-less listings
+-- were inserted again on every run. Upserts name this index as their
+-- conflict target (see scraper/bulkload.py).
+-- Upgrading: keep the first row of each key, pointing clusters at it
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'unique_scholarship_key'
+                   AND schemaname = current_schema()) THEN
+        CREATE TEMP TABLE duplicate_scholarships ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (
+                PARTITION BY name, provider, COALESCE(deadline, 'infinity'::date)
+            ) AS keep_id
+            FROM scholarships
+        ) keys
+        WHERE id <> keep_id;
+
+        UPDATE scholarship_clusters c SET canonical_id = d.keep_id
+        FROM duplicate_scholarships d
+        WHERE c.canonical_id = d.id AND c.scholarship_id <> d.id;
+
+        DELETE FROM scholarships s USING duplicate_scholarships d WHERE s.id = d.id;
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS unique_scholarship_key
+ON scholarships(name, provider, (COALESCE(deadline, 'infinity'::date)));
+ALTER TABLE scholarships DROP CONSTRAINT IF EXISTS unique_scholarship;
+
 -- Scholarship indexes
 CREATE INDEX IF NOT EXISTS idx_scholarships_country ON scholarships(country);
 CREATE INDEX IF NOT EXISTS idx_scholarships_degree ON scholarships(degree_level);
@@ -118,10 +215,34 @@ CREATE INDEX IF NOT EXISTS idx_scholarships_status ON scholarships(status);
 CREATE INDEX IF NOT EXISTS idx_scholarships_featured ON scholarships(is_featured) WHERE is_featured = true;
 CREATE INDEX IF NOT EXISTS idx_scholarships_created ON scholarships(created_at);
 CREATE INDEX IF NOT EXISTS idx_scholarships_source ON scholarships(source_name);
+CREATE INDEX IF NOT EXISTS idx_scholarships_content_hash ON scholarships(content_hash);
+
+-- Sorting and range filters on value ("over $10k"), in the base currency
+CREATE INDEX IF NOT EXISTS idx_scholarships_amount_min_base ON scholarships(amount_min_base)
+WHERE amount_min_base IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_scholarships_amount_max_base ON scholarships(amount_max_base)
+WHERE amount_max_base IS NOT NULL;
+
+-- Listing order of active scholarships: featured first, then by deadline
+-- with open-ended ones last, then id. Serves get_active_scholarships_page()
+-- as one range scan from the cursor, however deep the page
+CREATE INDEX IF NOT EXISTS idx_scholarships_active_order ON scholarships(
+    (NOT COALESCE(is_featured, false)), (COALESCE(deadline, 'infinity'::date)), id
+) WHERE status = 'active';
+
+-- Full-text search: the stored search_vector replaces the expression
+-- index, which no query matched
+DROP INDEX IF EXISTS idx_scholarships_search;
+CREATE INDEX IF NOT EXISTS idx_scholarships_search_vector ON scholarships USING gin(search_vector);
 
--- Full-text search index
-CREATE INDEX IF NOT EXISTS idx_scholarships_search ON scholarships 
-USING gin(to_tsvector('english', name || ' ' || COALESCE(description, '') || ' ' || COALESCE(provider, '')));
+-- Fuzzy name matching (word_similarity, the <% operator)
+CREATE INDEX IF NOT EXISTS idx_scholarships_name_trgm ON scholarships USING gin(name gin_trgm_ops);
+
+-- Members of a cluster
+CREATE INDEX IF NOT EXISTS idx_scholarship_clusters_canonical ON scholarship_clusters(canonical_id);
+
+-- Crawl budget history lookups (see scraper/budget.py)
+CREATE INDEX IF NOT EXISTS idx_scraper_logs_source_started ON scraper_logs(source_name, started_at);
 
 -- Translation indexes
 CREATE INDEX IF NOT EXISTS idx_translations_lang ON translations(language_code);
@@ -141,6 +262,28 @@ INSERT INTO languages (code, name, native_name, is_active, is_rtl) VALUES
     ('zh', 'Chinese', '中文', true, false)
 ON CONFLICT (code) DO NOTHING;
 
+-- Approximate exchange rates to USD; keep these current so amount_*_base
+-- stays comparable across currencies
+INSERT INTO currency_rates (currency, rate_to_base) VALUES
+    ('USD', 1),
+    ('EUR', 1.08),
+    ('GBP', 1.27),
+    ('CAD', 0.73),
+    ('AUD', 0.66),
+    ('NZD', 0.60),
+    ('CHF', 1.13),
+    ('JPY', 0.0066),
+    ('CNY', 0.14),
+    ('INR', 0.012),
+    ('NGN', 0.00065),
+    ('ZAR', 0.054),
+    ('KES', 0.0077),
+    ('GHS', 0.066),
+    ('SEK', 0.095),
+    ('NOK', 0.093),
+    ('DKK', 0.145)
+ON CONFLICT (currency) DO NOTHING;
+
 -- Insert sample scholarships (for testing)
 INSERT INTO scholarships (name, provider, description, amount, deadline, country, degree_level, subject, is_featured, source_name) VALUES
     ('Fulbright Foreign Student Program', 'U.S. Department of State', 
@@ -166,7 +309,7 @@ INSERT INTO scholarships (name, provider, description, amount, deadline, country
     ('Gates Cambridge Scholarship', 'Bill & Melinda Gates Foundation',
      'Gates Cambridge Scholarships are awarded to outstanding applicants from countries outside the UK to pursue a full-time postgraduate degree.',
      'Full Funding', '2024-12-05', 'UK', 'PhD', 'Any', true, 'sample')
-ON CONFLICT (name, provider, deadline) DO NOTHING;
+ON CONFLICT (name, provider, (COALESCE(deadline, 'infinity'::date))) DO NOTHING;
 
 -- ============================================
 -- FUNCTIONS & TRIGGERS
@@ -195,7 +338,32 @@ CREATE TRIGGER update_translations_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
--- Function to get active scholarships
+-- Tell listeners (the read API's cache, see api/app.py) that a scraper run
+-- finished. Scrapers log their run after storing and refreshing, so the
+-- data is final by then
+CREATE OR REPLACE FUNCTION notify_scraper_run()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('scraper_runs', COALESCE(NEW.source_name, ''));
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS notify_scraper_logs_insert ON scraper_logs;
+CREATE TRIGGER notify_scraper_logs_insert
+    AFTER INSERT ON scraper_logs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_scraper_run();
+
+-- Function to get active scholarships. p_search is a web-style query
+-- ("quoted phrase", -excluded, or) matched against search_vector; names
+-- that are a close trigram match also count, so a misspelt name still
+-- finds its scholarship. Search results are ranked by relevance first.
+-- The search and browse cases are separate queries so each gets a plan
+-- that uses its indexes. Country, degree and subject must match exactly,
+-- which their btree indexes serve; for deep browsing use
+-- get_active_scholarships_page() below instead of p_offset.
+DROP FUNCTION IF EXISTS get_active_scholarships(VARCHAR, VARCHAR, VARCHAR, VARCHAR, INTEGER, INTEGER);
 CREATE OR REPLACE FUNCTION get_active_scholarships(
     p_country VARCHAR DEFAULT NULL,
     p_degree VARCHAR DEFAULT NULL,
@@ -212,25 +380,113 @@ RETURNS TABLE (
     deadline DATE,
     country VARCHAR,
     degree_level VARCHAR,
-    subject VARCHAR
+    subject VARCHAR,
+    rank REAL
 ) AS $$
+DECLARE
+    v_query TSQUERY;
 BEGIN
+    IF NULLIF(btrim(p_search), '') IS NULL THEN
+        RETURN QUERY
+        SELECT s.id, s.name, s.provider, s.amount, s.deadline, s.country, s.degree_level, s.subject,
+               NULL::REAL
+        FROM scholarships s
+        WHERE s.status = 'active'
+            AND (p_country IS NULL OR s.country = p_country)
+            AND (p_degree IS NULL OR s.degree_level = p_degree)
+            AND (p_subject IS NULL OR s.subject = p_subject)
+        -- Featured first, then by deadline (see idx_scholarships_active_order)
+        ORDER BY NOT COALESCE(s.is_featured, false), COALESCE(s.deadline, 'infinity'::date), s.id
+        LIMIT p_limit OFFSET p_offset;
+        RETURN;
+    END IF;
+
+    v_query := websearch_to_tsquery('english', p_search);
     RETURN QUERY
-    SELECT s.id, s.name, s.provider, s.amount, s.deadline, s.country, s.degree_level, s.subject
+    SELECT s.id, s.name, s.provider, s.amount, s.deadline, s.country, s.degree_level, s.subject,
+           (ts_rank_cd(s.search_vector, v_query) + word_similarity(p_search, s.name))::REAL
     FROM scholarships s
     WHERE s.status = 'active'
-        AND (p_country IS NULL OR s.country ILIKE '%' || p_country || '%')
-        AND (p_degree IS NULL OR s.degree_level ILIKE '%' || p_degree || '%')
-        AND (p_subject IS NULL OR s.subject ILIKE '%' || p_subject || '%')
-        AND (p_search IS NULL OR 
-             s.name ILIKE '%' || p_search || '%' OR 
-             s.description ILIKE '%' || p_search || '%' OR
-             s.provider ILIKE '%' || p_search || '%')
-    ORDER BY s.is_featured DESC, s.deadline ASC NULLS LAST
+        AND (s.search_vector @@ v_query OR p_search <% s.name)
+        AND (p_country IS NULL OR s.country = p_country)
+        AND (p_degree IS NULL OR s.degree_level = p_degree)
+        AND (p_subject IS NULL OR s.subject = p_subject)
+    -- By position: "rank" would name the output column's variable here
+    ORDER BY 9 DESC, s.is_featured DESC, s.deadline ASC NULLS LAST
     LIMIT p_limit OFFSET p_offset;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Statement behind get_active_scholarships_page(), with only the clauses
+-- whose parameters are set. Parameters: $1 country, $2 degree, $3 subject,
+-- $4-$6 is_featured, deadline and id of the last row of the previous page,
+-- $7 limit. A single statement with "p_after_id IS NULL OR ..." would let
+-- a cached generic plan filter the row comparison instead of starting the
+-- index scan from it
+CREATE OR REPLACE FUNCTION active_scholarships_page_sql(
+    p_country VARCHAR DEFAULT NULL,
+    p_degree VARCHAR DEFAULT NULL,
+    p_subject VARCHAR DEFAULT NULL,
+    p_after_id INTEGER DEFAULT NULL
+)
+RETURNS TEXT AS $$
+DECLARE
+    v_sql TEXT;
+BEGIN
+    v_sql := 'SELECT s.id, s.name, s.provider, s.amount, s.deadline, s.country, s.degree_level, '
+          || 's.subject, COALESCE(s.is_featured, false) '
+          || 'FROM scholarships s WHERE s.status = ''active''';
+    IF p_after_id IS NOT NULL THEN
+        v_sql := v_sql || ' AND (NOT COALESCE(s.is_featured, false), '
+                       || 'COALESCE(s.deadline, ''infinity''::date), s.id) > '
+                       || '(NOT COALESCE($4, false), COALESCE($5, ''infinity''::date), $6)';
+    END IF;
+    IF p_country IS NOT NULL THEN
+        v_sql := v_sql || ' AND s.country = $1';
+    END IF;
+    IF p_degree IS NOT NULL THEN
+        v_sql := v_sql || ' AND s.degree_level = $2';
+    END IF;
+    IF p_subject IS NOT NULL THEN
+        v_sql := v_sql || ' AND s.subject = $3';
+    END IF;
+    RETURN v_sql || ' ORDER BY NOT COALESCE(s.is_featured, false), '
+                 || 'COALESCE(s.deadline, ''infinity''::date), s.id LIMIT $7';
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Keyset-paginated listing of active scholarships, in the order of
+-- idx_scholarships_active_order. Pass the is_featured, deadline and id of
+-- the last row of the previous page, or NULLs for the first page; the
+-- API hands these out as an opaque cursor (see api/queries.py). EXECUTE
+-- plans each page with its own values, so a deep page is one index range
+-- scan from the cursor
+CREATE OR REPLACE FUNCTION get_active_scholarships_page(
+    p_country VARCHAR DEFAULT NULL,
+    p_degree VARCHAR DEFAULT NULL,
+    p_subject VARCHAR DEFAULT NULL,
+    p_after_featured BOOLEAN DEFAULT NULL,
+    p_after_deadline DATE DEFAULT NULL,
+    p_after_id INTEGER DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    id INTEGER,
+    name VARCHAR,
+    provider VARCHAR,
+    amount VARCHAR,
+    deadline DATE,
+    country VARCHAR,
+    degree_level VARCHAR,
+    subject VARCHAR,
+    is_featured BOOLEAN
+) AS $$
+BEGIN
+    RETURN QUERY EXECUTE active_scholarships_page_sql(p_country, p_degree, p_subject, p_after_id)
+    USING p_country, p_degree, p_subject, p_after_featured, p_after_deadline, p_after_id, p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================
 -- VIEWS
 -- ============================================
@@ -249,16 +505,43 @@ WHERE status = 'active'
     AND deadline <= CURRENT_DATE + INTERVAL '30 days'
 ORDER BY deadline ASC;
 
--- Statistics view
-CREATE OR REPLACE VIEW scholarship_stats AS
+-- Statistics and filter facets. Both are materialized, so reading them
+-- costs the same however large scholarships grows; the scrapers call
+-- refresh_scholarship_stats() at the end of a run that changed anything.
+-- scholarship_stats used to be a plain view
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_views WHERE viewname = 'scholarship_stats'
+               AND schemaname = current_schema()) THEN
+        DROP VIEW scholarship_stats;
+    END IF;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS scholarship_stats AS
 SELECT 
     COUNT(*) as total_scholarships,
     COUNT(*) FILTER (WHERE status = 'active') as active_scholarships,
     COUNT(*) FILTER (WHERE is_featured = true) as featured_count,
     COUNT(DISTINCT country) as countries_count,
-    COUNT(DISTINCT degree_level) as degree_levels_count
+    COUNT(DISTINCT degree_level) as degree_levels_count,
+    CURRENT_TIMESTAMP as refreshed_at
 FROM scholarships;
 
+-- Active scholarships per country, degree level and subject
+CREATE MATERIALIZED VIEW IF NOT EXISTS scholarship_facets AS
+SELECT 'country'::VARCHAR AS facet, country AS value, COUNT(*) AS active_count
+FROM scholarships WHERE status = 'active' AND country IS NOT NULL GROUP BY country
+UNION ALL
+SELECT 'degree_level', degree_level, COUNT(*)
+FROM scholarships WHERE status = 'active' AND degree_level IS NOT NULL GROUP BY degree_level
+UNION ALL
+SELECT 'subject', subject, COUNT(*)
+FROM scholarships WHERE status = 'active' AND subject IS NOT NULL GROUP BY subject;
+
+-- REFRESH ... CONCURRENTLY needs a unique index; scholarship_stats has one row
+CREATE UNIQUE INDEX IF NOT EXISTS idx_scholarship_stats_refreshed ON scholarship_stats(refreshed_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_scholarship_facets_value ON scholarship_facets(facet, value);
+
 -- ============================================
 -- MAINTENANCE
 -- ============================================
@@ -281,3 +564,32 @@ $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION archive_expired_scholarships() IS 
 'Archives scholarships that have been expired for more than 30 days';
+
+-- Recompute base-currency amounts (run after updating currency_rates)
+CREATE OR REPLACE FUNCTION rebase_scholarship_amounts()
+RETURNS INTEGER AS $$
+DECLARE
+    rebased_count INTEGER;
+BEGIN
+    UPDATE scholarships s
+    SET amount_min_base = s.amount_min * r.rate_to_base,
+        amount_max_base = s.amount_max * r.rate_to_base
+    FROM currency_rates r
+    WHERE r.currency = s.currency
+        AND (s.amount_min_base IS DISTINCT FROM s.amount_min * r.rate_to_base
+             OR s.amount_max_base IS DISTINCT FROM s.amount_max * r.rate_to_base);
+    
+    GET DIAGNOSTICS rebased_count = ROW_COUNT;
+    RETURN rebased_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute scholarship_stats and scholarship_facets. CONCURRENTLY keeps
+-- both readable while they refresh
+CREATE OR REPLACE FUNCTION refresh_scholarship_stats()
+RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY scholarship_stats;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY scholarship_facets;
+END;
+$$ LANGUAGE plpgsql;
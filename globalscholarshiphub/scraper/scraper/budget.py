@@ -0,0 +1,235 @@
+"""
+Yield-driven crawl budget for the Scrapy spiders
+
+Every run logs, per source, how many requests it made and how many new
+scholarships it stored (scraper_logs). Before a crawl starts, that
+history ranks the spider's sources by new items per request: productive
+sources get more concurrent requests, a shorter delay and deeper
+pagination, while sources that only return what we already have are
+crawled at the politeness minimums. Sources with little or no history
+are scored at the average rate, so new sources still get explored.
+
+The budget is applied through Scrapy's per-slot DOWNLOAD_SLOTS settings,
+which never go past the spider's own per-domain concurrency and delay,
+and request priorities; CLOSESPIDER_TIMEOUT caps the run time, and the
+priorities make sure the best sources are fetched first within it.
+"""
+import logging
+from collections import Counter
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.http import Request
+
+logger = logging.getLogger(__name__)
+
+
+class SourceHistory(NamedTuple):
+    runs: int
+    requests: int
+    new_items: int
+
+
+class SourceBudget(NamedTuple):
+    """What one source may use during a crawl"""
+    concurrency: int
+    delay: float
+    max_pages: int
+    # Scrapy request priority; higher is fetched first
+    priority: int
+    # Smoothed new items per request the budget was derived from
+    score: float
+
+
+def host_of(url):
+    """Host of a URL without a leading 'www.'"""
+    host = urlparse(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+class CrawlBudget:
+    """
+    Turns per-source history into SourceBudgets.
+
+    A source's score is its new items per request, smoothed toward the
+    mean rate of all sources by `prior_requests` imaginary requests, so
+    one lucky or unlucky run does not decide its budget. Scores are
+    scaled against the best source: the best gets `max_concurrency`,
+    `min_delay` and `max_pages`; a source that never yields anything new
+    gets one request at a time, `max_delay` and `min_pages`.
+    """
+
+    def __init__(self, max_concurrency=2, min_delay=2.0, max_delay=3.0,
+                 min_pages=2, max_pages=20, prior_requests=10):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.min_pages = max(1, min_pages)
+        self.max_pages = max(max_pages, self.min_pages)
+        self.prior_requests = prior_requests
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        A CrawlBudget from CRAWL_BUDGET_* settings, kept within the
+        effective CONCURRENT_REQUESTS_PER_DOMAIN and DOWNLOAD_DELAY. A
+        source's download slot replaces those two settings, so the budget
+        may only tighten them: under a spider's stricter limits every
+        source gets the same slot, and only priority and page depth vary.
+        """
+        per_domain = settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 8)
+        download_delay = settings.getfloat('DOWNLOAD_DELAY', 0)
+        return cls(
+            max_concurrency=min(settings.getint('CRAWL_BUDGET_MAX_CONCURRENCY', 2), per_domain),
+            min_delay=max(settings.getfloat('CRAWL_BUDGET_MIN_DELAY', 2.0), download_delay),
+            max_delay=max(settings.getfloat('CRAWL_BUDGET_MAX_DELAY', 3.0), download_delay),
+            min_pages=settings.getint('CRAWL_BUDGET_MIN_PAGES', 2),
+            max_pages=settings.getint('CRAWL_BUDGET_MAX_PAGES', 20),
+        )
+
+    def scores(self, sources, history):
+        """Smoothed new items per request for each source"""
+        requests = sum(h.requests for h in history.values())
+        new_items = sum(h.new_items for h in history.values())
+        # With no history at all every source starts equal
+        mean = new_items / requests if requests else 1.0
+        scores = {}
+        for source in sources:
+            h = history.get(source, SourceHistory(0, 0, 0))
+            scores[source] = (h.new_items + self.prior_requests * mean) / (h.requests + self.prior_requests)
+        return scores
+
+    def plan(self, sources, history):
+        """A SourceBudget for every source in `sources`"""
+        scores = self.scores(sources, history)
+        best = max(scores.values(), default=0)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        budgets = {}
+        for rank, source in enumerate(ranked):
+            share = scores[source] / best if best > 0 else 0.0
+            budgets[source] = SourceBudget(
+                concurrency=1 + round(share * (self.max_concurrency - 1)),
+                delay=round(self.max_delay - share * (self.max_delay - self.min_delay), 2),
+                max_pages=self.min_pages + round(share * (self.max_pages - self.min_pages)),
+                priority=len(ranked) - rank,
+                score=scores[source],
+            )
+        return budgets
+
+
+def load_history(sources, days):
+    """{source: SourceHistory} from scraper_logs for the last `days` days"""
+    from .db import acquire_database, release_database
+
+    db = acquire_database()
+    try:
+        rows = db.source_history(sources, days)
+    finally:
+        release_database()
+    return {source: SourceHistory(runs, requests or 0, new_items or 0)
+            for source, runs, requests, new_items in rows}
+
+
+def apply_budget(settings, hosts):
+    """
+    Plan a crawl of `hosts` ({host: source name}) and write the result
+    into `settings`: per-slot concurrency and delay in DOWNLOAD_SLOTS,
+    and the full plan in CRAWL_BUDGET for the spider to read.
+
+    AutoThrottle is turned off for the crawl, since it would pull every
+    slot toward the same latency-based delay. If the history cannot be
+    read the settings are left alone.
+    """
+    if not settings.getbool('CRAWL_BUDGET_ENABLED', True) or not hosts:
+        return None
+    sources = sorted(set(hosts.values()))
+    try:
+        history = load_history(sources, settings.getint('CRAWL_BUDGET_HISTORY_DAYS', 30))
+    except Exception as e:
+        logger.warning(f"Crawl budget disabled, could not read scraper_logs: {e}")
+        return None
+
+    plan = CrawlBudget.from_settings(settings).plan(sources, history)
+    slots = dict(settings.getdict('DOWNLOAD_SLOTS'))
+    for host, source in hosts.items():
+        budget = plan[source]
+        for slot in (host, f'www.{host}'):
+            slots[slot] = {'concurrency': budget.concurrency, 'delay': budget.delay}
+    settings.set('DOWNLOAD_SLOTS', slots, priority='spider')
+    settings.set('AUTOTHROTTLE_ENABLED', False, priority='spider')
+    settings.set('CRAWL_BUDGET', {source: budget._asdict() for source, budget in plan.items()},
+                 priority='spider')
+    for source, budget in plan.items():
+        h = history.get(source)
+        logger.info(
+            f"Crawl budget for {source}: {budget.concurrency} concurrent, "
+            f"{budget.delay:.2f}s delay, {budget.max_pages} pages "
+            f"({budget.score:.3f} new/request over {h.runs if h else 0} runs)"
+        )
+    return plan
+
+
+class BudgetedSpider:
+    """
+    Mixin for spiders crawled under a CrawlBudget.
+
+    Sources are the hosts of `start_urls`, or the names given for them
+    in `source_names` ({host: source name}) when a spider stores items
+    under another source_name. The spider counts the responses it gets
+    per source (`requests_by_source`), which the pipeline logs for the
+    next run's budget.
+    """
+    source_names = {}
+
+    @classmethod
+    def source_for_host(cls, host):
+        return cls.source_names.get(host, host)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # Planned here rather than in update_settings, so only an actual
+        # crawl reads scraper_logs (not `scrapy list` and the like); the
+        # settings are frozen only once the spider has been created
+        apply_budget(crawler.settings, {host_of(url): cls.source_for_host(host_of(url))
+                                        for url in cls.start_urls})
+        spider.crawl_budget = {
+            source: SourceBudget(**budget)
+            for source, budget in crawler.settings.getdict('CRAWL_BUDGET').items()
+        }
+        spider.requests_by_source = Counter()
+        crawler.signals.connect(spider._count_response, signal=signals.response_received)
+        return spider
+
+    def source_for(self, url):
+        return self.source_for_host(host_of(url))
+
+    def _count_response(self, response, request):
+        """Count a page fetched from a source, the yield's denominator"""
+        # robots.txt is crawl overhead and HTTP cache hits cost the source
+        # nothing, so neither should lower its new items per request
+        if 'cached' in response.flags or urlparse(response.url).path == '/robots.txt':
+            return
+        self.requests_by_source[self.source_for(response.url)] += 1
+
+    def budgeted(self, request):
+        """`request` with its source's priority and the page counter started"""
+        budget = getattr(self, 'crawl_budget', {}).get(self.source_for(request.url))
+        meta = dict(request.meta, page=request.meta.get('page', 1))
+        return request.replace(priority=budget.priority if budget else request.priority, meta=meta)
+
+    def next_page_allowed(self, response):
+        """Whether the page after `response` is within its source's page budget"""
+        budget = getattr(self, 'crawl_budget', {}).get(self.source_for(response.url))
+        return budget is None or response.meta.get('page', 1) < budget.max_pages
+
+    async def start(self):
+        # Scrapy 2.13+ only calls start(); older versions call
+        # start_requests() directly, so that is where budgeting happens
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        for url in self.start_urls:
+            yield self.budgeted(Request(url, dont_filter=True))
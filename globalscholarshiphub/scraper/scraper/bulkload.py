@@ -0,0 +1,143 @@
+"""
+COPY-based bulk ingest for scholarships
+
+Rows are streamed with COPY FROM STDIN into a temporary staging table and
+merged into `scholarships` with one set-based INSERT ... SELECT ... ON
+CONFLICT. For backfills of tens of thousands of rows this avoids the
+per-statement overhead of execute_values and sends one round trip for
+the whole merge.
+"""
+import io
+from datetime import date, datetime
+
+
+# Column order of the value tuples built by both writers
+SCHOLARSHIP_COLUMNS = (
+    'name', 'description', 'provider', 'eligibility', 'amount', 'currency',
+    'deadline', 'application_link', 'country', 'degree_level', 'subject',
+    'source_url', 'source_name', 'content_hash', 'amount_min', 'amount_max',
+    'amount_period',
+)
+
+WRITE_MODES = ('values', 'copy')
+
+_COLUMNS = ', '.join(SCHOLARSHIP_COLUMNS)
+
+# ON COMMIT DELETE ROWS empties the table at the end of every batch, so it
+# can be reused for the lifetime of the connection
+CREATE_STAGING = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS scholarships_staging (
+        name VARCHAR(500),
+        description TEXT,
+        provider VARCHAR(255),
+        eligibility TEXT,
+        amount VARCHAR(255),
+        currency VARCHAR(10),
+        deadline DATE,
+        application_link TEXT,
+        country VARCHAR(100),
+        degree_level VARCHAR(100),
+        subject VARCHAR(200),
+        source_url TEXT,
+        source_name VARCHAR(100),
+        content_hash VARCHAR(64),
+        amount_min NUMERIC,
+        amount_max NUMERIC,
+        amount_period VARCHAR(20)
+    ) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING = f"COPY scholarships_staging ({_COLUMNS}) FROM STDIN"
+
+# Parsed amounts converted to the base currency of currency_rates; joined
+# with USING so the ON of a join cannot be mistaken for ON CONFLICT
+BASE_AMOUNT_COLUMNS = 'amount_min_base, amount_max_base'
+BASE_AMOUNTS = 'amount_min * rates.rate_to_base, amount_max * rates.rate_to_base'
+RATES_JOIN = 'LEFT JOIN currency_rates rates USING (currency)'
+
+# Inserted and updated counts from a `merged` CTE returning (inserted,
+# source_name, id), a JSON object of [inserted, updated] per source and
+# the ids of the inserted rows
+MERGED_COUNTS = """
+    SELECT COUNT(*) FILTER (WHERE inserted),
+           COUNT(*) FILTER (WHERE NOT inserted),
+           (SELECT json_object_agg(COALESCE(source_name, ''), json_build_array(new_rows, changed_rows))
+            FROM (SELECT source_name,
+                         COUNT(*) FILTER (WHERE inserted) AS new_rows,
+                         COUNT(*) FILTER (WHERE NOT inserted) AS changed_rows
+                  FROM merged GROUP BY source_name) AS by_source),
+           array_agg(id) FILTER (WHERE inserted)
+    FROM merged
+"""
+
+# Conflict target of the upsert: the unique_scholarship_key index, where a
+# missing deadline counts as one value rather than never matching
+CONFLICT_KEY = "(name, provider, (COALESCE(deadline, 'infinity'::date)))"
+
+# Rows must already be coalesced by key (see db.coalesce_rows); otherwise
+# ON CONFLICT fails with "cannot affect row a second time"
+MERGE_STAGING = f"""
+    WITH merged AS (
+        INSERT INTO scholarships ({_COLUMNS}, {BASE_AMOUNT_COLUMNS})
+        SELECT {_COLUMNS}, {BASE_AMOUNTS} FROM scholarships_staging {RATES_JOIN}
+        ON CONFLICT {CONFLICT_KEY}
+        DO UPDATE SET
+            description = EXCLUDED.description,
+            eligibility = EXCLUDED.eligibility,
+            amount = EXCLUDED.amount,
+            currency = EXCLUDED.currency,
+            amount_min = EXCLUDED.amount_min,
+            amount_max = EXCLUDED.amount_max,
+            amount_period = EXCLUDED.amount_period,
+            amount_min_base = EXCLUDED.amount_min_base,
+            amount_max_base = EXCLUDED.amount_max_base,
+            application_link = EXCLUDED.application_link,
+            content_hash = EXCLUDED.content_hash,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE scholarships.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        RETURNING (xmax = 0) AS inserted, source_name, id
+    )
+""" + MERGED_COUNTS
+
+
+def _copy_field(value):
+    """Encode one value in COPY's text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def copy_buffer(rows):
+    """Serialize value tuples (in SCHOLARSHIP_COLUMNS order) for COPY"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_field(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def bulk_upsert(cursor, rows):
+    """
+    Stage `rows` with COPY and merge them into scholarships.
+
+    Returns (inserted, updated, {source_name: [inserted, updated]} or
+    None, inserted ids or None); rows whose content hash already matched
+    are neither inserted nor updated. The caller commits.
+    """
+    cursor.execute(CREATE_STAGING)
+    buffer = copy_buffer(rows)
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(COPY_STAGING, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(COPY_STAGING) as copy:
+            copy.write(buffer.getvalue())
+    cursor.execute(MERGE_STAGING)
+    return cursor.fetchone()
@@ -0,0 +1,156 @@
+"""
+Keyword classifier for degree level, subject and host country
+
+The keyword table is compiled once into a token-phrase lookup. Text is
+tokenized on word boundaries and every category is assigned in a single
+pass, so short keywords such as 'ma', 'bs' or 'law' only match whole
+words rather than fragments of 'management' or 'lawn'.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+
+# Within a category, labels are listed in priority order: if the text
+# mentions both a PhD and a Master's, the degree level is PhD. Countries
+# are the exception and resolve to the first one mentioned. Adjectives
+# that double as language names ('German', 'French') are left out, since
+# "proficiency in German" says nothing about where the award is held.
+KEYWORD_TABLE = {
+    'degree_level': {
+        'PhD': ('phd', 'ph.d', 'doctorate', 'doctorates', 'doctoral'),
+        'Master': ('master', 'masters', 'mba', 'msc', 'm.sc', 'ma', 'mphil'),
+        'Bachelor': ('bachelor', 'bachelors', 'undergraduate', 'undergraduates',
+                     'undergrad', 'bs', 'bsc', 'b.sc', 'ba'),
+        'High School': ('high school', 'secondary'),
+    },
+    'subject': {
+        'Engineering': ('engineering', 'computer science', 'software', 'mechanical',
+                        'electrical'),
+        'Medicine': ('medicine', 'medical', 'biomedical', 'health', 'nursing', 'pharmacy'),
+        'Business': ('business', 'mba', 'management', 'finance', 'economics'),
+        'Science': ('science', 'sciences', 'physics', 'chemistry', 'biology', 'mathematics'),
+        'Arts': ('arts', 'humanities', 'literature', 'history', 'philosophy'),
+        'Law': ('law', 'laws', 'legal', 'llm', 'jurisprudence'),
+    },
+    'country': {
+        'USA': ('usa', 'u.s.a', 'u.s', 'united states'),
+        'UK': ('uk', 'u.k', 'united kingdom', 'britain', 'england', 'scotland', 'wales'),
+        'Canada': ('canada', 'canadian'),
+        'Australia': ('australia', 'australian'),
+        'Germany': ('germany',),
+        'France': ('france',),
+        'Netherlands': ('netherlands', 'holland'),
+        'Sweden': ('sweden',),
+        'Norway': ('norway',),
+        'Denmark': ('denmark',),
+        'Switzerland': ('switzerland', 'swiss'),
+        'Austria': ('austria', 'austrian'),
+        'Belgium': ('belgium',),
+        'Italy': ('italy',),
+        'Spain': ('spain',),
+        'Japan': ('japan', 'mext'),
+        'South Korea': ('south korea', 'korea'),
+        'China': ('china',),
+        'Singapore': ('singapore',),
+        'New Zealand': ('new zealand',),
+        'Ireland': ('ireland', 'irish'),
+        'Finland': ('finland',),
+        'Poland': ('poland',),
+        'Czech Republic': ('czech republic', 'czechia'),
+        'Hungary': ('hungary',),
+        'Portugal': ('portugal',),
+        'Greece': ('greece',),
+        'Turkey': ('turkey', 'turkiye'),
+        'UAE': ('uae', 'united arab emirates', 'dubai', 'abu dhabi'),
+        'Saudi Arabia': ('saudi arabia', 'saudi'),
+        'Qatar': ('qatar',),
+        'Malaysia': ('malaysia',),
+        'Thailand': ('thailand',),
+        'India': ('india',),
+        'South Africa': ('south africa',),
+        'Ghana': ('ghana',),
+        'Nigeria': ('nigeria',),
+        'Kenya': ('kenya',),
+        'Egypt': ('egypt',),
+        'Morocco': ('morocco',),
+        'Brazil': ('brazil',),
+        'Mexico': ('mexico',),
+        'Argentina': ('argentina',),
+        'Chile': ('chile',),
+        'Colombia': ('colombia',),
+    },
+}
+
+DEFAULTS = {
+    'degree_level': 'Any',
+    'subject': 'Any',
+    'country': 'International',
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+(?:\.[a-z0-9]+)*')
+
+
+class Classification(NamedTuple):
+    degree_level: str
+    subject: str
+    country: str
+
+
+class KeywordClassifier:
+    """
+    Single-pass, word-boundary keyword classifier.
+
+    Each keyword phrase becomes a tuple of tokens in one lookup table
+    mapping to (category, rank, label). Classifying a text walks its
+    tokens once, probing only phrases that start with the current token.
+    """
+
+    CATEGORIES = ('degree_level', 'subject', 'country')
+
+    def __init__(self, table, defaults):
+        self.defaults = defaults
+        self.lookup = {}
+        self.max_phrase_len = {}
+        for category, labels in table.items():
+            for rank, (label, phrases) in enumerate(labels.items()):
+                for phrase in phrases:
+                    tokens = tuple(TOKEN_RE.findall(phrase.lower()))
+                    self.lookup.setdefault(tokens, []).append((category, rank, label))
+                    first = tokens[0]
+                    self.max_phrase_len[first] = max(self.max_phrase_len.get(first, 0),
+                                                     len(tokens))
+
+    def classify(self, text):
+        """Assign degree level, subject and country from `text`"""
+        tokens = TOKEN_RE.findall(text.lower()) if text else []
+        best = {}
+        for i, token in enumerate(tokens):
+            max_len = self.max_phrase_len.get(token)
+            if not max_len:
+                continue
+            for length in range(1, max_len + 1):
+                hits = self.lookup.get(tuple(tokens[i:i + length]))
+                if not hits:
+                    continue
+                for category, rank, label in hits:
+                    # Countries resolve to the first mention
+                    if category == 'country':
+                        rank = i
+                    current = best.get(category)
+                    if current is None or rank < current[0]:
+                        best[category] = (rank, label)
+
+        return Classification(*(
+            best[category][1] if category in best else self.defaults[category]
+            for category in self.CATEGORIES
+        ))
+
+
+DEFAULT_CLASSIFIER = KeywordClassifier(KEYWORD_TABLE, DEFAULTS)
+
+
+@lru_cache(maxsize=4096)
+def classify(text):
+    """Classify `text` with the default keyword table"""
+    return DEFAULT_CLASSIFIER.classify(text)
@@ -0,0 +1,57 @@
+"""
+scrapy httpcache: save and restore the SQLite HTTP cache as one file
+
+    scrapy httpcache export cache.sqlite   # compacted copy, e.g. for a CI cache step
+    scrapy httpcache import cache.sqlite   # restore it before the next crawl
+    scrapy httpcache info
+"""
+import os
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.utils.project import data_path
+
+from ..httpcache import cache_path, export_cache, import_cache, open_cache
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self):
+        return 'export|import <file> | info'
+
+    def short_desc(self):
+        return 'Export, import or inspect the SQLite HTTP cache'
+
+    def run(self, args, opts):
+        if not args or args[0] not in ('export', 'import', 'info'):
+            raise UsageError()
+        action, files = args[0], args[1:]
+        if len(files) != (0 if action == 'info' else 1):
+            raise UsageError()
+        path = cache_path(self.settings, data_path)
+
+        if action == 'export':
+            count, size = export_cache(path, files[0])
+            print(f"Exported {count} responses ({size / 1024 / 1024:.1f} MB) to {files[0]}")
+        elif action == 'import':
+            try:
+                count = import_cache(files[0], path)
+            except (OSError, ValueError) as e:
+                raise UsageError(str(e), print_help=False)
+            print(f"Imported {count} responses into {path}")
+        else:
+            if not os.path.exists(path):
+                print(f"No HTTP cache at {path}")
+                return
+            conn = open_cache(path)
+            try:
+                count, stored = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrapy_responses'
+                ).fetchone()
+            finally:
+                conn.close()
+            print(f"{path}: {count} responses, {stored / 1024 / 1024:.1f} MB stored, "
+                  f"{os.path.getsize(path) / 1024 / 1024:.1f} MB on disk")
@@ -0,0 +1,599 @@
+"""
+Shared database access for the standalone scraper and the Scrapy pipeline
+
+One process-wide connection pool serves every writer, so several spiders
+in one process reuse warm connections instead of each opening its own.
+The upsert is a server-side prepared statement taking one array per
+column, so a batch is a single EXECUTE with no SQL text to re-parse.
+
+With DB_DRIVER=psycopg (psycopg 3, optional) the pool is a psycopg_pool
+ConnectionPool and upsert_batches() sends every batch in pipeline mode,
+without waiting for each round trip.
+"""
+import logging
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from psycopg2.pool import ThreadedConnectionPool
+
+from .bulkload import (BASE_AMOUNT_COLUMNS, BASE_AMOUNTS, CONFLICT_KEY, MERGED_COUNTS,
+                       RATES_JOIN, WRITE_MODES, bulk_upsert)
+from .extraction import parse_amount
+from .fingerprint import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+# Column name and the SQL type of its array parameter, in row order
+UPSERT_COLUMNS = (
+    ('name', 'varchar'),
+    ('description', 'text'),
+    ('provider', 'varchar'),
+    ('eligibility', 'text'),
+    ('amount', 'varchar'),
+    ('currency', 'varchar'),
+    ('deadline', 'date'),
+    ('application_link', 'text'),
+    ('country', 'varchar'),
+    ('degree_level', 'varchar'),
+    ('subject', 'varchar'),
+    ('source_url', 'text'),
+    ('source_name', 'varchar'),
+    ('content_hash', 'varchar'),
+    ('amount_min', 'numeric'),
+    ('amount_max', 'numeric'),
+    ('amount_period', 'varchar'),
+)
+
+UPSERT_TEMPLATE = """
+    WITH merged AS (
+        INSERT INTO scholarships ({columns}, {base_columns})
+        SELECT incoming.*, {base_amounts}
+        FROM unnest({arrays}) AS incoming ({columns}) {rates_join}
+        ON CONFLICT {conflict_key}
+        DO UPDATE SET
+            description = EXCLUDED.description,
+            eligibility = EXCLUDED.eligibility,
+            amount = EXCLUDED.amount,
+            currency = EXCLUDED.currency,
+            amount_min = EXCLUDED.amount_min,
+            amount_max = EXCLUDED.amount_max,
+            amount_period = EXCLUDED.amount_period,
+            amount_min_base = EXCLUDED.amount_min_base,
+            amount_max_base = EXCLUDED.amount_max_base,
+            application_link = EXCLUDED.application_link,
+            content_hash = EXCLUDED.content_hash,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE scholarships.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        RETURNING (xmax = 0) AS inserted, source_name, id
+    )
+""" + MERGED_COUNTS
+
+_columns = ', '.join(name for name, _ in UPSERT_COLUMNS)
+_base = {'base_columns': BASE_AMOUNT_COLUMNS, 'base_amounts': BASE_AMOUNTS, 'rates_join': RATES_JOIN,
+         'conflict_key': CONFLICT_KEY}
+
+# psycopg2: PREPAREd once per connection, then EXECUTEd with one array per column
+PREPARE_UPSERT = 'PREPARE scholarship_upsert ({types}) AS {body}'.format(
+    types=', '.join(f'{sql_type}[]' for _, sql_type in UPSERT_COLUMNS),
+    body=UPSERT_TEMPLATE.format(
+        columns=_columns,
+        arrays=', '.join(f'${i}' for i in range(1, len(UPSERT_COLUMNS) + 1)),
+        **_base,
+    ),
+)
+EXECUTE_UPSERT = 'EXECUTE scholarship_upsert ({})'.format(', '.join(['%s'] * len(UPSERT_COLUMNS)))
+
+# psycopg 3 prepares statements itself when executed with prepare=True
+UPSERT_PSYCOPG = UPSERT_TEMPLATE.format(
+    columns=_columns,
+    arrays=', '.join(f'%s::{sql_type}[]' for _, sql_type in UPSERT_COLUMNS),
+    **_base,
+)
+
+LOG_RUN = """
+    INSERT INTO scraper_logs
+    (source_name, items_scraped, items_inserted, items_duplicates,
+     items_updated, items_unchanged, items_errors, requests_made, started_at,
+     completed_at, duration_seconds, status)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+SOURCE_HISTORY = """
+    SELECT source_name, COUNT(*), SUM(requests_made), SUM(items_inserted)
+    FROM scraper_logs
+    WHERE source_name = ANY(%s)
+      AND requests_made > 0
+      AND started_at > CURRENT_TIMESTAMP - make_interval(days => %s)
+    GROUP BY source_name
+"""
+
+# Near-duplicate clusters (see dedup.py). cluster_rows() walks the whole
+# table by id; only rows without a mapping need their text
+CLUSTER_ROWS = """
+    SELECT s.id, s.name, s.provider,
+           CASE WHEN c.scholarship_id IS NULL THEN LEFT(s.description, 1000) END,
+           c.canonical_id, c.signature
+    FROM scholarships s
+    LEFT JOIN scholarship_clusters c ON c.scholarship_id = s.id
+    WHERE s.id > %s
+    ORDER BY s.id
+    LIMIT %s
+"""
+
+SCHOLARSHIPS_BY_ID = """
+    SELECT id, name, provider, LEFT(description, 1000)
+    FROM scholarships
+    WHERE id = ANY(%s)
+    ORDER BY id
+"""
+
+STORE_CLUSTERS = """
+    INSERT INTO scholarship_clusters (scholarship_id, canonical_id, similarity, signature)
+    SELECT * FROM unnest(%s::integer[], %s::integer[], %s::real[], %s::bytea[])
+    ON CONFLICT (scholarship_id) DO UPDATE SET
+        canonical_id = EXCLUDED.canonical_id,
+        similarity = EXCLUDED.similarity,
+        signature = EXCLUDED.signature,
+        assigned_at = CURRENT_TIMESTAMP
+"""
+
+# Amounts stored before amount_min existed, walked by id; see backfill_amounts()
+AMOUNTS_AFTER = """
+    SELECT id, amount, currency
+    FROM scholarships
+    WHERE id > %s AND amount IS NOT NULL AND amount <> ''
+      AND amount_min IS NULL AND amount_max IS NULL AND amount_period IS NULL
+    ORDER BY id
+    LIMIT %s
+"""
+
+UPDATE_AMOUNTS = """
+    UPDATE scholarships s SET
+        currency = parsed.currency,
+        amount_min = parsed.amount_min,
+        amount_max = parsed.amount_max,
+        amount_period = parsed.amount_period,
+        amount_min_base = parsed.amount_min * rates.rate_to_base,
+        amount_max_base = parsed.amount_max * rates.rate_to_base
+    FROM unnest(%s::integer[], %s::varchar[], %s::numeric[], %s::numeric[], %s::varchar[])
+         AS parsed (id, currency, amount_min, amount_max, amount_period)
+    LEFT JOIN currency_rates rates ON rates.currency = parsed.currency
+    WHERE s.id = parsed.id
+"""
+
+# Materialized stats and filter facets, see database/schema.sql
+REFRESH_STATS = 'SELECT refresh_scholarship_stats()'
+
+
+# Positions in a scholarship_row() tuple: the unique key's columns
+# and source_name
+KEY_COLUMNS = (0, 2, 6)  # name, provider, deadline
+SOURCE_NAME = 12
+
+
+class UpsertResult(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+    # Rows merged into a later row with the same key in the same batch
+    coalesced: int = 0
+    # (row, error) for each row the database rejected
+    failed: tuple = ()
+    # {source_name: (inserted, updated)}; None when nothing was written
+    by_source: Optional[dict] = None
+    # Ids of the inserted rows, for near-duplicate clustering
+    inserted_ids: tuple = ()
+
+
+def connection_params():
+    """Connection settings from the environment"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'dbname': os.getenv('DB_NAME', 'scholarships'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', 'password'),
+    }
+
+
+def scholarship_row(record):
+    """
+    Column values for one scholarship, truncated to the schema's limits.
+
+    `record['deadline']` must already be a date or None. The amount text
+    is parsed into amount_min/amount_max/amount_period, and a currency
+    named in it takes precedence over `record['currency']`. With neither,
+    the currency is NULL, so the row gets no base-currency amounts.
+    """
+    description = (record.get('description') or '')[:5000]
+    eligibility = (record.get('eligibility') or '')[:2000]
+    amount = (record.get('amount') or '')[:255]
+    application_link = record.get('application_link') or ''
+    parsed = parse_amount(amount)
+    currency = parsed.currency or record.get('currency')
+    currency = currency[:10] if currency else None
+    return (
+        (record.get('name') or '')[:500],
+        description,
+        (record.get('provider') or '')[:255],
+        eligibility,
+        amount,
+        currency,
+        record.get('deadline'),
+        application_link,
+        (record.get('country') or 'International')[:100],
+        (record.get('degree_level') or 'Any')[:100],
+        (record.get('subject') or 'Any')[:200],
+        record.get('source_url') or '',
+        (record.get('source_name') or 'unknown')[:100],
+        content_hash(description, eligibility, amount, currency, parsed.minimum,
+                     parsed.maximum, parsed.period, application_link),
+        parsed.minimum,
+        parsed.maximum,
+        parsed.period,
+    )
+
+
+def coalesce_rows(rows):
+    """
+    Drop all but the last row for each (name, provider, deadline) key.
+
+    Rows are compared after scholarship_row() truncation, as the unique
+    key sees them. A missing deadline is one value of that key, as in
+    unique_scholarship_key. Returns the surviving rows in their original
+    order and the number dropped.
+    """
+    last = {}
+    for index, row in enumerate(rows):
+        last[tuple(row[column] for column in KEY_COLUMNS)] = index
+    kept = [
+        row for index, row in enumerate(rows)
+        if last.get(tuple(row[column] for column in KEY_COLUMNS), index) == index
+    ]
+    return kept, len(rows) - len(kept)
+
+
+def merge_by_source(total, by_source):
+    """Add a {source_name: (inserted, updated)} mapping into `total`"""
+    for source_name, (inserted, updated) in (by_source or {}).items():
+        previous = total.get(source_name, (0, 0))
+        total[source_name] = (previous[0] + inserted, previous[1] + updated)
+    return total
+
+
+def _columns_of(rows):
+    """Transpose row tuples into one list per column"""
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in UPSERT_COLUMNS]
+
+
+class Database:
+    """
+    Pooled PostgreSQL access shared by all writers.
+
+    Use acquire_database()/release_database() rather than creating one
+    directly, so every writer in the process shares the same pool.
+    """
+
+    def __init__(self, minconn=1, maxconn=None, driver=None):
+        self.driver = driver or os.getenv('DB_DRIVER', 'psycopg2')
+        maxconn = maxconn or int(os.getenv('DB_POOL_MAX', '4'))
+        if self.driver == 'psycopg':
+            from psycopg_pool import ConnectionPool
+            self.pool = ConnectionPool(
+                kwargs=connection_params(), min_size=minconn, max_size=maxconn, open=True
+            )
+            from psycopg import DataError, IntegrityError, InterfaceError, OperationalError
+        elif self.driver == 'psycopg2':
+            from psycopg2 import DataError, IntegrityError, InterfaceError, OperationalError
+            self.pool = ThreadedConnectionPool(minconn, maxconn, **connection_params())
+            # ThreadedConnectionPool raises when exhausted instead of waiting
+            self._slots = threading.BoundedSemaphore(maxconn)
+        else:
+            raise ValueError(f"Unknown DB_DRIVER {self.driver!r}, expected 'psycopg2' or 'psycopg'")
+        # Errors about the connection rather than the data; bisecting a
+        # batch cannot help with these
+        self._connection_errors = (InterfaceError, OperationalError)
+        # Errors caused by a bad row, which abort a whole write
+        self._data_errors = (DataError, IntegrityError)
+        self._prepared = weakref.WeakSet()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; commits on success, rolls back on error"""
+        if self.driver == 'psycopg':
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
+        with self._slots:
+            conn = self.pool.getconn()
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                broken = bool(conn.closed)
+                if not broken:
+                    conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn, close=broken)
+
+    def _execute_upsert(self, conn, cursor, rows):
+        if self.driver == 'psycopg':
+            cursor.execute(UPSERT_PSYCOPG, _columns_of(rows), prepare=True)
+        else:
+            if conn not in self._prepared:
+                cursor.execute(PREPARE_UPSERT)
+                self._prepared.add(conn)
+            cursor.execute(EXECUTE_UPSERT, _columns_of(rows))
+
+    def upsert(self, rows, mode='values'):
+        """
+        Write a batch of scholarship_row() tuples, dropping only bad rows.
+
+        Duplicate keys are coalesced first. If the batch is still rejected
+        it is split in half and each half retried, down to single rows, so
+        one bad row costs itself rather than the whole batch. Rejected rows
+        are reported in `failed`. Only data errors (DataError,
+        IntegrityError) are bisected; connection errors and anything else,
+        such as a column missing from the schema, are raised as is.
+        """
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode {mode!r}, expected one of {WRITE_MODES}")
+        rows, coalesced = coalesce_rows(rows)
+        inserted = updated = unchanged = 0
+        by_source = {}
+        inserted_ids = []
+        failed = []
+        chunks = [rows] if rows else []
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                result = self._write(chunk, mode)
+            except self._data_errors as e:
+                if len(chunk) == 1:
+                    failed.append((chunk[0], e))
+                    continue
+                middle = len(chunk) // 2
+                chunks.extend((chunk[middle:], chunk[:middle]))
+                continue
+            inserted += result.inserted
+            updated += result.updated
+            unchanged += result.unchanged
+            merge_by_source(by_source, result.by_source)
+            inserted_ids.extend(result.inserted_ids)
+        return UpsertResult(inserted, updated, unchanged, coalesced, tuple(failed),
+                            by_source or None, tuple(inserted_ids))
+
+    def _write(self, rows, mode):
+        """Write rows in a single transaction"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if mode == 'copy':
+                    inserted, updated, by_source, ids = bulk_upsert(cursor, rows)
+                else:
+                    self._execute_upsert(conn, cursor, rows)
+                    inserted, updated, by_source, ids = cursor.fetchone()
+            finally:
+                cursor.close()
+        return UpsertResult(inserted, updated, len(rows) - inserted - updated, 0, (), by_source,
+                            tuple(ids or ()))
+
+    def upsert_batches(self, batches):
+        """
+        Write several batches, returning an UpsertResult or exception per batch.
+
+        With psycopg 3 all batches are pipelined in one transaction; if a
+        bad row or a lost connection aborts it they are retried one at a
+        time through upsert(), which drops only the bad rows. Otherwise
+        each batch goes through upsert().
+        """
+        if self.driver == 'psycopg' and len(batches) > 1:
+            try:
+                return self._pipelined(batches)
+            except self._data_errors + self._connection_errors:
+                logger.warning("Pipelined write failed, retrying batch by batch", exc_info=True)
+
+        results = []
+        for rows in batches:
+            try:
+                results.append(self.upsert(rows))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _pipelined(self, batches):
+        coalesced = [coalesce_rows(rows) for rows in batches]
+        with self.connection() as conn:
+            with conn.pipeline(), conn.transaction():
+                cursors = []
+                for rows, _ in coalesced:
+                    cursor = conn.cursor()
+                    self._execute_upsert(conn, cursor, rows)
+                    cursors.append(cursor)
+            results = []
+            for (rows, dropped), cursor in zip(coalesced, cursors):
+                inserted, updated, by_source, ids = cursor.fetchone()
+                results.append(UpsertResult(inserted, updated, len(rows) - inserted - updated,
+                                            dropped, (), by_source, tuple(ids or ())))
+                cursor.close()
+        return results
+
+    def seed_seen_index(self, seen):
+        """Fill `seen` from the scholarships table; returns the rows read"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                return seen.load_from_db(cursor)
+            finally:
+                cursor.close()
+
+    def log_run(self, source_name, stats, started_at, completed_at=None):
+        """
+        Record a scraper run in scraper_logs.
+
+        `stats` holds inserted/updated/unchanged/coalesced/errors counts
+        and optionally `requests`, the pages fetched, which the crawl
+        budget uses to rank sources by new items per request.
+        """
+        completed_at = completed_at or datetime.now()
+        inserted = stats.get('inserted', 0)
+        duplicates = stats.get('updated', 0) + stats.get('unchanged', 0) + stats.get('coalesced', 0)
+        errors = stats.get('errors', 0)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(LOG_RUN, (
+                    source_name,
+                    inserted + duplicates,
+                    inserted,
+                    duplicates,
+                    stats.get('updated', 0),
+                    stats.get('unchanged', 0),
+                    errors,
+                    stats.get('requests', 0),
+                    started_at,
+                    completed_at,
+                    int((completed_at - started_at).total_seconds()),
+                    'completed' if errors == 0 else 'partial',
+                ))
+            finally:
+                cursor.close()
+
+    def source_history(self, source_names, days):
+        """
+        Runs, requests and new items per source over the last `days` days,
+        from scraper_logs rows that recorded their requests.
+        """
+        return self._fetch(SOURCE_HISTORY, (list(source_names), days))
+
+    def cluster_rows(self, after_id, limit):
+        """
+        Up to `limit` scholarships with an id above `after_id`, as (id,
+        name, provider, description, canonical_id, signature). Rows that
+        are already clustered come without their description; rows that
+        are not have no canonical_id or signature.
+        """
+        return self._fetch(CLUSTER_ROWS, (after_id, limit))
+
+    def scholarships_by_id(self, ids):
+        """(id, name, provider, description) of the given scholarships"""
+        return self._fetch(SCHOLARSHIPS_BY_ID, (list(ids),))
+
+    def store_clusters(self, clusters):
+        """Write (scholarship_id, canonical_id, similarity, signature) mappings"""
+        if not clusters:
+            return
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(STORE_CLUSTERS, [list(column) for column in zip(*clusters)])
+            finally:
+                cursor.close()
+
+    def backfill_amounts(self, chunk_size=1000):
+        """
+        Parse the amounts of rows stored before the amount columns
+        existed, walking the table once by id. Returns the rows updated.
+
+        Those rows' currency was 'USD' whenever the scraper did not know
+        better, so only a currency named in the amount text is kept.
+        """
+        updated = 0
+        after = 0
+        while True:
+            rows = self._fetch(AMOUNTS_AFTER, (after, chunk_size))
+            if not rows:
+                return updated
+            after = rows[-1][0]
+            parsed = []
+            for scholarship_id, amount, _ in rows:
+                result = parse_amount(amount)
+                if result.minimum is None and result.maximum is None and result.period is None:
+                    continue
+                parsed.append((scholarship_id, result.currency, result.minimum,
+                               result.maximum, result.period))
+            if parsed:
+                with self.connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute(UPDATE_AMOUNTS, [list(column) for column in zip(*parsed)])
+                    finally:
+                        cursor.close()
+                updated += len(parsed)
+
+    def refresh_stats(self):
+        """Recompute scholarship_stats and scholarship_facets after a run"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(REFRESH_STATS)
+            finally:
+                cursor.close()
+
+    def _fetch(self, sql, params):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def close(self):
+        if self.driver == 'psycopg':
+            self.pool.close()
+        else:
+            self.pool.closeall()
+
+
+_shared = None
+_users = 0
+_shared_lock = threading.Lock()
+
+
+def acquire_database():
+    """Return the process-wide Database, creating its pool on first use"""
+    global _shared, _users
+    with _shared_lock:
+        if _shared is None:
+            _shared = Database()
+        _users += 1
+        return _shared
+
+
+def release_database():
+    """Give back a Database from acquire_database(); the last user closes the pool"""
+    global _shared, _users
+    with _shared_lock:
+        if _shared is None:
+            return
+        _users -= 1
+        if _users <= 0:
+            _shared.close()
+            _shared = None
+            _users = 0
+
+
+def main():
+    """python -m scraper.db backfill-amounts"""
+    import sys
+
+    if sys.argv[1:] != ['backfill-amounts']:
+        sys.exit('usage: python -m scraper.db backfill-amounts')
+    db = acquire_database()
+    try:
+        print(f"Parsed the amounts of {db.backfill_amounts()} scholarships")
+    finally:
+        release_database()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Near-duplicate detection across sources with MinHash and LSH
+
+The unique (name, provider, deadline) constraint only catches exact
+repeats. The same programme scraped from several sites usually differs
+slightly in its title, provider or description, so it is stored once
+per site. Each stored scholarship is therefore also mapped to a
+canonical scholarship id in scholarship_clusters.
+
+Every scholarship gets a MinHash signature over shingles of its name,
+provider and the start of its description. Signatures are split into
+bands and bucketed (locality-sensitive hashing), so finding the
+scholarships likely to be similar to a new one is a handful of dict
+lookups rather than a comparison with every stored row. Candidates are
+then checked against the estimated Jaccard similarity.
+
+Signatures are stored with the cluster mapping, so ClusterIndex.load()
+rebuilds the in-memory index without recomputing them and only clusters
+rows that have no mapping yet, in chunks. Run `python -m scraper.dedup`
+to do that ahead of a crawl, e.g. after a bulk import.
+"""
+import hashlib
+import logging
+import random
+import re
+import threading
+from array import array
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+# Words that make titles of the same programme differ between sites
+# without saying anything about which programme it is
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'at', 'for', 'in', 'of', 'on', 'the', 'to',
+    'scholarship', 'scholarships', 'program', 'programme', 'programs', 'programmes',
+    'award', 'awards', 'fund', 'grant', 'grants',
+))
+YEAR_RE = re.compile(r'\b(?:19|20)\d\d(?:[/-]\d{2,4})?\b')
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Only the start of the description is shingled, so that the name still
+# dominates when one source has a long description and another none
+DESCRIPTION_WORDS = 12
+
+# 2^61 - 1, a Mersenne prime for the universal hash permutations
+PRIME = (1 << 61) - 1
+
+
+def words(text):
+    """Lowercased words of `text` without years and stop words"""
+    text = YEAR_RE.sub(' ', (text or '').lower())
+    return [word for word in WORD_RE.findall(text) if word not in STOP_WORDS]
+
+
+def shingles(name, provider, description):
+    """
+    The set of features two listings of the same scholarship share.
+
+    Character trigrams of the name tolerate small spelling and wording
+    differences; provider words and description word pairs are prefixed
+    so they never match name trigrams.
+    """
+    features = set()
+    title = ' '.join(words(name))
+    features.update('n:' + title[i:i + 3] for i in range(max(len(title) - 2, 1)) if title)
+    features.update('p:' + word for word in words(provider))
+    lead = words(description)[:DESCRIPTION_WORDS]
+    features.update(f'd:{a} {b}' for a, b in zip(lead, lead[1:]))
+    return features
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class MinHashLSH:
+    """
+    In-memory MinHash signatures and LSH buckets.
+
+    With 20 bands of 3 rows, a pair at Jaccard similarity 0.6 becomes
+    a candidate with probability 0.99 and a pair at 0.2 with 0.15; the
+    `threshold` check on the estimated similarity then drops the rest.
+    Signatures are array('Q') of `bands * rows` values, which is also
+    how they are stored.
+    """
+
+    def __init__(self, bands=20, rows=3, threshold=0.6, seed=1):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, PRIME), generator.randrange(0, PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+        self.canonical = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, features):
+        """MinHash signature of a feature set"""
+        hashes = [_hash64(feature) % PRIME for feature in features] or [0]
+        return array('Q', (min([(a * h + b) % PRIME for h in hashes])
+                           for a, b in self._permutations))
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [(band, tuple(signature[band * rows:(band + 1) * rows]))
+                for band in range(self.bands)]
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+    def add(self, scholarship_id, signature, canonical_id):
+        self._signatures[scholarship_id] = signature
+        self.canonical[scholarship_id] = canonical_id
+        for key in self._band_keys(signature):
+            self._buckets[key].append(scholarship_id)
+
+    def best_match(self, signature):
+        """(scholarship id, similarity) of the closest indexed signature, or None"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best = None
+        for candidate in candidates:
+            score = self.similarity(signature, self._signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    def assign(self, scholarship_id, signature):
+        """
+        Index a new scholarship and return (canonical id, similarity).
+
+        A scholarship joins the cluster of its closest match; one with no
+        match is its own canonical scholarship, with similarity 1.
+        """
+        match = self.best_match(signature)
+        canonical_id, similarity = (
+            (self.canonical[match[0]], match[1]) if match else (scholarship_id, 1.0)
+        )
+        self.add(scholarship_id, signature, canonical_id)
+        return canonical_id, similarity
+
+
+class ClusterIndex:
+    """
+    MinHashLSH kept in step with the scholarship_clusters table.
+
+    Safe to share between writer threads. Call load() once, then
+    assign() with the ids each upsert inserted.
+    """
+
+    def __init__(self, lsh=None, chunk_size=2000):
+        self.lsh = lsh or MinHashLSH()
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        # Rows at or below this id are in the index
+        self._loaded_upto = 0
+
+    def load(self, db):
+        """
+        Index every stored scholarship, clustering rows that have no
+        mapping yet. Only rows above the last id loaded are read, so
+        calling it again just picks up what was added since.
+
+        Returns (rows indexed, rows newly clustered).
+        """
+        indexed = clustered = 0
+        with self._lock:
+            while True:
+                rows = db.cluster_rows(self._loaded_upto, self.chunk_size)
+                if not rows:
+                    break
+                unclustered = []
+                for scholarship_id, name, provider, description, canonical_id, signature in rows:
+                    if scholarship_id in self.lsh.canonical:
+                        continue
+                    if canonical_id is None:
+                        unclustered.append((scholarship_id, name, provider, description))
+                    else:
+                        self.lsh.add(scholarship_id, array('Q', bytes(signature)), canonical_id)
+                clustered += len(self._cluster(db, unclustered))
+                indexed += len(rows)
+                self._loaded_upto = rows[-1][0]
+        return indexed, clustered
+
+    def assign(self, db, scholarship_ids):
+        """Cluster newly inserted scholarships; returns {id: canonical id}"""
+        if not scholarship_ids:
+            return {}
+        with self._lock:
+            rows = [row for row in db.scholarships_by_id(scholarship_ids)
+                    if row[0] not in self.lsh.canonical]
+            return self._cluster(db, rows)
+
+    def _cluster(self, db, rows):
+        if not rows:
+            return {}
+        assigned = []
+        for scholarship_id, name, provider, description in rows:
+            signature = self.lsh.signature(shingles(name, provider, description))
+            canonical_id, similarity = self.lsh.assign(scholarship_id, signature)
+            assigned.append((scholarship_id, canonical_id, similarity, signature.tobytes()))
+        db.store_clusters(assigned)
+        return {scholarship_id: canonical_id for scholarship_id, canonical_id, _, _ in assigned}
+
+    @property
+    def duplicates(self):
+        """Indexed scholarships that belong to another canonical scholarship"""
+        return sum(1 for sid, canonical in self.lsh.canonical.items() if sid != canonical)
+
+
+def main():
+    """Bring scholarship_clusters up to date with the scholarships table"""
+    from .db import acquire_database, release_database
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db = acquire_database()
+    try:
+        index = ClusterIndex()
+        indexed, clustered = index.load(db)
+    finally:
+        release_database()
+    logger.info(f"Indexed {indexed} scholarships, clustered {clustered} new ones; "
+                f"{index.duplicates} are near-duplicates of another")
+
+
+if __name__ == '__main__':
+    main()
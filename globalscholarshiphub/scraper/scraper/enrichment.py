@@ -0,0 +1,135 @@
+"""
+Detail-page enrichment for scraped listing entries
+
+Listing pages only carry a title and a short excerpt. The enricher follows
+each entry's application link and re-runs extraction on the full detail
+page to fill in provider, eligibility, deadline and amount. Requests go
+through a global worker pool and a per-host token bucket so hundreds of
+pages finish quickly without hammering any single site.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from . import extraction
+from .parsing import compile_css, element_names, iter_elements, text_of
+
+logger = logging.getLogger(__name__)
+
+# Where the main content of a detail page usually lives. The pull parser
+# returns the first of these to close, i.e. the innermost match.
+DEFAULT_DETAIL_BODY = 'div.entry-content, article, main'
+
+DETAIL_TEXT_LIMIT = 20000
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+        bucket.acquire()
+
+
+class DetailEnricher:
+    """
+    Fetch detail pages in parallel and merge what they add into listings.
+
+    `fetch_page(url, skip_unchanged=False)` must return the page HTML or
+    None; the standalone scraper passes its own fetch_page so detail
+    requests share its session, connection pool and response cache.
+    """
+
+    def __init__(self, fetch_page, max_workers=16, rate=1.0, burst=2):
+        self.fetch_page = fetch_page
+        self.limiter = HostRateLimiter(rate, burst)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='detail')
+        self._plans = {}
+        self._plans_lock = threading.Lock()
+
+    def enrich(self, scholarships, detail_body=''):
+        """Enrich `scholarships` in place; returns the number of pages read"""
+        tags, is_body = self._plan(detail_body or DEFAULT_DETAIL_BODY)
+        futures = [
+            self.executor.submit(self._enrich_one, scholarship, tags, is_body)
+            for scholarship in scholarships if scholarship.get('application_link')
+        ]
+        wait(futures)
+        return sum(1 for future in futures if future.result())
+
+    def _plan(self, css):
+        with self._plans_lock:
+            plan = self._plans.get(css)
+            if plan is None:
+                plan = (element_names(css), compile_css(css, prefix='self::'))
+                self._plans[css] = plan
+        return plan
+
+    def _enrich_one(self, scholarship, tags, is_body):
+        url = scholarship['application_link']
+        try:
+            self.limiter.acquire(url)
+            html = self.fetch_page(url, skip_unchanged=False)
+            if not html:
+                return False
+            body = next(iter_elements(html, tags, is_body, limit=1), None)
+            text = text_of(body, DETAIL_TEXT_LIMIT, line_breaks=True)
+            apply_details(scholarship, text)
+            return True
+        except Exception as e:
+            logger.error(f"Error enriching {url}: {e}")
+            return False
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def apply_details(scholarship, text):
+    """Fill fields the listing excerpt left empty from the detail page text"""
+    if not text:
+        return
+    found = extraction.scan(text)
+    if not scholarship.get('deadline') and found.deadline:
+        scholarship['deadline'] = found.deadline
+    if not scholarship.get('amount') and found.amount:
+        scholarship['amount'] = extraction.amount_text(text, found.amount)
+    for field, value in extraction.extract_labeled_fields(text).items():
+        if not scholarship.get(field):
+            scholarship[field] = value
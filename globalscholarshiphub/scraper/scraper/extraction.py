@@ -0,0 +1,535 @@
+"""
+Deadline and amount extraction from free-text scholarship descriptions
+
+All date and money patterns are compiled into a single regular expression,
+so one scan of the text yields every candidate. Dates are built directly
+from the captured groups rather than by trial-and-error strptime calls,
+and results are memoized since the same excerpts recur across runs.
+Deadline fields that hold only a date go through DeadlineParser, which
+learns the format each source uses. parse_amount() reads an amount field
+into the numeric range, period and currency the database indexes.
+"""
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+
+MONTHS = (
+    'january', 'february', 'march', 'april', 'may', 'june', 'july',
+    'august', 'september', 'october', 'november', 'december',
+)
+MONTH_NUMBERS = {name: number for number, name in enumerate(MONTHS, start=1)}
+_MONTH = '(?:' + '|'.join(MONTHS) + ')'
+
+# Candidate kinds in priority order: when several kinds appear in the
+# same text, the earlier kind wins.
+DATE_KINDS = ('dmy', 'mdy', 'iso', 'slash')
+AMOUNT_KINDS = ('usd', 'eur', 'gbp', 'full_tuition', 'full_funding',
+                'fully_funded', 'partial_funding', 'percent_tuition')
+
+# Currency symbols can be glued to a prefix ("US$5,000"); every other
+# candidate must start on a word boundary, which lets the scanner reject
+# most positions after a single lookbehind instead of trying each branch.
+CANDIDATE_RE = re.compile('|'.join([
+    r'(?P<usd>\$(?P<usd_value>[\d,]+(?:\.\d{2})?))',
+    r'(?P<eur>€(?P<eur_value>[\d,]+(?:\.\d{2})?))',
+    r'(?P<gbp>£(?P<gbp_value>[\d,]+(?:\.\d{2})?))',
+]) + r'|(?<!\w)(?:' + '|'.join([
+    # 15 March 2024
+    rf'(?P<dmy>(?P<dmy_day>\d{{1,2}})\s+(?P<dmy_month>{_MONTH})\s+(?P<dmy_year>\d{{4}}))',
+    # March 15, 2024
+    rf'(?P<mdy>(?P<mdy_month>{_MONTH})\s+(?P<mdy_day>\d{{1,2}}),?\s+(?P<mdy_year>\d{{4}}))',
+    # 2024-03-15
+    r'(?P<iso>(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2}))',
+    # 15/03/2024 or 03/15/2024
+    r'(?P<slash>(?P<slash_first>\d{1,2})/(?P<slash_second>\d{1,2})/(?P<slash_year>\d{4}))',
+    r'(?P<full_tuition>full\s+tuition)',
+    r'(?P<full_funding>full\s+funding)',
+    r'(?P<fully_funded>fully\s+funded)',
+    r'(?P<partial_funding>partial\s+funding)',
+    r'(?P<percent_tuition>(?P<percent_tuition_value>\d+)%\s+tuition)',
+]) + ')', re.IGNORECASE)
+
+_DATE_PRIORITY = {kind: rank for rank, kind in enumerate(DATE_KINDS)}
+_AMOUNT_PRIORITY = {kind: rank for rank, kind in enumerate(AMOUNT_KINDS)}
+
+
+class Amount(NamedTuple):
+    """A money or funding mention found in text"""
+    text: str
+    kind: str
+    value: Optional[float] = None
+    currency: Optional[str] = None
+
+
+class Extraction(NamedTuple):
+    """Everything extracted from one piece of text"""
+    deadline: Optional[date]
+    amount: Optional[Amount]
+
+
+def _make_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _date_from_match(match, kind):
+    """Build a date from the groups of a date candidate"""
+    group = match.group
+    if kind == 'dmy':
+        return _make_date(group('dmy_year'), MONTH_NUMBERS[group('dmy_month').lower()],
+                          group('dmy_day'))
+    if kind == 'mdy':
+        return _make_date(group('mdy_year'), MONTH_NUMBERS[group('mdy_month').lower()],
+                          group('mdy_day'))
+    if kind == 'iso':
+        return _make_date(group('iso_year'), group('iso_month'), group('iso_day'))
+    # Day-first is tried before month-first, as in the old format list
+    first, second, year = group('slash_first'), group('slash_second'), group('slash_year')
+    return _make_date(year, second, first) or _make_date(year, first, second)
+
+
+def _amount_from_match(match, kind):
+    """Build an Amount from the groups of a money candidate"""
+    text = match.group(kind)
+    if kind in ('usd', 'eur', 'gbp'):
+        digits = match.group(f'{kind}_value').replace(',', '')
+        value = float(digits) if digits else None
+        return Amount(text, kind, value, kind.upper())
+    if kind == 'percent_tuition':
+        return Amount(text, kind, float(match.group('percent_tuition_value')))
+    return Amount(text, kind)
+
+
+def scan(text):
+    """
+    Scan `text` once and return its deadline and amount.
+
+    Among several candidates of different kinds the highest-priority kind
+    wins, then the leftmost occurrence. Date candidates that do not form a
+    valid calendar date are skipped.
+    """
+    if not text:
+        return Extraction(None, None)
+
+    dates = []
+    amounts = []
+    for match in CANDIDATE_RE.finditer(text):
+        kind = match.lastgroup
+        if kind in _DATE_PRIORITY:
+            dates.append((_DATE_PRIORITY[kind], match.start(), match, kind))
+        else:
+            amounts.append((_AMOUNT_PRIORITY[kind], match.start(), match, kind))
+
+    deadline = None
+    for _, _, match, kind in sorted(dates, key=lambda c: c[:2]):
+        deadline = _date_from_match(match, kind)
+        if deadline:
+            break
+
+    amount = None
+    if amounts:
+        _, _, match, kind = min(amounts, key=lambda c: c[:2])
+        amount = _amount_from_match(match, kind)
+
+    return Extraction(deadline, amount)
+
+
+# Listing excerpts repeat across runs and are memoized; long one-off texts
+# such as detail pages should call scan() directly.
+extract = lru_cache(maxsize=4096)(scan)
+
+
+def extract_deadline(text):
+    """Return the deadline mentioned in `text`, or None"""
+    return extract(text).deadline
+
+
+@lru_cache(maxsize=4096)
+def extract_amount(text):
+    """
+    Return the amount as written in `text`, or ''.
+
+    A money amount comes with the range and period stated around it (see
+    amount_span), so parse_amount() can read all of them back.
+    """
+    return amount_text(text, extract(text).amount)
+
+
+def amount_text(text, amount):
+    """
+    The amount stated in `text`: its first money mention (any currency
+    symbol, code or word, see MONEY_RE) with the range and period around
+    it, or else the wording of `amount`, the Amount scan() found there,
+    such as "Full Funding".
+    """
+    return amount_span(text) or (amount.text if amount else '')
+
+
+# Money markers and the ISO currency they mean. Prefixed dollars come
+# before the bare '$', which is read as USD.
+CURRENCY_MARKERS = {
+    'us$': 'USD', 'usd': 'USD', '$': 'USD', 'dollars': 'USD', 'dollar': 'USD',
+    'ca$': 'CAD', 'c$': 'CAD', 'cad': 'CAD',
+    'au$': 'AUD', 'a$': 'AUD', 'aud': 'AUD',
+    'nz$': 'NZD', 'nzd': 'NZD',
+    '€': 'EUR', 'eur': 'EUR', 'euro': 'EUR', 'euros': 'EUR',
+    '£': 'GBP', 'gbp': 'GBP', 'pounds': 'GBP',
+    '¥': 'JPY', 'jpy': 'JPY', 'yen': 'JPY',
+    '₹': 'INR', 'inr': 'INR', 'rupees': 'INR',
+    '₦': 'NGN', 'ngn': 'NGN', 'naira': 'NGN',
+    'chf': 'CHF', 'sek': 'SEK', 'nok': 'NOK', 'dkk': 'DKK', 'cny': 'CNY',
+    'rmb': 'CNY', 'zar': 'ZAR', 'kes': 'KES', 'ghs': 'GHS',
+}
+
+# How often a stated amount is paid
+AMOUNT_PERIODS = {
+    'month': 'month', 'monthly': 'month', 'mo': 'month', 'pm': 'month', 'p.m.': 'month',
+    'year': 'year', 'yearly': 'year', 'annum': 'year', 'annually': 'year', 'pa': 'year',
+    'p.a.': 'year', 'yr': 'year', 'academic year': 'year',
+    'semester': 'semester', 'term': 'semester',
+    'week': 'week', 'weekly': 'week',
+    'one-time': 'once', 'one time': 'once', 'once': 'once', 'lump sum': 'once',
+}
+
+_MARKER = '|'.join(sorted(map(re.escape, CURRENCY_MARKERS), key=len, reverse=True))
+# Thousands may be grouped with ',', '.', a space or a (narrow) no-break
+# space, and "12.000,50" has a decimal comma; a number never starts inside another one or with a stray zero,
+# so "10 000" is not misread as 10 and 000
+_NUMBER = (r'(?<![\d.,])(?!0\d)'
+           r'(?:\d{1,3}(?:\.\d{3})+,\d{1,2}(?!\d)|\d{1,3}(?:[,.]\d{3})+(?:\.\d{1,2})?|\d{1,3}(?:[ \u00a0\u202f]\d{3})+(?!\d)|\d+(?:\.\d{1,2})?)')
+
+# A number with its currency marker on either side and a k/m multiplier
+MONEY_RE = re.compile(
+    rf'(?:(?P<before>{_MARKER})\s?)?(?P<number>{_NUMBER})(?!\s?%)\s?(?P<scale>k|m|million|thousand)?\b'
+    rf'(?:\s?(?P<after>{_MARKER})(?!\w))?',
+    re.IGNORECASE,
+)
+RANGE_SEPARATOR_RE = re.compile(r'\s*(?:-|–|—|to)\s*$', re.IGNORECASE)
+# "between $1,000 and $5,000"
+BETWEEN_RE = re.compile(r'\bbetween\s*$', re.IGNORECASE)
+AND_SEPARATOR_RE = re.compile(r'\s*and\s*$', re.IGNORECASE)
+UP_TO_RE = re.compile(r'(?:up\s+to|maximum(?:\s+of)?|max\.?)\s*$', re.IGNORECASE)
+FROM_RE = re.compile(r'(?:from|at\s+least|minimum(?:\s+of)?|min\.?)\s*$', re.IGNORECASE)
+_PERIOD = '|'.join(sorted(map(re.escape, AMOUNT_PERIODS), key=len, reverse=True))
+# After "per", "/", "each" or "every" the period may be counted and plural
+# ("per 2 years", "/ 6 months"); a plural on its own, as in "3 months",
+# is a duration rather than how often the amount is paid
+PERIOD_RE = re.compile(
+    rf'(?:(?:/\s*|\b(?:per|each|every)\s+)(?:\d+\s+)?(?P<counted>{_PERIOD})s?'
+    rf'|(?:\ba\s+|\b)(?P<period>{_PERIOD}))(?!\w)',
+    re.IGNORECASE,
+)
+# A period written just before the amount ("Monthly: €1,000")
+PERIOD_BEFORE_RE = re.compile(
+    r'(?<!\w)(?P<period>monthly|yearly|annually|weekly|one-time|one time|lump sum)\s*:?\s*$',
+    re.IGNORECASE,
+)
+
+_SCALES = {'k': 1_000, 'thousand': 1_000, 'm': 1_000_000, 'million': 1_000_000}
+
+# A number without a marker or scale is only read as the other end of a
+# range if it is within this factor of the end that has one
+RANGE_RATIO = 10
+
+
+class ParsedAmount(NamedTuple):
+    """Numeric reading of an amount field"""
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    # 'month', 'year', 'semester', 'week', 'once' or None when not stated
+    period: Optional[str] = None
+    # ISO 4217 code, or None when the text names no currency
+    currency: Optional[str] = None
+
+
+def _number(text):
+    """Float of a number written with ',', '.' or space thousands separators"""
+    text = re.sub(r'[ \u00a0\u202f]', '', text)
+    if re.fullmatch(r'\d{1,3}(?:\.\d{3})+,\d{1,2}', text):
+        # "12.000,50": dot thousands, decimal comma
+        return float(text.replace('.', '').replace(',', '.'))
+    if re.fullmatch(r'\d{1,3}(?:\.\d{3})+', text):
+        # "1.200" is a thousands separator, as in "€1.200"
+        return float(text.replace('.', ''))
+    return float(text.replace(',', ''))
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(text):
+    """
+    Read the minimum, maximum, period and currency of an amount field.
+
+    "$5,000" is 5000-5000 USD, "€850-1,200/month" 850-1200 EUR a month,
+    "between $1,000 and $5,000" 1000-5000, "up to £10k per year" has only
+    a maximum. A number only counts as money with a currency marker or k/m
+    scale attached, or as the other end of a range that has one and is of
+    similar size ("€850-1,200", but not "$5,000 - 2 awards"), so "3 months"
+    or "2 years" is not an amount. A period counts only right before or
+    after the amount, so the "pm" of "apply by 5 pm" does not. Text
+    without such a number, such as "Full Funding", has no minimum or
+    maximum.
+    """
+    return _read_amount(text)[0]
+
+
+def amount_span(text):
+    """
+    The part of `text` stating its first money amount.
+
+    The money mention is widened to the range, "up to"/"from" wording and
+    period around it, so "Up to €1,000 - €5,000 per month" is kept whole
+    rather than cut down to "€1,000". Returns '' when there is none.
+    """
+    _, start, end = _read_amount(text)
+    return text[start:end].strip() if start is not None else ''
+
+
+def _read_amount(text):
+    """parse_amount() of `text`, with the start and end of the span read"""
+    if not text:
+        return ParsedAmount(), None, None
+
+    currency = None
+    # (value, text before it, has a marker or scale, match start, match end)
+    numbers = []
+    for match in MONEY_RE.finditer(text):
+        marker = match.group('before') or match.group('after')
+        scale = match.group('scale')
+        value = _number(match.group('number'))
+        if scale:
+            value *= _SCALES[scale.lower()]
+        if marker and currency is None:
+            currency = CURRENCY_MARKERS[marker.lower()]
+        numbers.append((value, text[:match.start()], bool(marker or scale),
+                        match.start(), match.end()))
+
+    def ranged(first, second):
+        between = text[first[4]:second[3]]
+        if RANGE_SEPARATOR_RE.fullmatch(between):
+            return True
+        return bool(AND_SEPARATOR_RE.fullmatch(between) and BETWEEN_RE.search(first[1]))
+
+    def joins(number, other, first, second):
+        """Whether bare `number` is the other end of a range with `other`"""
+        if not other[2] or not ranged(first, second):
+            return False
+        low, high = sorted((number[0], other[0]))
+        return low > 0 and high <= low * RANGE_RATIO
+
+    values = [
+        number for i, number in enumerate(numbers)
+        if number[2]
+        or (i + 1 < len(numbers) and joins(number, numbers[i + 1], number, numbers[i + 1]))
+        or (i > 0 and joins(number, numbers[i - 1], numbers[i - 1], number))
+    ]
+    if not values:
+        return ParsedAmount(currency=currency), None, None
+
+    first, before_first, _, start, end = values[0]
+    up_to = UP_TO_RE.search(before_first)
+    from_ = FROM_RE.search(before_first)
+    if len(values) > 1 and ranged(values[0], values[1]):
+        low, high = sorted((first, values[1][0]))
+        end = values[1][4]
+        prefix = BETWEEN_RE.search(before_first) or up_to or from_
+    elif up_to:
+        low, high, prefix = None, first, up_to
+    elif from_:
+        low, high, prefix = first, None, from_
+    else:
+        low = high = first
+        prefix = None
+    if prefix:
+        start = prefix.start()
+
+    period = None
+    after = PERIOD_RE.match(text, end + len(text[end:]) - len(text[end:].lstrip()))
+    if after:
+        period = after.group('counted') or after.group('period')
+        end = after.end()
+    else:
+        before = PERIOD_BEFORE_RE.search(text[:start])
+        if before:
+            period = before.group('period')
+            start = before.start()
+    if period:
+        period = AMOUNT_PERIODS[period.lower()]
+    return ParsedAmount(low, high, period, currency), start, end
+
+
+# Formats a scraped deadline field may be written in. Order matters only
+# for sources the parser has not seen yet: day-first before month-first.
+DEADLINE_FORMATS = (
+    '%Y-%m-%d',
+    '%d %B %Y',
+    '%B %d, %Y',
+    '%B %d %Y',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y-%m-%dT%H:%M:%S',
+    '%d %b %Y',
+    '%b %d, %Y',
+)
+
+
+class DeadlineParser:
+    """
+    Parse deadline fields, learning which format each source uses.
+
+    A source writes all its dates the same way, so the format that last
+    matched for a source is tried first and the full list is only walked
+    on a miss. Results are kept per (source, raw string) in a bounded LRU;
+    the source is part of the key because "03/04/2024" means different
+    days on day-first and month-first sites. Safe to share between threads.
+    """
+
+    def __init__(self, formats=DEADLINE_FORMATS, maxsize=4096):
+        self.formats = tuple(formats)
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._learned = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.format_hits = 0
+        self.format_misses = 0
+        self.failures = 0
+
+    def parse(self, value, source=None):
+        """Return the date in `value`, or None if no known format matches"""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        text = str(value).strip()
+        key = (source, text)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+            learned = self._learned.get(source)
+
+        parsed, fmt = self._strptime(text, learned)
+
+        with self._lock:
+            if parsed is None:
+                self.failures += 1
+            elif fmt == learned:
+                self.format_hits += 1
+            else:
+                self.format_misses += 1
+                self._learned[source] = fmt
+            self._cache[key] = parsed
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def _strptime(self, text, learned):
+        if learned:
+            try:
+                return datetime.strptime(text, learned).date(), learned
+            except ValueError:
+                pass
+        for fmt in self.formats:
+            if fmt == learned:
+                continue
+            try:
+                return datetime.strptime(text, fmt).date(), fmt
+            except ValueError:
+                continue
+        return None, None
+
+    def learned_formats(self):
+        """Map of source to the format that last matched for it"""
+        with self._lock:
+            return dict(self._learned)
+
+    def stats(self):
+        """Counters plus the cache and learned-format hit rates"""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            parsed = self.format_hits + self.format_misses
+            return {
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cache_size': len(self._cache),
+                'format_hits': self.format_hits,
+                'format_misses': self.format_misses,
+                'failures': self.failures,
+                'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0,
+                'format_hit_rate': self.format_hits / parsed if parsed else 0.0,
+            }
+
+
+# Shared by every spider the Scrapy pipeline serves, so formats learned
+# for a source carry across them
+deadline_parser = DeadlineParser()
+
+
+def parse_deadline(value, source=None):
+    """Parse a scraped deadline field with the shared DeadlineParser"""
+    return deadline_parser.parse(value, source)
+
+
+# "Label: value" lines on detail pages. A label alone on its line is a
+# heading for the lines that follow.
+LABELED_FIELDS = {
+    'provider': ('host university', 'host universities', 'host institution',
+                 'host institutions', 'provider', 'offered by', 'funded by',
+                 'sponsor', 'sponsored by', 'awarding body'),
+    'eligibility': ('eligibility', 'eligibility criteria', 'eligibility requirements',
+                    'eligible countries', 'eligible candidates', 'who can apply',
+                    'requirements'),
+}
+_LABEL_FIELD = {label: field for field, labels in LABELED_FIELDS.items() for label in labels}
+LABEL_RE = re.compile(
+    r'^[ \t]*(?P<label>' + '|'.join(sorted(map(re.escape, _LABEL_FIELD), key=len, reverse=True))
+    + r')[ \t]*(?:\(s\))?[ \t]*(?::[ \t]*(?P<value>.*)|$)',
+    re.IGNORECASE,
+)
+
+
+# Any short "Something:" line, used to end a multi-line labeled value
+ANY_LABEL_RE = re.compile(r'^[ \t]*[A-Za-z][\w ()/&\'-]{0,40}:')
+
+
+def extract_labeled_fields(text, max_lines=5):
+    """
+    Return provider and eligibility from "Label: value" lines in `text`.
+
+    A label on a line of its own (a heading) takes the following
+    non-empty lines, up to `max_lines` or the next label.
+    """
+    fields = {}
+    if not text:
+        return fields
+    lines = text.splitlines()
+    for number, line in enumerate(lines):
+        match = LABEL_RE.match(line)
+        if not match:
+            continue
+        field = _LABEL_FIELD[match.group('label').lower()]
+        if field in fields:
+            continue
+        value = (match.group('value') or '').strip()
+        if not value:
+            following = []
+            for next_line in lines[number + 1:]:
+                if len(following) >= max_lines or ANY_LABEL_RE.match(next_line):
+                    break
+                if next_line.strip():
+                    following.append(next_line.strip())
+            value = ' '.join(following)
+        if value:
+            fields[field] = value
+    return fields
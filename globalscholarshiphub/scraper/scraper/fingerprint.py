@@ -0,0 +1,24 @@
+"""
+Content fingerprints for scholarship rows
+
+The upsert only rewrites an existing row when its fingerprint differs
+from the incoming one, so re-scraping an unchanged scholarship leaves
+the row, its updated_at and the WAL untouched.
+"""
+import hashlib
+
+
+# Columns the upsert overwrites on conflict (the base-currency amounts are
+# derived from these); a change to any other column would not be written
+# anyway, so it must not count as a change
+CONTENT_FIELDS = ('description', 'eligibility', 'amount', 'currency', 'amount_min',
+                  'amount_max', 'amount_period', 'application_link')
+
+# Keeps fields apart so ('ab', 'c') and ('a', 'bc') hash differently
+SEPARATOR = '\x1f'
+
+
+def content_hash(*values):
+    """Hex fingerprint of the given column values, in CONTENT_FIELDS order"""
+    joined = SEPARATOR.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(joined.encode('utf-8'), digest_size=16).hexdigest()
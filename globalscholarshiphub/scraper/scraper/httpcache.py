@@ -0,0 +1,404 @@
+"""
+Persistent HTTP response caches backed by a single SQLite file
+
+ResponseCache stores the body and the ETag/Last-Modified validators of
+every page the standalone scraper fetches, so the next run can send a
+conditional GET and skip unchanged pages.
+
+SqliteCacheStorage is the same idea as a Scrapy HTTPCACHE_STORAGE: one
+file instead of Scrapy's directory of small files per response, gzip'd
+bodies, and bounded by size (least recently used first) and by age, so
+it can be saved and restored between CI runs as one artifact (see
+`scrapy httpcache export|import`). Freshness is left to the cache policy.
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NotModified(Exception):
+    """Raised when a cached page is still current and can be skipped"""
+
+    def __init__(self, url, revalidated=False):
+        super().__init__(f"Not modified: {url}")
+        self.url = url
+        # True if the server answered 304, False if the cached copy was
+        # fresh enough that no request was made
+        self.revalidated = revalidated
+
+
+@dataclass
+class CacheEntry:
+    """A cached response with its validators"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    encoding: Optional[str]
+    fetched_at: float
+    max_age: int
+    body: bytes
+
+    @property
+    def text(self):
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+    def is_fresh(self, now=None):
+        """True while the entry is within its Cache-Control max-age"""
+        return (now or time.time()) - self.fetched_at < self.max_age
+
+    def validators(self):
+        """Headers for a conditional GET revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+
+def parse_cache_control(value):
+    """Return (storable, max_age) from a Cache-Control header value"""
+    value = (value or '').lower()
+    if 'no-store' in value:
+        return False, 0
+    if 'no-cache' in value:
+        return True, 0
+    match = MAX_AGE_RE.search(value)
+    return True, int(match.group(1)) if match else 0
+
+
+class ResponseCache:
+    """
+    URL-keyed response cache with size-bounded LRU eviction.
+
+    Bodies are stored zlib-compressed. Once the total compressed size
+    exceeds `max_bytes`, the least recently used entries are evicted.
+    Safe to share between threads.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            encoding TEXT,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            max_age INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL,
+            body BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()[0]
+
+    def get(self, url):
+        """Return the cached entry for `url`, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, encoding, fetched_at, max_age, body '
+                'FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url)
+            )
+            self._conn.commit()
+        etag, last_modified, encoding, fetched_at, max_age, body = row
+        return CacheEntry(url, etag, last_modified, encoding, fetched_at, max_age,
+                          zlib.decompress(body))
+
+    def store(self, url, headers, body, encoding=None):
+        """Store a 200 response; returns False if the response forbids caching"""
+        storable, max_age = parse_cache_control(headers.get('Cache-Control'))
+        if not storable:
+            self.delete(url)
+            return False
+
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, etag, last_modified, encoding, fetched_at, accessed_at, max_age, size, body) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, headers.get('ETag'), headers.get('Last-Modified'), encoding,
+                 now, now, max_age, len(compressed), compressed)
+            )
+            self._total_bytes += len(compressed) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def refresh(self, url, headers):
+        """Record a 304 revalidation, picking up any updated validators"""
+        _, max_age = parse_cache_control(headers.get('Cache-Control'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET fetched_at = ?, accessed_at = ?, max_age = ?, '
+                'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) '
+                'WHERE url = ?',
+                (now, now, max_age, headers.get('ETag'), headers.get('Last-Modified'), url)
+            )
+            self._conn.commit()
+
+    def delete(self, url):
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            if old:
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._total_bytes -= old[0]
+                self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until under the size bound"""
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                'SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1'
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            self._conn.execute('DELETE FROM responses WHERE url = ?', (row[0],))
+            self._total_bytes -= row[1]
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SqliteCacheStorage:
+    """
+    Scrapy cache storage keeping every response in one SQLite file.
+
+    Entries are keyed by spider name and request fingerprint. Headers
+    are stored raw and bodies gzip'd. When the stored bodies exceed
+    HTTPCACHE_SQLITE_MAX_MB, the least recently used entries are evicted
+    down to 90% of the bound, so eviction runs in batches rather than on
+    every store. Entries not stored or revalidated for
+    HTTPCACHE_SQLITE_MAX_AGE_DAYS are dropped when a spider opens.
+
+    HTTPCACHE_EXPIRATION_SECS is honoured as by Scrapy's own storages;
+    with RFC2616Policy leave it at 0 and let the policy decide, since it
+    can revalidate stale entries with a conditional GET.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scrapy_responses (
+            spider TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            headers BLOB NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (spider, fingerprint)
+        );
+        CREATE INDEX IF NOT EXISTS idx_scrapy_responses_accessed ON scrapy_responses(accessed_at);
+        CREATE INDEX IF NOT EXISTS idx_scrapy_responses_stored ON scrapy_responses(stored_at);
+    """
+
+    # Evicting down to this share of max_bytes leaves room for a batch of
+    # new responses before the next eviction
+    EVICT_TO = 0.9
+
+    def __init__(self, settings):
+        from scrapy.utils.project import data_path
+
+        self.path = cache_path(settings, data_path)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.max_bytes = int(settings.getfloat('HTTPCACHE_SQLITE_MAX_MB', 256) * 1024 * 1024)
+        self.max_age = settings.getfloat('HTTPCACHE_SQLITE_MAX_AGE_DAYS', 14) * 86400
+        self.compress_level = settings.getint('HTTPCACHE_SQLITE_GZIP_LEVEL', 6)
+        self._conn = None
+        self._total_bytes = 0
+
+    def open_spider(self, spider):
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        if self._conn is None:
+            self._conn = open_cache(self.path)
+        if self.max_age > 0:
+            pruned = self._conn.execute(
+                'DELETE FROM scrapy_responses WHERE stored_at < ?', (time.time() - self.max_age,)
+            ).rowcount
+            if pruned:
+                logger.info(f"HTTP cache: dropped {pruned} responses older than "
+                            f"{self.max_age / 86400:g} days")
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM scrapy_responses'
+        ).fetchone()[0]
+        logger.debug(f"Using SQLite cache storage in {self.path} "
+                     f"({self._total_bytes / 1024 / 1024:.1f} MB)")
+
+    def close_spider(self, spider):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def retrieve_response(self, spider, request):
+        """The cached response for `request`, or None"""
+        from scrapy.http import Headers
+        from scrapy.responsetypes import responsetypes
+        from w3lib.http import headers_raw_to_dict
+
+        key = self._fingerprinter.fingerprint(request).hex()
+        row = self._conn.execute(
+            'SELECT url, status, headers, body, stored_at FROM scrapy_responses '
+            'WHERE spider = ? AND fingerprint = ?', (spider.name, key)
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, raw_headers, body, stored_at = row
+        now = time.time()
+        if 0 < self.expiration_secs < now - stored_at:
+            return None
+        self._conn.execute(
+            'UPDATE scrapy_responses SET accessed_at = ? WHERE spider = ? AND fingerprint = ?',
+            (now, spider.name, key)
+        )
+        body = gzip.decompress(body)
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        request.meta['cache_timestamp'] = stored_at
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        from w3lib.http import headers_dict_to_raw
+
+        key = self._fingerprinter.fingerprint(request).hex()
+        body = gzip.compress(response.body, compresslevel=self.compress_level)
+        raw_headers = headers_dict_to_raw(response.headers)
+        size = len(body) + len(raw_headers)
+        now = time.time()
+        old = self._conn.execute(
+            'SELECT size FROM scrapy_responses WHERE spider = ? AND fingerprint = ?',
+            (spider.name, key)
+        ).fetchone()
+        self._conn.execute(
+            'INSERT OR REPLACE INTO scrapy_responses '
+            '(spider, fingerprint, url, status, headers, body, size, stored_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (spider.name, key, response.url, response.status, raw_headers, body, size, now, now)
+        )
+        self._total_bytes += size - (old[0] if old else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to EVICT_TO of max_bytes"""
+        excess = self._total_bytes - int(self.max_bytes * self.EVICT_TO)
+        # Running total of freed bytes in LRU order; an entry goes if the
+        # ones before it have not freed enough yet
+        deleted = self._conn.execute(
+            'DELETE FROM scrapy_responses WHERE rowid IN ('
+            '  SELECT rowid FROM ('
+            '    SELECT rowid, SUM(size) OVER (ORDER BY accessed_at, rowid) - size AS freed_before'
+            '    FROM scrapy_responses'
+            '  ) WHERE freed_before < ?'
+            ')', (excess,)
+        ).rowcount
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM scrapy_responses'
+        ).fetchone()[0]
+        logger.debug(f"HTTP cache: evicted {deleted} least recently used responses")
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+
+def cache_path(settings, data_path=None):
+    """Path of the SqliteCacheStorage file for Scrapy `settings`"""
+    path = settings.get('HTTPCACHE_SQLITE_PATH') or os.path.join(
+        settings.get('HTTPCACHE_DIR', 'httpcache'), 'responses.sqlite')
+    if data_path is not None and not os.path.isabs(path):
+        # Relative paths live in the project data dir, like HTTPCACHE_DIR
+        directory, name = os.path.split(path)
+        return os.path.join(data_path(directory or '.', createdir=True), name)
+    return path
+
+
+def open_cache(path):
+    """An autocommit WAL connection to a SqliteCacheStorage file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.executescript(SqliteCacheStorage.SCHEMA)
+    return conn
+
+
+def export_cache(path, destination):
+    """
+    Write a compacted, self-contained copy of the cache at `path` to
+    `destination` (no WAL side files), safe while a crawl is using it.
+    Returns (responses, bytes written).
+    """
+    if os.path.exists(destination):
+        os.remove(destination)
+    conn = open_cache(path)
+    try:
+        count = conn.execute('SELECT COUNT(*) FROM scrapy_responses').fetchone()[0]
+        conn.execute('VACUUM INTO ?', (destination,))
+    finally:
+        conn.close()
+    return count, os.path.getsize(destination)
+
+
+def import_cache(source, path):
+    """
+    Replace the cache at `path` with an exported copy. The copy is
+    checked before anything is replaced. Returns the number of responses.
+    """
+    conn = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+    try:
+        count = conn.execute('SELECT COUNT(*) FROM scrapy_responses').fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"{source} is not an exported HTTP cache: {e}") from e
+    finally:
+        conn.close()
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.copyfile(source, path)
+    return count
@@ -2,7 +2,7 @@
 Scrapy Items for Scholarship Data
 """
 import scrapy
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional
 
@@ -26,12 +26,12 @@ class ScholarshipItem(scrapy.Item):
 
 class ScholarshipPydantic(BaseModel):
     """Pydantic model for data validation"""
-    name: str = Field(..., min_length=5, max_length=500)
+    name: str = Field(..., max_length=500)
     description: Optional[str] = Field(None, max_length=5000)
     provider: Optional[str] = Field(None, max_length=255)
     eligibility: Optional[str] = Field(None, max_length=2000)
     amount: Optional[str] = Field(None, max_length=255)
-    currency: Optional[str] = Field(default="USD", max_length=10)
+    currency: Optional[str] = Field(None, max_length=10)
     deadline: Optional[str] = None
     application_link: Optional[str] = None
     country: Optional[str] = Field(default="International", max_length=100)
@@ -40,16 +40,15 @@ class ScholarshipPydantic(BaseModel):
     source_url: Optional[str] = None
     source_name: str = Field(..., max_length=100)
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "Fulbright Foreign Student Program",
-                "provider": "U.S. Department of State",
-                "amount": "Full funding",
-                "deadline": "2024-10-15",
-                "country": "USA",
-                "degree_level": "Master",
-                "subject": "Any",
-                "source_name": "scholarshipportal"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "Fulbright Foreign Student Program",
+            "provider": "U.S. Department of State",
+            "amount": "Full funding",
+            "deadline": "2024-10-15",
+            "country": "USA",
+            "degree_level": "Master",
+            "subject": "Any",
+            "source_name": "scholarshipportal"
         }
+    })
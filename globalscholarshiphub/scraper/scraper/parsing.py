@@ -0,0 +1,411 @@
+"""
+Targeted HTML parsing helpers for listing pages
+
+Listing pages are parsed incrementally with lxml's pull parser: only the
+container elements we are looking for are handed back, parsing stops as
+soon as the item limit is reached, and text extraction stops once its
+character budget is filled. Nothing outside the matched containers is
+kept alive, so memory stays flat on very large pages.
+
+Sources are described declaratively (see SourceDefinition) and compiled
+once into XPath selector plans, so adding a source needs no parser code.
+"""
+import json
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+from cssselect import HTMLTranslator, parse as parse_css
+from cssselect.parser import Class, CombinedSelector, Element, SelectorSyntaxError
+from lxml import etree
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Text inside these elements is not page content (BeautifulSoup's
+# get_text() skips it too)
+NON_TEXT_TAGS = frozenset({'script', 'style', 'template'})
+
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+    'li', 'main', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul',
+})
+
+
+def first(results):
+    """First result of an XPath evaluation, or None"""
+    return results[0] if results else None
+
+
+def iter_elements(html, tags, matches=None, limit=None, chunk_size=CHUNK_SIZE, release=None):
+    """
+    Incrementally parse `html` and yield completed elements named in `tags`.
+
+    `matches` is an optional predicate (e.g. a compiled XPath) filtering
+    the candidates. Parsing stops once `limit` elements have been yielded.
+    Each yielded element is released after the consumer moves on, so it
+    must be fully processed before requesting the next one. `release`
+    narrows that to the yielded elements it accepts; anything else, like
+    candidates that do not match, is left alone, since it may sit inside
+    a container that has not been handed back yet.
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag=tags)
+    found = 0
+
+    def matched_events():
+        for _, elem in parser.read_events():
+            if matches is None or matches(elem):
+                yield elem
+                if release is None or release(elem):
+                    _release(elem)
+
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        for elem in matched_events():
+            yield elem
+            found += 1
+            if limit and found >= limit:
+                return
+
+    parser.close()
+    for elem in matched_events():
+        yield elem
+        found += 1
+        if limit and found >= limit:
+            return
+
+
+def _release(elem):
+    """Free a processed element and any earlier siblings"""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _iter_text(elem, line_breaks=False):
+    """
+    Yield the text pieces of `elem` in document order, like get_text().
+
+    With `line_breaks`, a newline is emitted around block-level elements
+    so that "Label: value" lines on detail pages stay separate.
+    """
+    skipping = 0
+    for event, node in etree.iterwalk(elem, events=('start', 'end')):
+        is_element = isinstance(node.tag, str)
+        if event == 'start':
+            if is_element and node.tag in NON_TEXT_TAGS:
+                skipping += 1
+            elif not skipping:
+                if line_breaks and is_element and node.tag in BLOCK_TAGS:
+                    yield '\n'
+                if is_element and node.text:
+                    yield node.text
+        else:
+            if is_element and node.tag in NON_TEXT_TAGS:
+                skipping -= 1
+            if not skipping and node is not elem:
+                if line_breaks and is_element and node.tag in BLOCK_TAGS:
+                    yield '\n'
+                if node.tail:
+                    yield node.tail
+
+
+def text_of(elem, budget=None, line_breaks=False):
+    """
+    Return the stripped text of `elem`, truncated to `budget` characters.
+
+    Equivalent to get_text().strip()[:budget], but stops walking the
+    subtree as soon as enough non-whitespace text has been collected.
+    """
+    if elem is None:
+        return ''
+    parts = []
+    collected = 0
+    for piece in _iter_text(elem, line_breaks):
+        parts.append(piece)
+        collected += len(piece)
+        if budget is not None and collected > budget:
+            text = ''.join(parts).lstrip()
+            if len(text.rstrip()) > budget:
+                return text[:budget]
+    text = ''.join(parts).strip()
+    return text[:budget] if budget is not None else text
+
+
+_translator = HTMLTranslator()
+
+
+def compile_css(css, prefix='descendant::'):
+    """Compile a CSS selector into an lxml XPath object"""
+    return etree.XPath(_translator.css_to_xpath(css, prefix=prefix))
+
+
+def element_names(css):
+    """
+    Tag names a CSS selector can match, or None if it can match any tag.
+
+    Used to limit pull-parser events to candidate containers.
+    """
+    names = set()
+    for selector in parse_css(css):
+        tree = selector.parsed_tree
+        while not isinstance(tree, Element):
+            tree = tree.subselector if isinstance(tree, CombinedSelector) else tree.selector
+        if tree.element is None:
+            return None
+        names.add(tree.element.lower())
+    return tuple(sorted(names))
+
+
+def merge_names(*groups):
+    """Union of element_names() results; None if any group matches every tag"""
+    if any(group is None for group in groups):
+        return None
+    return tuple(sorted(set().union(*groups)))
+
+
+class FieldPlan:
+    """
+    One field's comma-separated CSS alternatives compiled into a single
+    XPath union.
+
+    Every branch after the first is guarded by ``not()`` of the earlier
+    ones, so the union selects the matches of the first alternative that
+    has any and the alternatives keep their priority order. `mode` picks
+    what is read: 'text' is the first non-blank direct text node (like
+    ``::text``), 'href' the first non-blank href and 'string' the whole
+    text of the first matched element (like get_text()).
+    """
+
+    SUFFIXES = {
+        'text': '/text()[normalize-space()]',
+        'href': '/@href[normalize-space()]',
+        'string': '',
+    }
+
+    def __init__(self, css, mode='text', prefix='descendant-or-self::'):
+        self.css = css
+        self.mode = mode
+        suffix = self.SUFFIXES[mode]
+        paths = [_translator.css_to_xpath(alternative.strip(), prefix=prefix) + suffix
+                 for alternative in css.split(',') if alternative.strip()]
+        branches = [paths[0]]
+        for number, path in enumerate(paths[1:], start=1):
+            earlier = ' or '.join(f'({p})' for p in paths[:number])
+            branches.append(f'self::node()[not({earlier})]/{path}')
+        self.xpath = etree.XPath(' | '.join(branches))
+
+    def __call__(self, elem, budget=None):
+        node = first(self.xpath(elem))
+        if node is None:
+            return ''
+        if self.mode == 'string':
+            return text_of(node, budget)
+        return str(node).strip()
+
+
+def simple_selector(css):
+    """
+    (tag, classes) for a selector made only of a tag and/or classes, such
+    as ``h2``, ``.title`` or ``a.apply``; None for anything else. A tag of
+    None matches any element.
+    """
+    try:
+        selectors = parse_css(css)
+    except SelectorSyntaxError:
+        return None
+    if len(selectors) != 1 or selectors[0].pseudo_element:
+        return None
+    tree = selectors[0].parsed_tree
+    classes = []
+    while isinstance(tree, Class):
+        classes.append(tree.class_name)
+        tree = tree.selector
+    if not isinstance(tree, Element) or tree.namespace:
+        return None
+    return (tree.element.lower() if tree.element else None), frozenset(classes)
+
+
+def _direct_text(elem):
+    """First non-blank text node directly inside `elem`, like ``::text``"""
+    if elem.text and elem.text.strip():
+        return elem.text.strip()
+    for child in elem:
+        if child.tail and child.tail.strip():
+            return child.tail.strip()
+    return ''
+
+
+class CardPlan:
+    """
+    Several fields' CSS alternatives, read from a listing card in one walk.
+
+    `fields` maps each field to comma-separated alternatives in priority
+    order; fields named in `links` are read as hrefs, the others as the
+    first non-blank direct text. Alternatives made of a tag and/or
+    classes are indexed by class and tag up front, so reading a card is
+    one pass over its elements with a dict lookup each, keeping per field
+    the match of the highest-priority alternative. Fields using any other
+    selector fall back to a FieldPlan.
+    """
+
+    def __init__(self, fields, links=()):
+        self.names = tuple(fields)
+        self.by_tag = {}
+        self.by_class = {}
+        self.fallback = {}
+        for field, css in fields.items():
+            mode = 'href' if field in links else 'text'
+            parsed = [simple_selector(alternative) for alternative in css.split(',')]
+            if None in parsed:
+                self.fallback[field] = FieldPlan(css, mode)
+                continue
+            for priority, (tag, classes) in enumerate(parsed):
+                rule = (field, priority, tag, classes, mode)
+                if classes:
+                    self.by_class.setdefault(min(classes), []).append(rule)
+                else:
+                    self.by_tag.setdefault(tag or '*', []).append(rule)
+        self.universal = self.by_tag.pop('*', None)
+
+    def __call__(self, card):
+        found = {}
+        for elem in card.iter(etree.Element):
+            if self.universal:
+                self._offer(found, elem, self.universal)
+            rules = self.by_tag.get(elem.tag)
+            if rules:
+                self._offer(found, elem, rules)
+            classes = elem.get('class')
+            if classes:
+                for name in classes.split():
+                    rules = self.by_class.get(name)
+                    if rules:
+                        self._offer(found, elem, rules)
+        values = dict.fromkeys(self.names, '')
+        values.update((field, value) for field, (_, value) in found.items())
+        for field, plan in self.fallback.items():
+            values[field] = plan(card)
+        return values
+
+    @staticmethod
+    def _offer(found, elem, rules):
+        for field, priority, tag, classes, mode in rules:
+            current = found.get(field)
+            if current is not None and current[0] <= priority:
+                continue
+            if tag and elem.tag != tag:
+                continue
+            if len(classes) > 1 and not classes <= set(elem.get('class', '').split()):
+                continue
+            value = _direct_text(elem) if mode == 'text' else (elem.get('href') or '').strip()
+            if value:
+                found[field] = (priority, value)
+
+
+@dataclass(frozen=True)
+class SourceDefinition:
+    """
+    How to pull scholarships out of one listing page.
+
+    `container` is a CSS selector for each listing entry; `title`, `link`
+    and `body` are CSS selectors evaluated inside the container. At most
+    `limit` containers are read from the page. `detail_body` optionally
+    locates the main content on each entry's detail page.
+
+    `next_page` matches the link to the following listing page; up to
+    `max_pages` pages are read while they keep turning up new entries.
+    Like `container`, it is tested against each element on its own, so
+    it must not use combinators (``a.next`` works, ``nav a.next`` does
+    not).
+    """
+    name: str
+    url: str
+    source_name: str
+    container: str
+    title: str
+    link: str
+    body: str = ''
+    limit: int = 20
+    detail_body: str = ''
+    next_page: str = ''
+    max_pages: int = 1
+
+
+class ListingPage(NamedTuple):
+    entries: list
+    next_url: Optional[str]
+
+
+class SelectorPlan:
+    """A SourceDefinition compiled into XPath objects, built once per source"""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.container_tags = element_names(definition.container)
+        self.is_container = compile_css(definition.container, prefix='self::')
+        self.title = compile_css(definition.title)
+        self.link = compile_css(definition.link)
+        self.body = compile_css(definition.body) if definition.body else None
+        if definition.next_page:
+            self.is_next = compile_css(definition.next_page, prefix='self::')
+            self.tags = merge_names(self.container_tags, element_names(definition.next_page))
+        else:
+            self.is_next = None
+            self.tags = self.container_tags
+
+    def _is_candidate(self, elem):
+        return bool(self.is_container(elem) or self.is_next(elem))
+
+    def parse_page(self, html, text_budget=None, find_next=True):
+        """
+        Read the entries and the next-page link from a listing page in one pass.
+
+        Entries without a title are skipped but still count toward the
+        limit, matching the old slice-then-filter behaviour. Parsing stops
+        as soon as the limit is reached and, if `find_next` is set and the
+        source paginates, the next-page link has been seen.
+        """
+        limit = self.definition.limit
+        entries = []
+        next_url = None
+        containers = 0
+        find_next = find_next and self.is_next is not None
+        if find_next:
+            tags, matches = self.tags, self._is_candidate
+        else:
+            tags, matches = self.container_tags, self.is_container
+        # A next-page link may sit inside an entry that is still being
+        # parsed, so only containers are released
+        for elem in iter_elements(html, tags, matches, release=self.is_container):
+            if containers < limit and self.is_container(elem):
+                containers += 1
+                entry = self._entry(elem, text_budget)
+                if entry is not None:
+                    entries.append(entry)
+            elif find_next and next_url is None and self.is_next(elem):
+                next_url = elem.get('href') or None
+            if containers >= limit and (next_url is not None or not find_next):
+                break
+        return ListingPage(entries, next_url)
+
+    def _entry(self, container, text_budget):
+        title = first(self.title(container))
+        if title is None:
+            return None
+        link = first(self.link(container))
+        return {
+            'name': text_of(title),
+            'application_link': link.get('href', '') if link is not None else '',
+            'description': text_of(first(self.body(container)), text_budget)
+            if self.body is not None else '',
+        }
+
+
+def load_sources(path):
+    """Load source definitions from a JSON file into compiled plans, keyed by name"""
+    with open(path, encoding='utf-8') as f:
+        definitions = [SourceDefinition(**entry) for entry in json.load(f)]
+    return {definition.name: SelectorPlan(definition) for definition in definitions}
@@ -2,250 +2,392 @@
 Scrapy Pipelines for Processing Scholarship Data
 """
 import os
-import psycopg2
-from psycopg2.extras import execute_values
+import time
+from collections import Counter, defaultdict
 from datetime import datetime
 from dotenv import load_dotenv
+from scrapy.exceptions import DropItem
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
+from .bulkload import WRITE_MODES
+from .classifier import DEFAULTS, classify
+from .db import SOURCE_NAME, acquire_database, coalesce_rows, release_database, scholarship_row
+from .dedup import ClusterIndex
+from .extraction import deadline_parser, parse_deadline
 from .items import ScholarshipItem
+from .seen import item_key
+from .validation import normalize, validate_batch
 
 load_dotenv()
 
 
 class ScholarshipPipeline:
-    """Pipeline to store scholarships in PostgreSQL with duplicate prevention"""
+    """
+    Pipeline to store scholarships in PostgreSQL with duplicate prevention
+    
+    Writes never run on the reactor thread. Full batches are handed to a
+    small thread pool, and process_item only waits when `max_in_flight`
+    batches are already being written, so database latency slows the
+    crawl only once it falls behind. Batches are flushed when they reach
+    the current batch size or when their oldest item is `flush_seconds`
+    old. The batch size adapts so that each write takes about
+    `target_write_seconds`.
+    """
     
     def __init__(self):
-        self.db_connection = None
-        self.db_cursor = None
+        self.db = None
+        self.started_at = None
         self.items_buffer = []
-        self.buffer_size = 50
+        self.buffer_started = None
+        
+        # 'copy' stages each batch with COPY and merges it in one statement;
+        # batches can then be much larger
+        self.write_mode = os.getenv('SCRAPER_WRITE_MODE', 'values')
+        if self.write_mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode {self.write_mode!r}, expected one of {WRITE_MODES}")
+        default_batch = '1000' if self.write_mode == 'copy' else '50'
+        self.buffer_size = int(os.getenv('SCRAPER_BATCH_SIZE', default_batch))
+        self.min_batch_size = max(1, self.buffer_size // 5)
+        self.max_batch_size = int(os.getenv('SCRAPER_MAX_BATCH_SIZE', str(self.buffer_size * 20)))
+        self.target_write_seconds = float(os.getenv('SCRAPER_TARGET_WRITE_SECONDS', '0.5'))
+        self.flush_seconds = float(os.getenv('SCRAPER_FLUSH_SECONDS', '5'))
+        self.max_in_flight = int(os.getenv('SCRAPER_MAX_IN_FLIGHT', '2'))
+        
+        # Map every inserted scholarship to a canonical one (see dedup.py)
+        self.clusters = ClusterIndex() if os.getenv('SCRAPER_DEDUP', '1') == '1' else None
+        self.near_duplicates = 0
+        
+        self.threadpool = None
+        self.slots = None
+        self.flusher = None
+        self.pending = set()
         self.stats = {
             'inserted': 0,
-            'duplicates': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'coalesced': 0,
             'errors': 0
         }
+        # Per source_name, so each source's yield can be logged on its own
+        self.source_stats = defaultdict(Counter)
     
     def open_spider(self, spider):
-        """Initialize database connection"""
+        """Start the writer threads and borrow the shared database pool"""
+        self.started_at = datetime.now()
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=self.max_in_flight + 1,
+                                     name='scholarship-db')
+        self.threadpool.start()
+        self.slots = defer.DeferredSemaphore(self.max_in_flight)
+        self.flusher = task.LoopingCall(self._flush_if_stale, spider)
+        self.flusher.start(max(self.flush_seconds / 2, 0.1), now=False)
+        
+        d = self._in_thread(self._connect, spider)
+        d.addErrback(self._connect_failed, spider)
+        return d
+    
+    def _connect(self, spider):
+        self.db = acquire_database()
+        spider.logger.info("Database connection established")
+        self._seed_seen_index(spider)
+        self._load_clusters(spider)
+    
+    def _connect_failed(self, failure, spider):
+        spider.logger.error(f"Failed to connect to database: {failure.value}")
+        self._stop_workers()
+        return failure
+    
+    def _in_thread(self, func, *args):
+        return threads.deferToThreadPool(reactor, self.threadpool, func, *args)
+    
+    def _seed_seen_index(self, spider):
+        """Fill the spider's seen index from the database if it is empty"""
+        seen = getattr(spider, 'seen_index', None)
+        if seen is None or len(seen):
+            return
         try:
-            self.db_connection = psycopg2.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                port=os.getenv('DB_PORT', '5432'),
-                database=os.getenv('DB_NAME', 'scholarships'),
-                user=os.getenv('DB_USER', 'postgres'),
-                password=os.getenv('DB_PASSWORD', 'password')
-            )
-            self.db_cursor = self.db_connection.cursor()
-            spider.logger.info("Database connection established")
+            count = self.db.seed_seen_index(seen)
+            spider.logger.info(f"Seen index seeded with {count} stored scholarships")
         except Exception as e:
-            spider.logger.error(f"Failed to connect to database: {e}")
-            raise
+            spider.logger.error(f"Error seeding seen index: {e}")
+    
+    def _load_clusters(self, spider):
+        """Index the stored scholarships for near-duplicate detection"""
+        if self.clusters is None:
+            return
+        try:
+            indexed, clustered = self.clusters.load(self.db)
+            spider.logger.info(f"Near-duplicate index: {indexed} scholarships, {clustered} newly clustered")
+        except Exception as e:
+            spider.logger.error(f"Near-duplicate detection disabled: {e}")
+            self.clusters = None
     
     def close_spider(self, spider):
-        """Close database connection and flush buffer"""
-        # Insert remaining items
-        if self.items_buffer:
-            self._insert_batch(spider)
+        """Flush the buffer, wait for in-flight writes, log the run and close"""
+        if self.threadpool is None:
+            return None
+        if self.flusher and self.flusher.running:
+            self.flusher.stop()
         
-        # Log scraper run
+        d = self._flush(spider) if self.items_buffer else defer.succeed(None)
+        d.addCallback(lambda _: defer.DeferredList(list(self.pending)))
+        d.addCallback(lambda _: self._in_thread(self._finish, spider))
+        d.addBoth(self._closed, spider)
+        return d
+    
+    def _finish(self, spider):
+        # Before logging: a new scraper_logs row tells readers the data is final
+        self._refresh_stats(spider)
         self._log_scraper_run(spider)
-        
-        if self.db_cursor:
-            self.db_cursor.close()
-        if self.db_connection:
-            self.db_connection.close()
-        
+        if self.db:
+            release_database()
+            self.db = None
+    
+    def _closed(self, result, spider):
+        self._stop_workers()
         spider.logger.info(
             f"Scraper completed: {self.stats['inserted']} inserted, "
-            f"{self.stats['duplicates']} duplicates, {self.stats['errors']} errors"
+            f"{self.stats['updated']} updated, {self.stats['unchanged']} unchanged, "
+            f"{self.stats['errors']} errors, {self.near_duplicates} near-duplicates"
         )
+        dates = deadline_parser.stats()
+        spider.logger.info(
+            f"Deadline parser: {dates['cache_hit_rate']:.0%} cache hits, "
+            f"{dates['format_hit_rate']:.0%} learned-format hits, {dates['failures']} unparsed"
+        )
+        return result
+    
+    def _stop_workers(self):
+        if self.flusher and self.flusher.running:
+            self.flusher.stop()
+        if self.threadpool:
+            self.threadpool.stop()
+            self.threadpool = None
     
     def process_item(self, item, spider):
-        """Process each scholarship item"""
+        """
+        Buffer each scholarship item
+        
+        Returns a Deferred when a batch is flushed; it fires as soon as
+        the batch has a write slot, not when the write completes.
+        """
         if isinstance(item, ScholarshipItem):
+            if not self.items_buffer:
+                self.buffer_started = time.monotonic()
             self.items_buffer.append(dict(item))
             
             if len(self.items_buffer) >= self.buffer_size:
-                self._insert_batch(spider)
+                return self._flush(spider).addCallback(lambda _: item)
         
         return item
     
-    def _insert_batch(self, spider):
-        """Insert buffered items with duplicate checking"""
-        if not self.items_buffer:
-            return
-        
+    def _flush_if_stale(self, spider):
+        """Flush a partial batch whose oldest item has waited long enough"""
+        if self.items_buffer and time.monotonic() - self.buffer_started >= self.flush_seconds:
+            self._flush(spider)
+    
+    def _flush(self, spider):
+        """Hand the buffer to a writer thread once an in-flight slot is free"""
+        batch, self.items_buffer = self.items_buffer, []
+        self.buffer_started = None
+        d = self.slots.acquire()
+        d.addCallback(lambda _: self._start_write(batch, spider))
+        return d
+    
+    def _start_write(self, batch, spider):
+        started = time.monotonic()
+        write = self._in_thread(self._insert_batch, batch, spider)
+        write.addCallbacks(
+            self._batch_written, self._batch_failed,
+            callbackArgs=(batch, started, spider), errbackArgs=(batch, spider)
+        )
+        write.addBoth(self._write_done, write)
+        self.pending.add(write)
+    
+    def _write_done(self, result, write):
+        self.pending.discard(write)
+        self.slots.release()
+        return result
+    
+    def _insert_batch(self, batch, spider):
+        """Insert a batch with duplicate checking (runs in a writer thread)"""
+        rows = [
+            scholarship_row(dict(
+                item, deadline=parse_deadline(item.get('deadline'), item.get('source_name'))
+            ))
+            for item in batch
+        ]
+        result = self.db.upsert(rows, self.write_mode)
+        return rows, result, self._cluster(result.inserted_ids, spider)
+    
+    def _cluster(self, scholarship_ids, spider):
+        """
+        Map newly inserted scholarships to their canonical ones (runs in
+        a writer thread); returns how many are near-duplicates
+        """
+        if self.clusters is None or not scholarship_ids:
+            return 0
         try:
-            # Prepare data for insert with ON CONFLICT handling
-            query = """
-                INSERT INTO scholarships 
-                (name, description, provider, eligibility, amount, currency, 
-                 deadline, application_link, country, degree_level, subject, 
-                 source_url, source_name, updated_at)
-                VALUES %s
-                ON CONFLICT (name, provider, deadline) 
-                DO UPDATE SET
-                    description = EXCLUDED.description,
-                    eligibility = EXCLUDED.eligibility,
-                    amount = EXCLUDED.amount,
-                    application_link = EXCLUDED.application_link,
-                    updated_at = CURRENT_TIMESTAMP
-                RETURNING (xmax = 0) as inserted
-            """
-            
-            values = []
-            for item in self.items_buffer:
-                # Parse deadline
-                deadline = self._parse_deadline(item.get('deadline'))
-                
-                values.append((
-                    item.get('name', '')[:500],
-                    item.get('description', '')[:5000],
-                    item.get('provider', '')[:255],
-                    item.get('eligibility', '')[:2000],
-                    item.get('amount', '')[:255],
-                    item.get('currency', 'USD')[:10],
-                    deadline,
-                    item.get('application_link', ''),
-                    item.get('country', 'International')[:100],
-                    item.get('degree_level', 'Any')[:100],
-                    item.get('subject', 'Any')[:200],
-                    item.get('source_url', ''),
-                    item.get('source_name', 'unknown')[:100]
-                ))
-            
-            execute_values(self.db_cursor, query, values, fetch=True)
-            results = self.db_cursor.fetchall()
-            
-            # Count inserts vs updates
-            for result in results:
-                if result[0]:  # xmax = 0 means new insert
-                    self.stats['inserted'] += 1
-                else:
-                    self.stats['duplicates'] += 1
-            
-            self.db_connection.commit()
-            spider.logger.info(
-                f"Batch inserted: {len(self.items_buffer)} items"
-            )
-            
+            canonical = self.clusters.assign(self.db, scholarship_ids)
         except Exception as e:
-            self.db_connection.rollback()
-            spider.logger.error(f"Error inserting batch: {e}")
-            self.stats['errors'] += len(self.items_buffer)
-        finally:
-            self.items_buffer = []
-    
-    def _parse_deadline(self, deadline_str):
-        """Parse various deadline formats"""
-        if not deadline_str:
-            return None
-        
-        formats = [
-            '%Y-%m-%d',
-            '%d %B %Y',
-            '%B %d, %Y',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-            '%Y-%m-%dT%H:%M:%S',
-            '%d %b %Y',
-            '%b %d, %Y'
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(str(deadline_str).strip(), fmt).date()
-            except ValueError:
-                continue
+            spider.logger.error(f"Error clustering near-duplicates: {e}")
+            return 0
+        return sum(1 for sid, canonical_id in canonical.items() if sid != canonical_id)
+    
+    def _batch_written(self, written, batch, started, spider):
+        rows, result, near_duplicates = written
+        self.stats['inserted'] += result.inserted
+        self.stats['updated'] += result.updated
+        self.stats['unchanged'] += result.unchanged
+        self.stats['coalesced'] += result.coalesced
+        self.stats['errors'] += len(result.failed)
+        self.near_duplicates += near_duplicates
+        for row, error in result.failed:
+            spider.logger.error(f"Dropped scholarship {row[0]!r}: {error}")
         
-        return None
+        rejected = {id(row) for row, _ in result.failed}
+        stored = [item for item, row in zip(batch, rows) if id(row) not in rejected]
+        self._count_sources(result, rows, rejected)
+        self._mark_seen(spider, stored)
+        self._adapt_batch_size(len(batch), time.monotonic() - started)
+        spider.logger.info(f"Batch inserted: {len(batch)} items")
+    
+    def _batch_failed(self, failure, batch, spider):
+        spider.logger.error(f"Error inserting batch: {failure.value}")
+        self.stats['errors'] += len(batch)
+        for item in batch:
+            # Keyed as scholarship_row() stores it, without re-parsing the item
+            self.source_stats[(item.get('source_name') or 'unknown')[:100]]['errors'] += 1
+    
+    def _count_sources(self, result, rows, rejected):
+        """
+        Split a written batch's counts by source_name; rows merged into a
+        later one by coalesce_rows() count as coalesced, not stored
+        """
+        for source_name, (inserted, updated) in (result.by_source or {}).items():
+            self.source_stats[source_name]['inserted'] += inserted
+            self.source_stats[source_name]['updated'] += updated
+        kept = {id(row) for row in coalesce_rows(rows)[0]} if result.coalesced else None
+        for row in rows:
+            if id(row) in rejected:
+                outcome = 'errors'
+            elif kept is not None and id(row) not in kept:
+                outcome = 'coalesced'
+            else:
+                outcome = 'stored'
+            self.source_stats[row[SOURCE_NAME]][outcome] += 1
+    
+    def _adapt_batch_size(self, batch_len, elapsed):
+        """Move the batch size toward what fits in target_write_seconds"""
+        if elapsed <= 0:
+            return
+        ideal = batch_len * self.target_write_seconds / elapsed
+        # Smooth out noise and never more than double or halve at once
+        proposed = (self.buffer_size + ideal) / 2
+        proposed = min(max(proposed, self.buffer_size / 2), self.buffer_size * 2)
+        self.buffer_size = int(min(max(proposed, self.min_batch_size), self.max_batch_size))
+    
+    def _mark_seen(self, spider, batch):
+        """Record the stored batch in the spider's seen index"""
+        seen = getattr(spider, 'seen_index', None)
+        if seen is None:
+            return
+        keys = [item_key(item.get('application_link'), item.get('name'))
+                for item in batch]
+        seen.add(keys, getattr(spider, 'name', None))
     
     def _log_scraper_run(self, spider):
-        """Log scraper execution to database"""
+        """
+        Log scraper execution to database, one row per source
+        
+        Each row carries the requests the spider made to that source, so
+        sources that were crawled but yielded nothing are logged too.
+        """
+        requests = getattr(spider, 'requests_by_source', {})
+        completed_at = datetime.now()
         try:
-            query = """
-                INSERT INTO scraper_logs 
-                (source_name, items_scraped, items_inserted, items_duplicates, 
-                 started_at, completed_at, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            self.db_cursor.execute(query, (
-                spider.name,
-                self.stats['inserted'] + self.stats['duplicates'],
-                self.stats['inserted'],
-                self.stats['duplicates'],
-                datetime.now(),
-                datetime.now(),
-                'completed' if self.stats['errors'] == 0 else 'partial'
-            ))
-            self.db_connection.commit()
+            for source_name in sorted(set(self.source_stats) | set(requests)):
+                counts = self.source_stats.get(source_name, Counter())
+                stats = {
+                    'inserted': counts['inserted'],
+                    'updated': counts['updated'],
+                    'unchanged': counts['stored'] - counts['inserted'] - counts['updated'],
+                    'coalesced': counts['coalesced'],
+                    'errors': counts['errors'],
+                    'requests': requests.get(source_name, 0),
+                }
+                self.db.log_run(source_name, stats, self.started_at, completed_at)
         except Exception as e:
             spider.logger.error(f"Error logging scraper run: {e}")
+    
+    def _refresh_stats(self, spider):
+        """Bring the materialized stats and filter facets up to date"""
+        if not any(counts['inserted'] or counts['updated'] for counts in self.source_stats.values()):
+            return
+        try:
+            self.db.refresh_stats()
+        except Exception as e:
+            spider.logger.error(f"Error refreshing scholarship stats: {e}")
 
 
 class ValidationPipeline:
-    """Pipeline to validate scholarship data"""
+    """
+    Pipeline to validate scholarship data
+    
+    Items are held briefly and validated together: a batch is checked
+    once `batch_size` items are waiting or after `max_wait` seconds.
+    Each item's Deferred fires with the cleaned item, or fails with
+    DropItem carrying that item's rejection reasons.
+    """
+    
+    def __init__(self):
+        self.batch_size = int(os.getenv('SCRAPER_VALIDATION_BATCH', '100'))
+        self.max_wait = float(os.getenv('SCRAPER_VALIDATION_WAIT', '0.2'))
+        self.waiting = []
+        self.timer = None
     
     def process_item(self, item, spider):
-        """Validate item before processing"""
-        if isinstance(item, ScholarshipItem):
-            # Required fields
-            if not item.get('name'):
-                spider.logger.warning("Item rejected: missing name")
-                raise scrapy.exceptions.DropItem("Missing scholarship name")
-            
-            # Clean and normalize data
-            item['name'] = self._clean_text(item.get('name', ''))
-            item['description'] = self._clean_text(item.get('description', ''))
-            item['country'] = self._normalize_country(item.get('country', 'International'))
-            item['degree_level'] = self._normalize_degree(item.get('degree_level', 'Any'))
-            
-        return item
+        """Queue an item for batch validation"""
+        if not isinstance(item, ScholarshipItem):
+            return item
+        
+        d = defer.Deferred()
+        self.waiting.append((item, d))
+        if len(self.waiting) >= self.batch_size:
+            self._validate_waiting(spider)
+        elif self.timer is None:
+            self.timer = reactor.callLater(self.max_wait, self._validate_waiting, spider)
+        return d
     
-    def _clean_text(self, text):
-        """Clean and normalize text"""
-        if not text:
-            return ''
-        return ' '.join(text.split()).strip()
-    
-    def _normalize_country(self, country):
-        """Normalize country names"""
-        country_map = {
-            'us': 'USA',
-            'usa': 'USA',
-            'united states': 'USA',
-            'uk': 'UK',
-            'united kingdom': 'UK',
-            'gb': 'UK',
-            'canada': 'Canada',
-            'ca': 'Canada',
-            'australia': 'Australia',
-            'au': 'Australia',
-            'germany': 'Germany',
-            'de': 'Germany',
-            'france': 'France',
-            'fr': 'France',
-            'international': 'International',
-            'worldwide': 'International',
-            'global': 'International'
-        }
-        return country_map.get(country.lower().strip(), country)
-    
-    def _normalize_degree(self, degree):
-        """Normalize degree levels"""
-        degree_map = {
-            'bachelor': 'Bachelor',
-            'bachelors': 'Bachelor',
-            'undergraduate': 'Bachelor',
-            'undergrad': 'Bachelor',
-            'master': 'Master',
-            'masters': 'Master',
-            'graduate': 'Master',
-            'postgraduate': 'Master',
-            'phd': 'PhD',
-            'doctorate': 'PhD',
-            'doctoral': 'PhD',
-            'any': 'Any',
-            'all': 'Any'
-        }
-        return degree_map.get(degree.lower().strip(), degree)
+    def close_spider(self, spider):
+        if self.waiting:
+            self._validate_waiting(spider)
+    
+    def _validate_waiting(self, spider):
+        """Validate every waiting item in one pass and release them"""
+        if self.timer is not None:
+            if self.timer.active():
+                self.timer.cancel()
+            self.timer = None
+        batch, self.waiting = self.waiting, []
+        
+        records = [normalize(item) for item, _ in batch]
+        for (item, d), record, reasons in zip(batch, records, validate_batch(records)):
+            if reasons:
+                spider.logger.warning(f"Item rejected: {'; '.join(reasons)}")
+                d.errback(DropItem('; '.join(reasons)))
+                continue
+            for field, value in record.items():
+                item[field] = value
+            self._fill_from_text(item)
+            d.callback(item)
+    
+    def _fill_from_text(self, item):
+        """Classify fields the spider left at their default from name and description"""
+        missing = [field for field, default in DEFAULTS.items()
+                   if not item.get(field) or item.get(field) == default]
+        if not missing:
+            return
+        
+        classification = classify(f"{item.get('name', '')} {item.get('description', '')}")
+        for field in missing:
+            item[field] = getattr(classification, field)
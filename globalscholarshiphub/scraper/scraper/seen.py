@@ -0,0 +1,103 @@
+"""
+Persistent index of scholarships that have already been ingested
+
+Keys are the normalized application link, or a hash of the normalized
+name for entries without a link. Crawlers consult the index to stop
+paginating once they only see items they already have, so a daily run
+costs roughly as much as the day's new content.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref)$', re.IGNORECASE)
+
+
+def normalize_url(url):
+    """Canonical form of a URL for de-duplication"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower() or 'https', host, path, query, ''))
+
+
+def item_key(application_link=None, name=None):
+    """Index key for a scholarship: its link if it has one, else its name"""
+    if application_link and application_link.startswith(('http://', 'https://')):
+        return normalize_url(application_link)
+    normalized = ' '.join((name or '').lower().split())
+    return 'name:' + hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class SeenIndex:
+    """SQLite-backed set of item keys, safe to share between threads"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS seen_items (
+            key TEXT PRIMARY KEY,
+            source_name TEXT,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM seen_items WHERE key = ?', (key,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM seen_items').fetchone()[0]
+
+    def add(self, keys, source_name=None):
+        """Record keys as ingested"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO seen_items (key, source_name, first_seen, last_seen) '
+                'VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET last_seen = excluded.last_seen',
+                [(key, source_name, now, now) for key in keys]
+            )
+            self._conn.commit()
+
+    def load_from_db(self, cursor):
+        """Seed the index from the scholarships table; returns the number of rows read"""
+        cursor.execute('SELECT application_link, name, source_name FROM scholarships')
+        count = 0
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            by_source = {}
+            for application_link, name, source_name in rows:
+                by_source.setdefault(source_name, []).append(item_key(application_link, name))
+            for source_name, keys in by_source.items():
+                self.add(keys, source_name)
+            count += len(rows)
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
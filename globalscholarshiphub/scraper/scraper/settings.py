@@ -65,10 +65,43 @@ DEFAULT_REQUEST_HEADERS = {
     'Connection': 'keep-alive',
 }
 
-# Cache
+# Cache: one SQLite file with gzip'd bodies (scraper/httpcache.py), bounded
+# by size and age. RFC2616Policy decides freshness from the response
+# headers and revalidates stale pages with a conditional GET, so entries
+# do not expire in the storage itself. `scrapy httpcache export|import`
+# saves and restores the file between CI runs.
 HTTPCACHE_ENABLED = True
-HTTPCACHE_EXPIRATION_SECS = 86400  # 24 hours
+HTTPCACHE_STORAGE = 'scraper.httpcache.SqliteCacheStorage'
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.RFC2616Policy'
+HTTPCACHE_EXPIRATION_SECS = 0
 HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_SQLITE_PATH = os.getenv('SCRAPER_HTTPCACHE_PATH', '')  # default: <HTTPCACHE_DIR>/responses.sqlite
+HTTPCACHE_SQLITE_MAX_MB = float(os.getenv('SCRAPER_HTTPCACHE_MAX_MB', '256'))
+HTTPCACHE_SQLITE_MAX_AGE_DAYS = float(os.getenv('SCRAPER_HTTPCACHE_MAX_AGE_DAYS', '14'))
+
+COMMANDS_MODULE = 'scraper.commands'
+
+# Seen-item index: pagination stops after this many already-stored items
+# in a row (set SCRAPER_SEEN_PATH='' to disable). Same variables as the
+# standalone scraper, so both share one index
+SEEN_INDEX_PATH = os.getenv('SCRAPER_SEEN_PATH', '.scraper_cache/seen.sqlite')
+SEEN_STOP_AFTER_KNOWN = int(os.getenv('SCRAPER_STOP_AFTER_KNOWN', '10'))
+
+# Crawl budget (see scraper/budget.py): request slots, delay and pagination
+# depth per source, from each source's new items per request in scraper_logs.
+# The concurrency and delay bounds are tightened to a spider's own
+# CONCURRENT_REQUESTS_PER_DOMAIN and DOWNLOAD_DELAY, never loosened.
+CRAWL_BUDGET_ENABLED = os.getenv('SCRAPER_CRAWL_BUDGET', '1') == '1'
+CRAWL_BUDGET_HISTORY_DAYS = int(os.getenv('SCRAPER_BUDGET_HISTORY_DAYS', '30'))
+CRAWL_BUDGET_MAX_CONCURRENCY = 2
+CRAWL_BUDGET_MIN_DELAY = 2.0
+CRAWL_BUDGET_MAX_DELAY = 3.0
+CRAWL_BUDGET_MIN_PAGES = 2
+CRAWL_BUDGET_MAX_PAGES = 20
+
+# Stop crawling after this many seconds (0 = no limit); items already
+# scraped are still written and the run is logged
+CLOSESPIDER_TIMEOUT = int(os.getenv('SCRAPER_MAX_RUNTIME', '0'))
 
 # Database settings (loaded from environment)
 DB_HOST = os.getenv('DB_HOST', 'localhost')
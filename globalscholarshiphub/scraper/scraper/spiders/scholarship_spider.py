@@ -1,18 +1,136 @@
 """
 Main Scholarship Spider - Crawls multiple scholarship sources
 """
+import functools
+import time
+
 import scrapy
 from scrapy.http import Request
-from bs4 import BeautifulSoup
-from datetime import datetime
-import re
+from ..budget import BudgetedSpider
 from ..items import ScholarshipItem
+from ..parsing import CardPlan, FieldPlan, compile_css
+from ..seen import SeenIndex, item_key
+
 
+# Matches what response.css() selects: the root and its descendants
+ROOT = 'descendant-or-self::'
 
-class ScholarshipSpider(scrapy.Spider):
+
+class ListingPlan:
+    """
+    Selectors for one listing site, compiled once at import.
+
+    `fields` maps item fields to CSS alternatives in priority order;
+    `links` are read as hrefs, everything else as the first non-blank
+    text. Each card is read in a single walk (see CardPlan). Missing
+    values fall back to `defaults`.
+    """
+
+    def __init__(self, container, fields, links=None, defaults=None):
+        self.containers = compile_css(container, prefix=ROOT)
+        self.card = CardPlan(dict(fields, **(links or {})), links=tuple(links or ()))
+        self.defaults = defaults or {}
+
+    def extract(self, root):
+        """Yield a field dict for every container under `root`"""
+        for container in self.containers(root):
+            values = self.card(container)
+            for field, default in self.defaults.items():
+                values[field] = values.get(field) or default
+            yield values
+
+
+SCHOLARSHIPS_COM = ListingPlan(
+    'div.scholarship-item, .scholarship-listing',
+    fields={
+        'name': 'h2, .scholarship-title, .title',
+        'provider': '.provider, .sponsor, .organization',
+        'amount': '.amount, .award, .value',
+        'deadline': '.deadline, .date',
+        'description': '.description, .summary, p',
+        'eligibility': '.eligibility, .requirements',
+        'country': '.location, .country',
+        'degree_level': '.degree, .level',
+        'subject': '.subject, .field, .major',
+    },
+    links={'application_link': 'a.apply, a.details, a'},
+    defaults={'country': 'International', 'degree_level': 'Any', 'subject': 'Any'},
+)
+SCHOLARSHIPS_COM_NEXT = FieldPlan('a.next, .pagination a:last-child', 'href')
+
+FASTWEB = ListingPlan(
+    '.scholarship-card, .result-item',
+    fields={
+        'name': 'h3, .scholarship-name',
+        'provider': '.provider-name',
+        'amount': '.award-amount',
+        'deadline': '.deadline-date',
+        'description': '.description',
+        'eligibility': '.eligibility-criteria',
+        'degree_level': '.education-level',
+    },
+    links={'application_link': 'a'},
+    defaults={'degree_level': 'Any'},
+)
+
+INTERNATIONAL = ListingPlan(
+    '.scholarship-entry, article',
+    fields={
+        'name': 'h2, h3, .entry-title',
+        'provider': '.institution, .university',
+        'amount': '.funding, .award',
+        'deadline': '.deadline, .closing-date',
+        'description': '.excerpt, .content',
+        'eligibility': '.requirements, .criteria',
+        'country': '.country, .destination',
+        'degree_level': '.study-level',
+        'subject': '.subject-area',
+    },
+    links={'application_link': 'a.more, a.apply'},
+    defaults={'country': 'International', 'degree_level': 'Any', 'subject': 'Any'},
+)
+
+# Unknown sites: the first container pattern that matches anything wins
+GENERIC_CONTAINERS = [
+    compile_css(css, prefix=ROOT) for css in
+    ('article', '.scholarship', '.scholarship-item', '[class*="scholarship"]', '[class*="award"]')
+]
+GENERIC_FIELDS = {
+    'name': FieldPlan('h2, h3, .title', 'string', prefix='descendant::'),
+    'provider': FieldPlan('.provider, .sponsor', 'string', prefix='descendant::'),
+    'amount': FieldPlan('.amount, .award', 'string', prefix='descendant::'),
+    'deadline': FieldPlan('.deadline, .date', 'string', prefix='descendant::'),
+    'description': FieldPlan('.description, p', 'string', prefix='descendant::'),
+}
+
+
+def timed_parse(parse):
+    """
+    Run a parse callback to completion and record how long it took.
+
+    The results are collected before they are returned, so the time
+    covers selecting and extracting only, not the pipelines.
+    """
+    @functools.wraps(parse)
+    def wrapper(self, response):
+        started = time.perf_counter()
+        results = list(parse(self, response))
+        self._record_parse_time(time.perf_counter() - started)
+        return results
+    return wrapper
+
+
+class ScholarshipSpider(BudgetedSpider, scrapy.Spider):
     """
     Multi-source scholarship spider
     Crawls various scholarship directories and aggregates results
+    
+    Field selectors are compiled once at import (see ListingPlan) and
+    evaluated on the lxml tree Scrapy already built for the response.
+    Request slots, delays and pagination depth per site come from the
+    crawl budget (see scraper.budget), which never goes past the
+    politeness limits in custom_settings. Parse time per response is kept
+    in the crawl stats under parse/*.
     """
     name = 'scholarship_spider'
     
@@ -36,18 +154,41 @@ class ScholarshipSpider(scrapy.Spider):
             'fastweb.com': self.parse_fastweb,
             'internationalscholarships.com': self.parse_international,
         }
+        self.seen_index = None
+        self.stop_after_known = 10
+    
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        seen_path = crawler.settings.get('SEEN_INDEX_PATH')
+        if seen_path:
+            spider.seen_index = SeenIndex(seen_path)
+        spider.stop_after_known = crawler.settings.getint('SEEN_STOP_AFTER_KNOWN', 10)
+        return spider
+    
+    def closed(self, reason):
+        if self.seen_index is not None:
+            self.seen_index.close()
+        stats = self._stats()
+        responses = stats.get_value('parse/responses', 0) if stats else 0
+        if responses:
+            average = stats.get_value('parse/seconds', 0) / responses
+            self.logger.info(
+                f"Parsed {responses} responses, {average * 1000:.2f} ms on average, "
+                f"{stats.get_value('parse/max_seconds', 0) * 1000:.2f} ms at most"
+            )
     
     def start_requests(self):
         """Start requests with custom headers"""
         for url in self.start_urls:
-            yield Request(
+            yield self.budgeted(Request(
                 url=url,
                 callback=self.parse,
                 headers={
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
                 },
                 meta={'source': url}
-            )
+            ))
     
     def parse(self, response):
         """Route to appropriate parser based on domain"""
@@ -59,137 +200,114 @@ class ScholarshipSpider(scrapy.Spider):
             # Generic parser for unknown sources
             yield from self.parse_generic(response)
     
+    @timed_parse
     def parse_scholarships_com(self, response):
-        """Parse scholarships.com format"""
-        scholarships = response.css('div.scholarship-item, .scholarship-listing')
+        """
+        Parse scholarships.com format
         
-        for scholarship in scholarships:
-            item = ScholarshipItem()
-            item['name'] = self._extract_text(scholarship, 'h2, .scholarship-title, .title')
-            item['provider'] = self._extract_text(scholarship, '.provider, .sponsor, .organization')
-            item['amount'] = self._extract_text(scholarship, '.amount, .award, .value')
-            item['deadline'] = self._extract_text(scholarship, '.deadline, .date')
-            item['description'] = self._extract_text(scholarship, '.description, .summary, p')
-            item['eligibility'] = self._extract_text(scholarship, '.eligibility, .requirements')
-            item['application_link'] = self._extract_link(scholarship, 'a.apply, a.details, a::attr(href)')
-            item['country'] = self._extract_text(scholarship, '.location, .country') or 'International'
-            item['degree_level'] = self._extract_text(scholarship, '.degree, .level') or 'Any'
-            item['subject'] = self._extract_text(scholarship, '.subject, .field, .major') or 'Any'
-            item['source_url'] = response.url
-            item['source_name'] = 'scholarships.com'
-            
+        Pagination is only followed while pages keep turning up items the
+        seen index does not know, and no deeper than the source's crawl
+        budget; the count of known items in a row and the page number are
+        carried across pages in the request meta.
+        """
+        root = response.selector.root
+        known_run = response.meta.get('known_run', 0)
+        
+        for values in SCHOLARSHIPS_COM.extract(root):
+            item = self._item(values, response, 'scholarships.com')
             if item['name']:
+                if self._is_known(item):
+                    known_run += 1
+                else:
+                    known_run = 0
                 yield item
         
+        if self.seen_index is not None and known_run >= self.stop_after_known:
+            self.logger.info(f"Stopping pagination at {response.url}: {known_run} known items in a row")
+            return
+        
+        if not self.next_page_allowed(response):
+            return
+        
         # Follow pagination
-        next_page = response.css('a.next::attr(href), .pagination a:last-child::attr(href)').get()
+        next_page = SCHOLARSHIPS_COM_NEXT(root)
         if next_page:
-            yield response.follow(next_page, callback=self.parse_scholarships_com)
+            yield response.follow(next_page, callback=self.parse_scholarships_com,
+                                  meta={'known_run': known_run,
+                                        'page': response.meta.get('page', 1) + 1})
     
+    @timed_parse
     def parse_fastweb(self, response):
         """Parse fastweb.com format"""
-        scholarships = response.css('.scholarship-card, .result-item')
-        
-        for scholarship in scholarships:
-            item = ScholarshipItem()
-            item['name'] = self._extract_text(scholarship, 'h3, .scholarship-name')
-            item['provider'] = self._extract_text(scholarship, '.provider-name')
-            item['amount'] = self._extract_text(scholarship, '.award-amount')
-            item['deadline'] = self._extract_text(scholarship, '.deadline-date')
-            item['description'] = self._extract_text(scholarship, '.description')
-            item['eligibility'] = self._extract_text(scholarship, '.eligibility-criteria')
-            item['application_link'] = response.urljoin(
-                scholarship.css('a::attr(href)').get('')
-            )
+        for values in FASTWEB.extract(response.selector.root):
+            item = self._item(values, response, 'fastweb.com')
             item['country'] = 'USA'  # Fastweb is US-focused
-            item['degree_level'] = self._extract_text(scholarship, '.education-level') or 'Any'
             item['subject'] = 'Any'
-            item['source_url'] = response.url
-            item['source_name'] = 'fastweb.com'
-            
             if item['name']:
                 yield item
     
+    @timed_parse
     def parse_international(self, response):
         """Parse internationalscholarships.com format"""
-        scholarships = response.css('.scholarship-entry, article')
-        
-        for scholarship in scholarships:
-            item = ScholarshipItem()
-            item['name'] = self._extract_text(scholarship, 'h2, h3, .entry-title')
-            item['provider'] = self._extract_text(scholarship, '.institution, .university')
-            item['amount'] = self._extract_text(scholarship, '.funding, .award')
-            item['deadline'] = self._extract_text(scholarship, '.deadline, .closing-date')
-            item['description'] = self._extract_text(scholarship, '.excerpt, .content')
-            item['eligibility'] = self._extract_text(scholarship, '.requirements, .criteria')
-            item['application_link'] = self._extract_link(scholarship, 'a.more, a.apply')
-            item['country'] = self._extract_text(scholarship, '.country, .destination') or 'International'
-            item['degree_level'] = self._extract_text(scholarship, '.study-level') or 'Any'
-            item['subject'] = self._extract_text(scholarship, '.subject-area') or 'Any'
-            item['source_url'] = response.url
-            item['source_name'] = 'internationalscholarships.com'
-            
+        for values in INTERNATIONAL.extract(response.selector.root):
+            item = self._item(values, response, 'internationalscholarships.com')
             if item['name']:
                 yield item
     
+    @timed_parse
     def parse_generic(self, response):
         """Generic parser for unknown scholarship sites"""
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # Look for common scholarship patterns
-        selectors = [
-            'article', '.scholarship', '.scholarship-item',
-            '[class*="scholarship"]', '[class*="award"]'
-        ]
+        root = response.selector.root
         
-        for selector in selectors:
-            elements = soup.select(selector)
+        for containers in GENERIC_CONTAINERS:
+            elements = containers(root)
             if elements:
                 for elem in elements[:10]:  # Limit to first 10
                     item = ScholarshipItem()
-                    item['name'] = self._extract_from_soup(elem, ['h2', 'h3', '.title'])
-                    item['provider'] = self._extract_from_soup(elem, ['.provider', '.sponsor'])
-                    item['amount'] = self._extract_from_soup(elem, ['.amount', '.award'])
-                    item['deadline'] = self._extract_from_soup(elem, ['.deadline', '.date'])
-                    item['description'] = self._extract_from_soup(elem, ['.description', 'p'])[:500]
+                    for field, plan in GENERIC_FIELDS.items():
+                        item[field] = plan(elem)
+                    item['description'] = item['description'][:500]
                     item['eligibility'] = ''
                     item['application_link'] = response.url
                     item['country'] = 'International'
                     item['degree_level'] = 'Any'
                     item['subject'] = 'Any'
                     item['source_url'] = response.url
-                    item['source_name'] = response.url.split('/')[2]
+                    item['source_name'] = self.source_for(response.url)
                     
                     if item['name'] and len(item['name']) > 10:
                         yield item
                 break
     
-    def _extract_text(self, selector, css_selectors):
-        """Extract text using multiple CSS selectors"""
-        for css in css_selectors.split(', '):
-            text = selector.css(f'{css}::text').get('').strip()
-            if text:
-                return text
-        return ''
+    def _item(self, values, response, source_name):
+        """Build an item from extracted field values"""
+        item = ScholarshipItem(**values)
+        link = item.get('application_link')
+        item['application_link'] = response.urljoin(link) if link else ''
+        item['source_url'] = response.url
+        item['source_name'] = source_name
+        return item
+    
+    def _is_known(self, item):
+        """Whether an item is already in the seen index"""
+        if self.seen_index is None:
+            return False
+        return item_key(item.get('application_link'), item.get('name')) in self.seen_index
     
-    def _extract_link(self, selector, css_selectors):
-        """Extract link using multiple CSS selectors"""
-        for css in css_selectors.split(', '):
-            href = selector.css(css).get('')
-            if href:
-                return href
-        return ''
+    def _stats(self):
+        crawler = getattr(self, 'crawler', None)
+        return crawler.stats if crawler is not None else None
     
-    def _extract_from_soup(self, element, tags):
-        """Extract text from BeautifulSoup element"""
-        for tag in tags:
-            found = element.find(tag)
-            if found:
-                return found.get_text().strip()
-        return ''
+    def _record_parse_time(self, elapsed):
+        stats = self._stats()
+        if stats is None:
+            return
+        stats.inc_value('parse/responses')
+        stats.inc_value('parse/seconds', elapsed)
+        stats.max_value('parse/max_seconds', elapsed)
 
 
-class ScholarshipPortalSpider(scrapy.Spider):
+class ScholarshipPortalSpider(BudgetedSpider, scrapy.Spider):
     """
     Spider for scholarshipportal.com
     """
@@ -225,16 +343,23 @@ class ScholarshipPortalSpider(scrapy.Spider):
         
         # Pagination
         next_page = response.css('a.next::attr(href)').get()
-        if next_page:
-            yield response.follow(next_page, self.parse)
+        if next_page and self.next_page_allowed(response):
+            yield response.follow(next_page, self.parse,
+                                  meta={'page': response.meta.get('page', 1) + 1})
 
 
-class GovernmentScholarshipSpider(scrapy.Spider):
+class GovernmentScholarshipSpider(BudgetedSpider, scrapy.Spider):
     """
     Spider for government scholarship programs
     """
     name = 'government_scholarships'
     
+    # Items from every site are stored as 'government'
+    source_names = {
+        'educationusa.state.gov': 'government',
+        'britishcouncil.org': 'government',
+    }
+    
     start_urls = [
         'https://educationusa.state.gov/opportunity/scholarships',
         'https://www.britishcouncil.org/study-uk/scholarships',
@@ -0,0 +1,123 @@
+"""
+Batch validation and normalization for scraped scholarships
+
+Items are normalized with module-level lookup tables and then validated
+as a whole list by one pydantic TypeAdapter call, so the per-item cost
+is a loop inside pydantic-core rather than a model construction in
+Python. Every item gets its own list of rejection reasons.
+"""
+from types import MappingProxyType
+
+from pydantic import TypeAdapter, ValidationError
+
+from .items import ScholarshipPydantic
+
+
+COUNTRY_ALIASES = MappingProxyType({
+    'us': 'USA',
+    'usa': 'USA',
+    'united states': 'USA',
+    'uk': 'UK',
+    'united kingdom': 'UK',
+    'gb': 'UK',
+    'canada': 'Canada',
+    'ca': 'Canada',
+    'australia': 'Australia',
+    'au': 'Australia',
+    'germany': 'Germany',
+    'de': 'Germany',
+    'france': 'France',
+    'fr': 'France',
+    'international': 'International',
+    'worldwide': 'International',
+    'global': 'International',
+})
+
+DEGREE_ALIASES = MappingProxyType({
+    'bachelor': 'Bachelor',
+    'bachelors': 'Bachelor',
+    'undergraduate': 'Bachelor',
+    'undergrad': 'Bachelor',
+    'master': 'Master',
+    'masters': 'Master',
+    'graduate': 'Master',
+    'postgraduate': 'Master',
+    'phd': 'PhD',
+    'doctorate': 'PhD',
+    'doctoral': 'PhD',
+    'any': 'Any',
+    'all': 'Any',
+})
+
+# The database writer truncates these anyway, so an over-long value is
+# cut to fit rather than costing the whole item
+TRUNCATE_TO = MappingProxyType({
+    name: next(m.max_length for m in field.metadata if hasattr(m, 'max_length'))
+    for name, field in ScholarshipPydantic.model_fields.items()
+    if any(hasattr(m, 'max_length') for m in field.metadata)
+})
+
+REQUIRED_FIELDS = frozenset(
+    name for name, field in ScholarshipPydantic.model_fields.items() if field.is_required()
+)
+
+SCHOLARSHIP_LIST = TypeAdapter(list[ScholarshipPydantic])
+
+
+def clean_text(text):
+    """Collapse runs of whitespace"""
+    if not text:
+        return ''
+    return ' '.join(text.split())
+
+
+def normalize_country(country):
+    return COUNTRY_ALIASES.get(country.lower().strip(), country)
+
+
+def normalize_degree(degree):
+    return DEGREE_ALIASES.get(degree.lower().strip(), degree)
+
+
+def normalize(record):
+    """Return a cleaned copy of a scraped record, ready for validation"""
+    record = dict(record)
+    # A blank name is as good as none, and is rejected as missing
+    record['name'] = clean_text(record.get('name')) or None
+    record['description'] = clean_text(record.get('description'))
+    record['country'] = normalize_country(record.get('country') or 'International')
+    record['degree_level'] = normalize_degree(record.get('degree_level') or 'Any')
+    for field, limit in TRUNCATE_TO.items():
+        value = record.get(field)
+        if isinstance(value, str) and len(value) > limit:
+            record[field] = value[:limit]
+    return record
+
+
+def validate_batch(records):
+    """
+    Validate normalized records in one pass.
+
+    Returns a list parallel to `records`: an empty tuple for a valid
+    record, otherwise the reasons it was rejected.
+    """
+    try:
+        SCHOLARSHIP_LIST.validate_python(records)
+    except ValidationError as e:
+        reasons = [[] for _ in records]
+        for error in e.errors(include_url=False):
+            index, *field = error['loc']
+            where = '.'.join(str(part) for part in field) or 'item'
+            if _is_missing(error, field):
+                reasons[index].append(f"{where} is required")
+            else:
+                reasons[index].append(f"{where}: {error['msg']}")
+        return [tuple(r) for r in reasons]
+    return [()] * len(records)
+
+
+def _is_missing(error, field):
+    """Whether `error` is about a required field left out or blank"""
+    if error['type'] == 'missing':
+        return True
+    return len(field) == 1 and field[0] in REQUIRED_FIELDS and error.get('input') is None
@@ -1,19 +1,29 @@
 """
-Standalone Scholarship Scraper (BeautifulSoup version)
+Standalone Scholarship Scraper (requests + lxml version)
 Can be run independently without Scrapy for simple use cases
 """
 import requests
-from bs4 import BeautifulSoup
-import psycopg2
-from psycopg2.extras import execute_values
+from requests.adapters import HTTPAdapter
 from datetime import datetime, date
 import os
-import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from urllib.parse import urljoin, urlparse
 from dotenv import load_dotenv
 import logging
 
+from scraper import extraction
+from scraper.bulkload import WRITE_MODES
+from scraper.classifier import classify
+from scraper.db import acquire_database, release_database, scholarship_row
+from scraper.dedup import ClusterIndex
+from scraper.enrichment import DetailEnricher
+from scraper.httpcache import NotModified, ResponseCache
+from scraper.parsing import load_sources
+from scraper.seen import SeenIndex, item_key
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,17 +33,54 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Listing pages keep only this much of each entry's text
+DESCRIPTION_LIMIT = 500
+
+# Declarative source definitions (see scraper.parsing.SourceDefinition)
+SOURCES_PATH = os.getenv(
+    'SCRAPER_SOURCES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json')
+)
+
 
 class ScholarshipScraper:
     """
-    Standalone scholarship scraper using BeautifulSoup
+    Standalone scholarship scraper using requests and lxml
     Designed for GitHub Actions automation
     """
     
-    def __init__(self):
-        self.db_connection = None
-        self.db_cursor = None
+    def __init__(self, max_workers=None, per_host_limit=None, enrich_details=None, write_mode=None):
+        self.db = None
+        self.started_at = None
+        
+        # 'values' upserts each batch with one prepared statement; 'copy'
+        # streams it through a staging table, which is faster for backfills
+        self.write_mode = write_mode or os.getenv('SCRAPER_WRITE_MODE', 'values')
+        if self.write_mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode {self.write_mode!r}, expected one of {WRITE_MODES}")
+        
+        # Concurrency: sources are fetched and parsed in a bounded thread
+        # pool, with at most `per_host_limit` requests in flight per host
+        self.max_workers = max_workers or int(os.getenv('SCRAPER_MAX_WORKERS', '8'))
+        self.per_host_limit = per_host_limit or int(os.getenv('SCRAPER_PER_HOST_LIMIT', '2'))
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Listing pages fetched per source, cached only once the source's
+        # scholarships are stored so a failed run is not skipped next time
+        self._pending_pages = {}
+        
+        # Optional detail-page enrichment, with its own global worker limit
+        # and a per-host token bucket (requests per second)
+        if enrich_details is None:
+            enrich_details = os.getenv('SCRAPER_ENRICH_DETAILS', '').lower() in ('1', 'true', 'yes')
+        self.detail_workers = int(os.getenv('SCRAPER_DETAIL_WORKERS', '16')) if enrich_details else 0
+        
         self.session = requests.Session()
+        pool_size = self.max_workers + self.detail_workers
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -41,38 +88,51 @@ class ScholarshipScraper:
         })
         self.stats = {
             'inserted': 0,
-            'duplicates': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'coalesced': 0,
             'errors': 0,
-            'sources_processed': 0
+            'sources_processed': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_not_modified': 0,
+            'details_enriched': 0,
+            'pages_fetched': 0,
+            'known_items': 0,
+            'near_duplicates': 0
         }
         
-        # Scholarship sources configuration
-        self.sources = {
-            'scholarship_positions': {
-                'url': 'https://scholarship-positions.com/',
-                'parser': self.parse_scholarship_positions,
-            },
-            'opportunities_corners': {
-                'url': 'https://opportunitiescorners.com/',
-                'parser': self.parse_opportunities_corners,
-            },
-            'scholarship_roar': {
-                'url': 'https://scholarshiproar.com/',
-                'parser': self.parse_scholarship_roar,
-            }
-        }
+        # Conditional-GET response cache (set SCRAPER_CACHE_PATH='' to disable)
+        cache_path = os.getenv('SCRAPER_CACHE_PATH', '.scraper_cache/http.sqlite')
+        cache_max_bytes = int(os.getenv('SCRAPER_CACHE_MAX_MB', '64')) * 1024 * 1024
+        self.cache = ResponseCache(cache_path, cache_max_bytes) if cache_path else None
+        
+        # Index of already-ingested items; pagination stops after
+        # `stop_after_known` known entries in a row (SCRAPER_SEEN_PATH=''
+        # disables it and always reads up to each source's max_pages)
+        seen_path = os.getenv('SCRAPER_SEEN_PATH', '.scraper_cache/seen.sqlite')
+        self.seen = SeenIndex(seen_path) if seen_path else None
+        self.stop_after_known = int(os.getenv('SCRAPER_STOP_AFTER_KNOWN', '10'))
+        
+        # Near-duplicate clustering of inserted scholarships (SCRAPER_DEDUP=0 disables)
+        self.clusters = ClusterIndex() if os.getenv('SCRAPER_DEDUP', '1') == '1' else None
+        
+        # Scholarship sources, compiled once into selector plans
+        self.sources = load_sources(SOURCES_PATH)
+        
+        self.enricher = None
+        if enrich_details:
+            self.enricher = DetailEnricher(
+                self.fetch_page,
+                max_workers=self.detail_workers,
+                rate=float(os.getenv('SCRAPER_DETAIL_RATE', '1.0')),
+                burst=int(os.getenv('SCRAPER_DETAIL_BURST', '2')),
+            )
     
     def connect_db(self):
-        """Connect to PostgreSQL database"""
+        """Connect to PostgreSQL through the shared connection pool"""
         try:
-            self.db_connection = psycopg2.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                port=os.getenv('DB_PORT', '5432'),
-                database=os.getenv('DB_NAME', 'scholarships'),
-                user=os.getenv('DB_USER', 'postgres'),
-                password=os.getenv('DB_PASSWORD', 'password')
-            )
-            self.db_cursor = self.db_connection.cursor()
+            self.db = acquire_database()
             logger.info("Database connected successfully")
             return True
         except Exception as e:
@@ -80,370 +140,396 @@ class ScholarshipScraper:
             return False
     
     def close_db(self):
-        """Close database connection"""
-        if self.db_cursor:
-            self.db_cursor.close()
-        if self.db_connection:
-            self.db_connection.close()
+        """Return the shared connection pool"""
+        if self.db:
+            release_database()
+            self.db = None
         logger.info("Database connection closed")
     
     def run(self):
         """Main execution method"""
         logger.info("Starting scholarship scraper...")
+        self.started_at = datetime.now()
         
         if not self.connect_db():
             return False
         
         try:
-            for source_name, source_config in self.sources.items():
-                logger.info(f"Processing source: {source_name}")
-                try:
-                    scholarships = source_config['parser'](source_config['url'])
-                    self.insert_scholarships(scholarships, source_name)
-                    self.stats['sources_processed'] += 1
-                except Exception as e:
-                    logger.error(f"Error processing {source_name}: {e}")
-                    self.stats['errors'] += 1
+            self.seed_seen_index()
+            self.load_clusters()
+            if self.max_workers > 1:
+                self.process_sources_concurrently()
+            else:
+                for source_name, source in self.sources.items():
+                    self.process_source(source_name, source)
             
+            # Before logging: a new scraper_logs row tells readers the data is final
+            self.refresh_stats()
             self.log_run()
             logger.info(
                 f"Scraper completed: {self.stats['inserted']} inserted, "
-                f"{self.stats['duplicates']} duplicates, {self.stats['errors']} errors"
+                f"{self.stats['updated']} updated, {self.stats['unchanged']} unchanged, "
+                f"{self.stats['errors']} errors"
             )
             return True
             
         finally:
             self.close_db()
+            if self.enricher:
+                self.enricher.close()
+            if self.cache:
+                self.cache.close()
+            if self.seen:
+                self.seen.close()
     
-    def fetch_page(self, url):
-        """Fetch and parse a webpage"""
+    def seed_seen_index(self):
+        """Fill an empty seen index from the scholarships already in the database"""
+        if self.seen is None or len(self.seen):
+            return
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'lxml')
+            count = self.db.seed_seen_index(self.seen)
+            logger.info(f"Seen index seeded with {count} stored scholarships")
         except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+            logger.error(f"Error seeding seen index: {e}")
     
-    def parse_scholarship_positions(self, url):
-        """Parse scholarship-positions.com"""
-        scholarships = []
-        soup = self.fetch_page(url)
-        if not soup:
-            return scholarships
-        
-        articles = soup.find_all('article', class_='post')[:20]
+    def process_source(self, source_name, source):
+        """Fetch, parse and store a single source"""
+        logger.info(f"Processing source: {source_name}")
+        try:
+            scholarships = self.parse_source(source)
+            self.insert_scholarships(scholarships, source_name)
+            self.increment_stat('sources_processed')
+        except NotModified:
+            logger.info(f"{source_name} unchanged since last run, skipping")
+            self.increment_stat('sources_processed')
+        except Exception as e:
+            logger.error(f"Error processing {source_name}: {e}")
+            self.discard_pages(source_name)
+            self.increment_stat('errors')
+    
+    def process_sources_concurrently(self):
+        """
+        Fetch and parse all sources in parallel.
         
-        for article in articles:
-            try:
-                title_elem = article.find('h2', class_='entry-title')
-                if not title_elem:
-                    continue
-                
-                name = title_elem.get_text().strip()
-                link_elem = title_elem.find('a')
-                app_link = link_elem['href'] if link_elem else ''
-                
-                # Extract details from article
-                content = article.find('div', class_='entry-content')
-                description = content.get_text().strip()[:500] if content else ''
-                
-                # Try to extract deadline
-                deadline = self.extract_deadline(description)
-                
-                # Try to extract amount
-                amount = self.extract_amount(description)
-                
-                scholarships.append({
-                    'name': name,
-                    'description': description,
-                    'provider': '',
-                    'eligibility': '',
-                    'amount': amount,
-                    'currency': 'USD',
-                    'deadline': deadline,
-                    'application_link': app_link,
-                    'country': 'International',
-                    'degree_level': self.detect_degree_level(name + description),
-                    'subject': self.detect_subject(name + description),
-                    'source_url': url,
-                    'source_name': 'scholarship-positions.com'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing article: {e}")
+        Network and parsing run in worker threads; the parsed batches are
+        then written together from the calling thread.
+        """
+        workers = min(self.max_workers, len(self.sources)) or 1
+        parsed = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='source') as executor:
+            futures = {}
+            for source_name, source in self.sources.items():
+                logger.info(f"Processing source: {source_name}")
+                future = executor.submit(self.parse_source, source)
+                futures[future] = source_name
+            
+            for future in as_completed(futures):
+                source_name = futures[future]
+                try:
+                    scholarships = future.result()
+                    if not scholarships:
+                        logger.info(f"No scholarships found for {source_name}")
+                    parsed.append((source_name, scholarships))
+                    self.increment_stat('sources_processed')
+                except NotModified:
+                    logger.info(f"{source_name} unchanged since last run, skipping")
+                    self.increment_stat('sources_processed')
+                except Exception as e:
+                    logger.error(f"Error processing {source_name}: {e}")
+                    self.discard_pages(source_name)
+                    self.increment_stat('errors')
         
-        return scholarships
+        self.insert_batches(parsed)
     
-    def parse_opportunities_corners(self, url):
-        """Parse opportunitiescorners.com"""
-        scholarships = []
-        soup = self.fetch_page(url)
-        if not soup:
-            return scholarships
+    def increment_stat(self, key, amount=1):
+        """Thread-safe increment of a stats counter"""
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+    
+    @contextmanager
+    def host_slot(self, url):
+        """Limit the number of concurrent requests to a single host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+    
+    def fetch_page(self, url, skip_unchanged=True, pending=None):
+        """
+        Fetch a webpage and return its HTML.
         
-        posts = soup.find_all('article', class_='type-post')[:20]
+        Pages already in the response cache are revalidated with a
+        conditional GET. If the page is unchanged, NotModified is raised so
+        the caller can skip parsing and storing it; pass
+        skip_unchanged=False to get the cached copy instead. A new response
+        is cached straight away, or appended to `pending` for the caller to
+        cache once it has stored what the page holds.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.is_fresh():
+            self.increment_stat('cache_hits')
+            return self._unchanged_page(entry, skip_unchanged, revalidated=False)
         
-        for post in posts:
-            try:
-                title_elem = post.find('h2', class_='entry-title')
-                if not title_elem:
-                    continue
-                
-                name = title_elem.get_text().strip()
-                link = title_elem.find('a')['href'] if title_elem.find('a') else ''
-                
-                excerpt = post.find('div', class_='entry-excerpt')
-                description = excerpt.get_text().strip()[:500] if excerpt else ''
-                
-                deadline = self.extract_deadline(description)
-                amount = self.extract_amount(description)
-                
-                scholarships.append({
-                    'name': name,
-                    'description': description,
-                    'provider': '',
-                    'eligibility': '',
-                    'amount': amount,
-                    'currency': 'USD',
-                    'deadline': deadline,
-                    'application_link': link,
-                    'country': 'International',
-                    'degree_level': self.detect_degree_level(name + description),
-                    'subject': self.detect_subject(name + description),
-                    'source_url': url,
-                    'source_name': 'opportunitiescorners.com'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing post: {e}")
+        try:
+            with self.host_slot(url):
+                response = self.session.get(
+                    url, headers=entry.validators() if entry else None, timeout=30
+                )
+            
+            if response.status_code == 304 and entry:
+                self.cache.refresh(url, response.headers)
+                self.increment_stat('cache_not_modified')
+            else:
+                response.raise_for_status()
+                self.increment_stat('cache_misses')
+                if pending is not None:
+                    pending.append((url, response.headers, response.content, response.encoding))
+                elif self.cache:
+                    self.cache.store(url, response.headers, response.content, response.encoding)
+                return response.text
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
         
-        return scholarships
+        return self._unchanged_page(entry, skip_unchanged, revalidated=True)
     
-    def parse_scholarship_roar(self, url):
-        """Parse scholarshiproar.com"""
-        scholarships = []
-        soup = self.fetch_page(url)
-        if not soup:
-            return scholarships
+    def _unchanged_page(self, entry, skip_unchanged, revalidated):
+        """Handle a page whose cached copy is still current"""
+        if skip_unchanged:
+            raise NotModified(entry.url, revalidated)
+        return entry.text
+    
+    def store_pages(self, source_name):
+        """Cache the listing pages of a source whose scholarships are stored"""
+        with self._stats_lock:
+            pages = self._pending_pages.pop(source_name, ())
+        if self.cache:
+            for url, headers, body, encoding in pages:
+                self.cache.store(url, headers, body, encoding)
+    
+    def discard_pages(self, source_name):
+        """Forget a source's fetched pages, so the next run parses them again"""
+        with self._stats_lock:
+            self._pending_pages.pop(source_name, None)
+    
+    def parse_source(self, source):
+        """
+        Fetch a source's listing pages and parse them with its selector plan.
         
-        articles = soup.find_all('article')[:20]
+        Every entry on the fetched pages is returned, known or not, so
+        stored scholarships keep picking up changes. Pagination follows the
+        source's next-page link up to max_pages, and the seen index only
+        stops it early once `stop_after_known` known entries appear in a row.
+        """
+        definition = source.definition
+        scholarships = []
+        url = definition.url
+        known_run = 0
+        pending = []
+        with self._stats_lock:
+            self._pending_pages[definition.name] = pending
         
-        for article in articles:
+        max_pages = max(definition.max_pages, 1)
+        for page_number in range(1, max_pages + 1):
             try:
-                title = article.find('h2')
-                if not title:
+                html = self.fetch_page(url, pending=pending)
+            except NotModified as e:
+                if e.revalidated:
+                    self.increment_stat('pages_fetched')
+                # An unchanged first page means an unchanged source; an
+                # unchanged later page holds nothing new either
+                if page_number == 1:
+                    raise
+                break
+            if not html:
+                break
+            self.increment_stat('pages_fetched')
+            
+            page = source.parse_page(html, DESCRIPTION_LIMIT, find_next=page_number < max_pages)
+            for entry in page.entries:
+                try:
+                    scholarship = self.build_scholarship(entry, definition, url)
+                except Exception as e:
+                    logger.error(f"Error parsing entry from {definition.source_name}: {e}")
                     continue
-                
-                name = title.get_text().strip()
-                link = title.find('a')['href'] if title.find('a') else ''
-                
-                content = article.find('div', class_='entry-content')
-                description = content.get_text().strip()[:500] if content else ''
-                
-                deadline = self.extract_deadline(description)
-                amount = self.extract_amount(description)
-                
-                scholarships.append({
-                    'name': name,
-                    'description': description,
-                    'provider': '',
-                    'eligibility': '',
-                    'amount': amount,
-                    'currency': 'USD',
-                    'deadline': deadline,
-                    'application_link': link,
-                    'country': 'International',
-                    'degree_level': self.detect_degree_level(name + description),
-                    'subject': self.detect_subject(name + description),
-                    'source_url': url,
-                    'source_name': 'scholarshiproar.com'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing article: {e}")
+                if self.is_known(scholarship):
+                    known_run += 1
+                    self.increment_stat('known_items')
+                else:
+                    known_run = 0
+                scholarships.append(scholarship)
+            
+            if not page.next_url or (self.seen is not None and known_run >= self.stop_after_known):
+                break
+            url = urljoin(url, page.next_url)
+        
+        if self.enricher and scholarships:
+            enriched = self.enricher.enrich(scholarships, definition.detail_body)
+            self.increment_stat('details_enriched', enriched)
         
         return scholarships
     
-    def extract_deadline(self, text):
-        """Extract deadline date from text"""
-        if not text:
-            return None
-        
-        # Common date patterns
-        patterns = [
-            r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
-            r'(\d{4})-(\d{2})-(\d{2})',
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'Deadline:\s*(.+?)(?:\n|$)',
-            r'Closing\s*Date:\s*(.+?)(?:\n|$)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    date_str = match.group(0)
-                    # Try to parse the date
-                    return self.parse_date(date_str)
-                except:
-                    continue
-        
-        return None
+    def is_known(self, scholarship):
+        """Whether a scholarship is already in the seen index"""
+        if self.seen is None:
+            return False
+        return item_key(scholarship['application_link'], scholarship['name']) in self.seen
     
-    def parse_date(self, date_str):
-        """Parse various date formats"""
-        formats = [
-            '%d %B %Y',
-            '%B %d %Y',
-            '%B %d, %Y',
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-        ]
+    def build_scholarship(self, entry, definition, page_url=None):
+        """Turn the raw fields of a listing entry into a scholarship record"""
+        page_url = page_url or definition.url
+        name = entry['name']
+        description = entry['description']
+        link = urljoin(page_url, entry['application_link']) if entry['application_link'] else ''
+        classification = classify(f'{name} {description}')
         
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str.strip(), fmt).date()
-            except:
-                continue
-        
-        return None
+        return {
+            'name': name,
+            'description': description,
+            'provider': '',
+            'eligibility': '',
+            'amount': self.extract_amount(description),
+            # Unknown unless the amount names one (see scholarship_row)
+            'currency': None,
+            'deadline': self.extract_deadline(description),
+            'application_link': link,
+            'country': classification.country,
+            'degree_level': classification.degree_level,
+            'subject': classification.subject,
+            'source_url': page_url,
+            'source_name': definition.source_name
+        }
+    
+    def extract_deadline(self, text):
+        """Extract deadline date from text"""
+        return extraction.extract_deadline(text)
     
     def extract_amount(self, text):
         """Extract scholarship amount from text"""
-        if not text:
-            return ''
-        
-        patterns = [
-            r'\$[\d,]+(?:\.\d{2})?',
-            r'€[\d,]+(?:\.\d{2})?',
-            r'£[\d,]+(?:\.\d{2})?',
-            r'full\s+tuition',
-            r'full\s+funding',
-            r'fully\s+funded',
-            r'partial\s+funding',
-            r'\d+%\s+tuition',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        
-        return ''
+        return extraction.extract_amount(text)
     
     def detect_degree_level(self, text):
         """Detect degree level from text"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['phd', 'doctorate', 'doctoral', 'ph.d']):
-            return 'PhD'
-        elif any(word in text_lower for word in ['master', 'masters', 'mba', 'msc', 'ma']):
-            return 'Master'
-        elif any(word in text_lower for word in ['bachelor', 'bachelors', 'undergraduate', 'bs', 'ba']):
-            return 'Bachelor'
-        elif any(word in text_lower for word in ['high school', 'secondary']):
-            return 'High School'
-        
-        return 'Any'
+        return classify(text).degree_level
     
     def detect_subject(self, text):
         """Detect subject/field from text"""
-        subjects = {
-            'Engineering': ['engineering', 'computer science', 'software', 'mechanical', 'electrical'],
-            'Medicine': ['medicine', 'medical', 'health', 'nursing', 'pharmacy'],
-            'Business': ['business', 'mba', 'management', 'finance', 'economics'],
-            'Science': ['science', 'physics', 'chemistry', 'biology', 'mathematics'],
-            'Arts': ['arts', 'humanities', 'literature', 'history', 'philosophy'],
-            'Law': ['law', 'legal', 'llm', 'jurisprudence'],
-        }
-        
-        text_lower = text.lower()
-        
-        for subject, keywords in subjects.items():
-            if any(kw in text_lower for kw in keywords):
-                return subject
-        
-        return 'Any'
+        return classify(text).subject
     
     def insert_scholarships(self, scholarships, source_name):
         """Insert scholarships into database with duplicate prevention"""
         if not scholarships:
             logger.info(f"No scholarships found for {source_name}")
+            self.store_pages(source_name)
             return
         
+        rows = [scholarship_row(s) for s in scholarships]
         try:
-            query = """
-                INSERT INTO scholarships 
-                (name, description, provider, eligibility, amount, currency, 
-                 deadline, application_link, country, degree_level, subject, 
-                 source_url, source_name, updated_at)
-                VALUES %s
-                ON CONFLICT (name, provider, deadline) 
-                DO UPDATE SET
-                    description = EXCLUDED.description,
-                    eligibility = EXCLUDED.eligibility,
-                    amount = EXCLUDED.amount,
-                    application_link = EXCLUDED.application_link,
-                    updated_at = CURRENT_TIMESTAMP
-                RETURNING (xmax = 0) as inserted
-            """
-            
-            values = []
-            for s in scholarships:
-                values.append((
-                    s['name'][:500],
-                    s['description'][:5000],
-                    s['provider'][:255],
-                    s['eligibility'][:2000],
-                    s['amount'][:255],
-                    s['currency'][:10],
-                    s['deadline'],
-                    s['application_link'],
-                    s['country'][:100],
-                    s['degree_level'][:100],
-                    s['subject'][:200],
-                    s['source_url'],
-                    s['source_name'][:100]
-                ))
-            
-            execute_values(self.db_cursor, query, values, fetch=True)
-            results = self.db_cursor.fetchall()
-            
-            for result in results:
-                if result[0]:
-                    self.stats['inserted'] += 1
-                else:
-                    self.stats['duplicates'] += 1
-            
-            self.db_connection.commit()
-            logger.info(f"Inserted {len(scholarships)} scholarships from {source_name}")
-            
+            result = self.db.upsert(rows, self.write_mode)
+        except Exception as e:
+            logger.error(f"Error inserting scholarships: {e}")
+            self.discard_pages(source_name)
+            self.increment_stat('errors', len(scholarships))
+            return
+        self.record_upsert(result, scholarships, rows, source_name)
+    
+    def insert_batches(self, batches):
+        """
+        Insert several sources' scholarships at once.
+        
+        With DB_DRIVER=psycopg the batches are pipelined rather than
+        written one round trip at a time.
+        """
+        for source_name, scholarships in batches:
+            if not scholarships:
+                self.store_pages(source_name)
+        batches = [(source_name, scholarships) for source_name, scholarships in batches if scholarships]
+        if self.write_mode != 'values' or len(batches) < 2:
+            for source_name, scholarships in batches:
+                self.insert_scholarships(scholarships, source_name)
+            return
+        
+        batch_rows = [[scholarship_row(s) for s in scholarships] for _, scholarships in batches]
+        try:
+            results = self.db.upsert_batches(batch_rows)
         except Exception as e:
-            self.db_connection.rollback()
             logger.error(f"Error inserting scholarships: {e}")
-            self.stats['errors'] += len(scholarships)
+            for source_name, scholarships in batches:
+                self.discard_pages(source_name)
+                self.increment_stat('errors', len(scholarships))
+            return
+        for (source_name, scholarships), rows, result in zip(batches, batch_rows, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error inserting scholarships from {source_name}: {result}")
+                self.discard_pages(source_name)
+                self.increment_stat('errors', len(scholarships))
+            else:
+                self.record_upsert(result, scholarships, rows, source_name)
+    
+    def record_upsert(self, result, scholarships, rows, source_name):
+        """Count a stored batch, log rejected rows and add the rest to the seen index"""
+        self.increment_stat('inserted', result.inserted)
+        self.increment_stat('updated', result.updated)
+        self.increment_stat('unchanged', result.unchanged)
+        self.increment_stat('coalesced', result.coalesced)
+        self.increment_stat('errors', len(result.failed))
+        for row, error in result.failed:
+            logger.error(f"Dropped scholarship {row[0]!r} from {source_name}: {error}")
+        
+        rejected = {id(row) for row, _ in result.failed}
+        stored = [s for s, row in zip(scholarships, rows) if id(row) not in rejected]
+        if self.seen is not None and stored:
+            self.seen.add(
+                [item_key(s['application_link'], s['name']) for s in stored],
+                stored[0]['source_name']
+            )
+        self.cluster(result.inserted_ids)
+        self.store_pages(source_name)
+        logger.info(f"Inserted {len(stored)} scholarships from {source_name}")
+    
+    def load_clusters(self):
+        """Index the stored scholarships for near-duplicate detection"""
+        if self.clusters is None:
+            return
+        try:
+            indexed, clustered = self.clusters.load(self.db)
+            logger.info(f"Near-duplicate index: {indexed} scholarships, {clustered} newly clustered")
+        except Exception as e:
+            logger.error(f"Near-duplicate detection disabled: {e}")
+            self.clusters = None
+    
+    def cluster(self, scholarship_ids):
+        """Map newly inserted scholarships to their canonical ones"""
+        if self.clusters is None or not scholarship_ids:
+            return
+        try:
+            canonical = self.clusters.assign(self.db, scholarship_ids)
+        except Exception as e:
+            logger.error(f"Error clustering near-duplicates: {e}")
+            return
+        self.increment_stat('near_duplicates',
+                            sum(1 for sid, canonical_id in canonical.items() if sid != canonical_id))
     
     def log_run(self):
         """Log scraper execution"""
         try:
-            query = """
-                INSERT INTO scraper_logs 
-                (source_name, items_scraped, items_inserted, items_duplicates, 
-                 started_at, completed_at, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            self.db_cursor.execute(query, (
-                'standalone_scraper',
-                self.stats['inserted'] + self.stats['duplicates'],
-                self.stats['inserted'],
-                self.stats['duplicates'],
-                datetime.now(),
-                datetime.now(),
-                'completed' if self.stats['errors'] == 0 else 'partial'
-            ))
-            self.db_connection.commit()
+            self.db.log_run('standalone_scraper', dict(self.stats, requests=self.stats['pages_fetched']),
+                            self.started_at)
         except Exception as e:
             logger.error(f"Error logging run: {e}")
+    
+    def refresh_stats(self):
+        """Bring the materialized stats and filter facets up to date"""
+        if not (self.stats['inserted'] or self.stats['updated']):
+            return
+        try:
+            self.db.refresh_stats()
+        except Exception as e:
+            logger.error(f"Error refreshing scholarship stats: {e}")
 
 
 def main():
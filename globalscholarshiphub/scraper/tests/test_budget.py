@@ -0,0 +1,67 @@
+from scrapy.crawler import Crawler
+from scrapy.settings import Settings
+
+from scraper import budget
+from scraper.budget import CrawlBudget, SourceHistory, apply_budget
+from scraper.spiders.scholarship_spider import ScholarshipSpider
+
+
+def spider_settings():
+    """Project settings with ScholarshipSpider's custom_settings applied"""
+    settings = Settings()
+    settings.setmodule('scraper.settings', priority='project')
+    settings.setdict(ScholarshipSpider.custom_settings, priority='spider')
+    return settings
+
+
+HISTORY = {
+    'best.org': SourceHistory(runs=5, requests=100, new_items=400),
+    'worst.org': SourceHistory(runs=5, requests=100, new_items=0),
+}
+
+
+def test_top_source_stays_within_spider_limits():
+    settings = spider_settings()
+    plan = CrawlBudget.from_settings(settings).plan(sorted(HISTORY), HISTORY)
+    top = max(plan.values(), key=lambda b: b.priority)
+    assert top is plan['best.org']
+    for source_budget in plan.values():
+        assert source_budget.concurrency <= settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN')
+        assert source_budget.delay >= settings.getfloat('DOWNLOAD_DELAY')
+    assert top.max_pages > plan['worst.org'].max_pages
+
+
+def test_download_slots_respect_spider_limits(monkeypatch):
+    monkeypatch.setattr(budget, 'load_history', lambda sources, days: HISTORY)
+    settings = spider_settings()
+    apply_budget(settings, {'best.org': 'best.org', 'worst.org': 'worst.org'})
+    slots = settings.getdict('DOWNLOAD_SLOTS')
+    assert set(slots) == {'best.org', 'www.best.org', 'worst.org', 'www.worst.org'}
+    for slot in slots.values():
+        assert slot == {'concurrency': 1, 'delay': 3.0}
+
+
+def test_budget_spreads_when_limits_allow():
+    settings = Settings({'CONCURRENT_REQUESTS_PER_DOMAIN': 4, 'DOWNLOAD_DELAY': 1,
+                         'CRAWL_BUDGET_MAX_CONCURRENCY': 2, 'CRAWL_BUDGET_MIN_DELAY': 2.0,
+                         'CRAWL_BUDGET_MAX_DELAY': 3.0})
+    plan = CrawlBudget.from_settings(settings).plan(sorted(HISTORY), HISTORY)
+    assert (plan['best.org'].concurrency, plan['best.org'].delay) == (2, 2.0)
+    assert plan['worst.org'].concurrency == 1
+    assert plan['worst.org'].delay > plan['best.org'].delay
+
+
+def test_history_is_read_only_for_a_crawl(monkeypatch):
+    calls = []
+
+    def load_history(sources, days):
+        calls.append(sources)
+        return {}
+
+    monkeypatch.setattr(budget, 'load_history', load_history)
+    crawler = Crawler(ScholarshipSpider, spider_settings().copy_to_dict())
+    assert calls == []
+    spider = ScholarshipSpider.from_crawler(crawler)
+    assert len(calls) == 1
+    assert set(spider.crawl_budget) == {
+        'scholarships.com', 'fastweb.com', 'internationalscholarships.com'}
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+from psycopg2 import DataError, IntegrityError, ProgrammingError
+
+from scraper import db
+from scraper.db import Database, UpsertResult, coalesce_rows, scholarship_row
+
+
+def row(name, provider='', deadline=None, source_name='example.org'):
+    return scholarship_row({'name': name, 'provider': provider, 'deadline': deadline,
+                            'source_name': source_name})
+
+
+def test_coalesce_keeps_the_last_row_per_key():
+    first = row('Award', deadline=date(2025, 1, 1), source_name='a.org')
+    other_deadline = row('Award', deadline=date(2025, 2, 1))
+    last = row('Award', deadline=date(2025, 1, 1), source_name='b.org')
+    kept, dropped = coalesce_rows([first, other_deadline, last])
+    assert kept == [other_deadline, last]
+    assert dropped == 1
+
+
+def test_coalesce_treats_a_missing_deadline_as_one_key():
+    kept, dropped = coalesce_rows([row('Award'), row('Award', provider='Fund'), row('Award')])
+    assert [r[2] for r in kept] == ['Fund', '']
+    assert dropped == 1
+
+
+def test_coalesce_compares_truncated_names():
+    kept, dropped = coalesce_rows([row('x' * 500 + 'a'), row('x' * 500 + 'b')])
+    assert len(kept) == 1
+    assert dropped == 1
+
+
+class FakePool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setattr(db, 'ThreadedConnectionPool', FakePool)
+    return Database(maxconn=1, driver='psycopg2')
+
+
+def writer(calls, bad_names, error=DataError):
+    """A Database._write that rejects any chunk holding one of `bad_names`"""
+    def write(rows, mode):
+        calls.append(len(rows))
+        if any(r[0] in bad_names for r in rows):
+            raise error('bad row')
+        return UpsertResult(len(rows), 0, 0)
+    return write
+
+
+@pytest.mark.parametrize('error', [DataError, IntegrityError])
+def test_upsert_bisects_down_to_the_bad_row(database, error):
+    rows = [row(f'Award {i}') for i in range(8)]
+    calls = []
+    database._write = writer(calls, {'Award 5'}, error)
+    result = database.upsert(rows)
+    assert result.inserted == 7
+    assert [r[0] for r, _ in result.failed] == ['Award 5']
+    assert isinstance(result.failed[0][1], error)
+    assert len(calls) < 2 * len(rows)
+
+
+def test_upsert_raises_other_errors_without_bisecting(database):
+    rows = [row(f'Award {i}') for i in range(8)]
+    calls = []
+    database._write = writer(calls, {'Award 5'}, ProgrammingError)
+    with pytest.raises(ProgrammingError):
+        database.upsert(rows)
+    assert calls == [8]
+
+
+def test_upsert_reports_coalesced_rows(database):
+    calls = []
+    database._write = writer(calls, set())
+    result = database.upsert([row('Award'), row('Award'), row('Other')])
+    assert (result.inserted, result.coalesced) == (2, 1)
+    assert calls == [2]
@@ -0,0 +1,72 @@
+from scraper.dedup import ClusterIndex, MinHashLSH, shingles
+
+
+FULBRIGHT = ('Fulbright Foreign Student Program 2025', 'U.S. Department of State',
+             'The Fulbright program provides grants for graduate students to study in the USA.')
+FULBRIGHT_ELSEWHERE = ('Fulbright Foreign Student Scholarship 2025/26', 'US Department of State',
+                       'The Fulbright program provides grants for graduate students.')
+CHEVENING = ('Chevening Scholarships', 'UK Foreign Office',
+             "Fully funded master's degrees in the United Kingdom.")
+
+
+class FakeDatabase:
+    """The rows and cluster table ClusterIndex reads and writes"""
+
+    def __init__(self, scholarships):
+        # {id: (name, provider, description)}
+        self.scholarships = dict(scholarships)
+        # {id: (canonical id, similarity, signature bytes)}
+        self.clusters = {}
+
+    def cluster_rows(self, after_id, limit):
+        rows = []
+        for sid in sorted(self.scholarships):
+            if sid > after_id and len(rows) < limit:
+                canonical_id, _, signature = self.clusters.get(sid, (None, None, None))
+                rows.append((sid, *self.scholarships[sid], canonical_id, signature))
+        return rows
+
+    def scholarships_by_id(self, ids):
+        return [(sid, *self.scholarships[sid]) for sid in ids]
+
+    def store_clusters(self, assigned):
+        for sid, canonical_id, similarity, signature in assigned:
+            self.clusters[sid] = (canonical_id, similarity, signature)
+
+
+def test_near_duplicates_share_a_canonical_id():
+    lsh = MinHashLSH()
+    canonical = [lsh.assign(sid, lsh.signature(shingles(*fields)))[0]
+                 for sid, fields in ((1, FULBRIGHT), (2, CHEVENING), (3, FULBRIGHT_ELSEWHERE))]
+    assert canonical == [1, 2, 1]
+
+
+def test_a_scholarship_without_a_match_is_its_own_canonical():
+    lsh = MinHashLSH()
+    assert lsh.assign(7, lsh.signature(shingles(*FULBRIGHT))) == (7, 1.0)
+
+
+def test_load_clusters_in_chunks_and_assign_adds_new_rows():
+    db = FakeDatabase({1: FULBRIGHT, 2: CHEVENING})
+    index = ClusterIndex(chunk_size=1)
+    assert index.load(db) == (2, 2)
+    assert {sid: cluster[0] for sid, cluster in db.clusters.items()} == {1: 1, 2: 2}
+
+    db.scholarships[3] = FULBRIGHT_ELSEWHERE
+    assert index.assign(db, [3]) == {3: 1}
+    assert index.duplicates == 1
+    # Already indexed, so neither loaded nor clustered again
+    assert index.assign(db, [3]) == {}
+    assert index.load(db) == (1, 0)
+
+
+def test_load_reuses_stored_signatures():
+    db = FakeDatabase({1: FULBRIGHT, 2: CHEVENING})
+    ClusterIndex().load(db)
+    stored = dict(db.clusters)
+
+    index = ClusterIndex()
+    assert index.load(db) == (2, 0)
+    assert db.clusters == stored
+    db.scholarships[3] = FULBRIGHT_ELSEWHERE
+    assert index.assign(db, [3]) == {3: 1}
@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+
+from scraper.extraction import DeadlineParser, ParsedAmount, extract_amount, parse_amount
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$5,000', ParsedAmount(5000, 5000, None, 'USD')),
+    ('€850-1,200/month', ParsedAmount(850, 1200, 'month', 'EUR')),
+    ('5000 - 10000 USD', ParsedAmount(5000, 10000, None, 'USD')),
+    ('up to £10k per year', ParsedAmount(None, 10000, 'year', 'GBP')),
+    ('between $1,000 and $5,000', ParsedAmount(1000, 5000, None, 'USD')),
+    ('between 1,000 and 5,000 EUR a year', ParsedAmount(1000, 5000, 'year', 'EUR')),
+    ('$1,000 and $5,000 for runners-up', ParsedAmount(1000, 1000, None, 'USD')),
+    ('$5,000 - 2 awards', ParsedAmount(5000, 5000, None, 'USD')),
+    ('$10,000 per 2 years', ParsedAmount(10000, 10000, 'year', 'USD')),
+    ('€800 every 6 months', ParsedAmount(800, 800, 'month', 'EUR')),
+    ('£600 / months', ParsedAmount(600, 600, 'month', 'GBP')),
+    ('Duration: 3 months, stipend $2,000', ParsedAmount(2000, 2000, None, 'USD')),
+    ('Up to €1,000 - €5,000 per month', ParsedAmount(1000, 5000, 'month', 'EUR')),
+    ('Monthly: $1,500', ParsedAmount(1500, 1500, 'month', 'USD')),
+    ('Worth $2,000, apply by 5 pm', ParsedAmount(2000, 2000, None, 'USD')),
+    ('Prize 10 000 EUR', ParsedAmount(10000, 10000, None, 'EUR')),
+    ('€12\u00a0500 per year', ParsedAmount(12500, 12500, 'year', 'EUR')),
+    ('between 1 000 and 5 000 EUR', ParsedAmount(1000, 5000, None, 'EUR')),
+    ('10  000 EUR', ParsedAmount()),
+    ('€ 12.000,50', ParsedAmount(12000.5, 12000.5, None, 'EUR')),
+    ('1.500,00 EUR per month', ParsedAmount(1500, 1500, 'month', 'EUR')),
+    ('3 months', ParsedAmount()),
+    ('Full Funding', ParsedAmount()),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Award: Up to €1,000 - €5,000 per month. Apply now.', 'Up to €1,000 - €5,000 per month'),
+    ('Worth $2,000, apply by 5 pm', '$2,000'),
+    ('Award of USD 20,000 for one student', 'USD 20,000'),
+    ('Stipend: 5000 USD per year.', '5000 USD per year'),
+    ('Funding of CAD 15,000 to 20,000 annually', 'CAD 15,000 to 20,000 annually'),
+    ('Grant of 1,000,000 naira', '1,000,000 naira'),
+    ('Prize: 10 000 € for the winner', '10 000 €'),
+    ('Win 2 million dollars', '2 million dollars'),
+    ('Scholarship worth € 12.000,50', '€ 12.000,50'),
+    ('Full tuition and a $5,000 stipend', '$5,000'),
+    ('Covers full tuition', 'full tuition'),
+])
+def test_extract_amount_keeps_range_and_period(text, expected):
+    assert extract_amount(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Award of USD 20,000 for one student', ParsedAmount(20000, 20000, None, 'USD')),
+    ('Stipend: 5000 USD per year.', ParsedAmount(5000, 5000, 'year', 'USD')),
+    ('Funding of CAD 15,000 to 20,000 annually', ParsedAmount(15000, 20000, 'year', 'CAD')),
+    ('Grant of 1,000,000 naira', ParsedAmount(1000000, 1000000, None, 'NGN')),
+    ('Prize: 10 000 € for the winner', ParsedAmount(10000, 10000, None, 'EUR')),
+    ('Win 2 million dollars', ParsedAmount(2000000, 2000000, None, 'USD')),
+])
+def test_extracted_amount_parses(text, expected):
+    assert parse_amount(extract_amount(text)) == expected
+
+
+def test_deadline_parser_learns_each_sources_format():
+    parser = DeadlineParser()
+    assert parser.parse('03/04/2024', 'day-first.org') == date(2024, 4, 3)
+    # A month-first source teaches its own format, without affecting the other
+    assert parser.parse('12/31/2024', 'month-first.org') == date(2024, 12, 31)
+    assert parser.parse('03/04/2024', 'month-first.org') == date(2024, 3, 4)
+    assert parser.parse('05/06/2024', 'day-first.org') == date(2024, 6, 5)
+    assert parser.learned_formats() == {'day-first.org': '%d/%m/%Y', 'month-first.org': '%m/%d/%Y'}
+    assert parser.format_hits == 2
+
+
+def test_deadline_parser_caches_per_source_and_evicts_oldest():
+    parser = DeadlineParser(maxsize=2)
+    parser.parse('2024-01-01', 'a.org')
+    parser.parse('2024-01-02', 'a.org')
+    parser.parse('2024-01-01', 'a.org')
+    assert (parser.cache_hits, parser.cache_misses) == (1, 2)
+    # The same text from another source is looked up on its own
+    parser.parse('2024-01-01', 'b.org')
+    assert parser.cache_misses == 3
+    # '2024-01-02' was least recently used and has been evicted
+    parser.parse('2024-01-02', 'a.org')
+    assert parser.cache_misses == 4
+    parser.parse('2024-01-01', 'b.org')
+    assert parser.cache_hits == 2
+
+
+def test_deadline_parser_rejects_unknown_formats():
+    parser = DeadlineParser()
+    assert parser.parse('sometime soon', 'a.org') is None
+    assert parser.parse('', 'a.org') is None
+    assert parser.failures == 1
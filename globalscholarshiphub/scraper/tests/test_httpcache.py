@@ -0,0 +1,66 @@
+import itertools
+import os
+
+import pytest
+
+from scraper import httpcache
+from scraper.httpcache import ResponseCache, parse_cache_control
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # A clock that ticks on every call, so recency is never a tie
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(httpcache.time, 'time', lambda: float(next(ticks)))
+    cache = ResponseCache(os.path.join(tmp_path, 'http.sqlite'))
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, (True, 0)),
+    ('public, max-age=600', (True, 600)),
+    ('no-cache', (True, 0)),
+    ('private, no-store', (False, 0)),
+])
+def test_parse_cache_control(header, expected):
+    assert parse_cache_control(header) == expected
+
+
+def test_stored_page_revalidates_with_its_validators(cache):
+    headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 06 Jan 2025 10:00:00 GMT'}
+    assert cache.store('https://example.org/', headers, b'<html>v1</html>', 'utf-8')
+    entry = cache.get('https://example.org/')
+    assert entry.text == '<html>v1</html>'
+    assert not entry.is_fresh()
+    assert entry.validators() == {'If-None-Match': '"v1"',
+                                  'If-Modified-Since': 'Mon, 06 Jan 2025 10:00:00 GMT'}
+
+
+def test_refresh_keeps_validators_the_304_leaves_out(cache):
+    cache.store('https://example.org/', {'ETag': '"v1"'}, b'body')
+    cache.refresh('https://example.org/', {'Cache-Control': 'max-age=60'})
+    entry = cache.get('https://example.org/')
+    assert entry.etag == '"v1"'
+    assert entry.max_age == 60
+    assert entry.is_fresh(now=entry.fetched_at + 30)
+
+
+def test_no_store_drops_the_cached_copy(cache):
+    cache.store('https://example.org/', {}, b'body')
+    assert not cache.store('https://example.org/', {'Cache-Control': 'no-store'}, b'body')
+    assert cache.get('https://example.org/') is None
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_pages_are_evicted(cache):
+    body = os.urandom(1000)
+    cache.max_bytes = 2500
+    cache.store('https://example.org/1', {}, body)
+    cache.store('https://example.org/2', {}, body)
+    cache.get('https://example.org/1')
+    cache.store('https://example.org/3', {}, body)
+    assert cache.get('https://example.org/2') is None
+    assert cache.get('https://example.org/1') is not None
+    assert cache.get('https://example.org/3') is not None
+    assert cache.total_bytes <= cache.max_bytes
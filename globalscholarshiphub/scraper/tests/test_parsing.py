@@ -0,0 +1,48 @@
+from scraper.parsing import SelectorPlan, SourceDefinition
+
+
+def plan(**overrides):
+    fields = dict(
+        name='test',
+        url='https://example.org/',
+        source_name='example.org',
+        container='article.post',
+        title='h2.entry-title',
+        link='h2.entry-title a',
+        body='div.entry-content',
+        next_page='a.next',
+        max_pages=5,
+    )
+    fields.update(overrides)
+    return SelectorPlan(SourceDefinition(**fields))
+
+
+def card(number, extra=''):
+    return (f'<article class="post"><h2 class="entry-title"><a href="/s/{number}">'
+            f'Scholarship {number}</a></h2><div class="entry-content">About {number}'
+            f'</div>{extra}</article>')
+
+
+def test_parse_page_reads_entries_and_next_link():
+    html = f'<html><body>{card(1)}{card(2)}<a class="next" href="/page/2">Next</a></body></html>'
+    page = plan().parse_page(html)
+    assert [entry['name'] for entry in page.entries] == ['Scholarship 1', 'Scholarship 2']
+    assert page.entries[1]['application_link'] == '/s/2'
+    assert page.entries[1]['description'] == 'About 2'
+    assert page.next_url == '/page/2'
+
+
+def test_next_link_inside_a_card_keeps_the_card():
+    html = (f'<html><body>{card(1)}'
+            f'{card(2, extra="<a class=next href=/page/2>Next</a>")}</body></html>')
+    page = plan().parse_page(html)
+    assert [entry['name'] for entry in page.entries] == ['Scholarship 1', 'Scholarship 2']
+    assert page.entries[1]['description'] == 'About 2'
+    assert page.next_url == '/page/2'
+
+
+def test_limit_stops_after_next_link():
+    html = ''.join(card(number) for number in range(1, 6))
+    page = plan(limit=3).parse_page(f'<html><body>{html}<a class="next" href="/2">Next</a></body></html>')
+    assert len(page.entries) == 3
+    assert page.next_url == '/2'
@@ -0,0 +1,43 @@
+from scraper.validation import normalize, validate_batch
+
+
+def record(**overrides):
+    fields = dict(name='Global Award', description='', source_name='example.org')
+    fields.update(overrides)
+    return fields
+
+
+def test_normalize_maps_aliases_and_defaults():
+    cleaned = normalize(record(name='  Global\n Award ', country='united kingdom',
+                               degree_level='Postgraduate'))
+    assert cleaned['name'] == 'Global Award'
+    assert cleaned['country'] == 'UK'
+    assert cleaned['degree_level'] == 'Master'
+    defaults = normalize(record())
+    assert (defaults['country'], defaults['degree_level']) == ('International', 'Any')
+
+
+def test_normalize_keeps_unknown_values():
+    cleaned = normalize(record(country='Ghana', degree_level='Diploma'))
+    assert (cleaned['country'], cleaned['degree_level']) == ('Ghana', 'Diploma')
+
+
+def test_long_values_are_truncated_not_rejected():
+    records = [normalize(record(name='x' * 600, amount='$' * 300))]
+    assert len(records[0]['name']) == 500
+    assert len(records[0]['amount']) == 255
+    assert validate_batch(records) == [()]
+
+
+def test_missing_and_blank_names_are_required():
+    records = [normalize(record(name='   ')), normalize(record()),
+               normalize({'description': 'x', 'source_name': 'example.org'})]
+    assert validate_batch(records) == [('name is required',), (), ('name is required',)]
+
+
+def test_every_record_gets_its_own_reasons():
+    records = [normalize(record()), normalize(record(source_name=None, currency=5))]
+    valid, invalid = validate_batch(records)
+    assert valid == ()
+    assert 'source_name is required' in invalid
+    assert any(reason.startswith('currency: ') for reason in invalid)
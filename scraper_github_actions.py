@@ -2,11 +2,25 @@
 """
 Scholarship Scraper for GitHub Actions
 Scrapes scholarships and saves to JSON file
+
+With --output shards, records stream to scholarships.ndjson as they are
+scraped and are published as sorted pages of a fixed size under
+scholarships/ (page-0001.json, ...) with a small manifest.json, so the
+site renders its first screen from one small file. scholarships.json is
+still written, streamed, for older clients. Memory stays flat however
+many records there are.
 """
+import argparse
+import heapq
 import json
 import logging
+import os
+import shutil
+import tempfile
+import textwrap
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Dict, Iterator, List
 import requests
 from bs4 import BeautifulSoup
 import time
@@ -15,6 +29,146 @@ import time
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def sort_key(scholarship: Dict) -> list:
+    """Featured first, then by deadline (open-ended last), then by name"""
+    return [
+        0 if scholarship.get('is_featured') else 1,
+        scholarship.get('deadline') or '9999-12-31',
+        scholarship.get('name') or '',
+    ]
+
+
+class ShardWriter:
+    """
+    Streams scholarships to NDJSON and publishes them as sorted page shards.
+
+    write() appends each record to the NDJSON file and to an in-memory run;
+    full runs of `run_size` records are sorted and spilled to temporary
+    files. close() merges the runs into pages of `page_size` records
+    ({"page", "pages", "total", "items"}) plus manifest.json in `shard_dir`,
+    and optionally the whole sorted list as `json_path`. At most one run
+    and one page are held in memory. Files are swapped in only once
+    complete, so a failed run leaves the previous output in place.
+    """
+
+    FACETS = ('country', 'degree_level', 'subject')
+
+    def __init__(self, ndjson_path: str = 'scholarships.ndjson', shard_dir: str = 'scholarships',
+                 json_path: str = None, page_size: int = 50, run_size: int = 10000):
+        self.ndjson_path = ndjson_path
+        self.shard_dir = shard_dir
+        self.json_path = json_path
+        self.page_size = page_size
+        self.run_size = run_size
+        self.total = 0
+        self.facets = {facet: Counter() for facet in self.FACETS}
+        self._work = tempfile.mkdtemp(prefix='.shards-', dir=os.path.dirname(os.path.abspath(shard_dir)))
+        self._ndjson = open(os.path.join(self._work, 'records.ndjson'), 'w', encoding='utf-8')
+        self._run = []
+        self._runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, scholarship: Dict):
+        self._ndjson.write(json.dumps(scholarship, ensure_ascii=False) + '\n')
+        self._run.append((sort_key(scholarship), scholarship))
+        for facet in self.FACETS:
+            if scholarship.get(facet):
+                self.facets[facet][scholarship[facet]] += 1
+        self.total += 1
+        if len(self._run) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        path = os.path.join(self._work, f'run-{len(self._runs):05d}.ndjson')
+        self._run.sort(key=lambda entry: entry[0])
+        with open(path, 'w', encoding='utf-8') as f:
+            for key, scholarship in self._run:
+                f.write(json.dumps([key, scholarship], ensure_ascii=False) + '\n')
+        self._runs.append(path)
+        self._run = []
+
+    def _sorted(self) -> Iterator[Dict]:
+        if self._run:
+            self._spill()
+        files = [open(path, encoding='utf-8') for path in self._runs]
+        try:
+            runs = [(json.loads(line) for line in f) for f in files]
+            for _, scholarship in heapq.merge(*runs, key=lambda entry: entry[0]):
+                yield scholarship
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self) -> Dict:
+        """Write the shards and manifest and publish every output; returns the manifest"""
+        self._ndjson.close()
+        pages = max(1, -(-self.total // self.page_size))
+        shards = os.path.join(self._work, 'shards')
+        os.mkdir(shards)
+        json_file = open(os.path.join(self._work, 'scholarships.json'), 'w', encoding='utf-8') \
+            if self.json_path else None
+        try:
+            if json_file:
+                json_file.write('[')
+            page, items = 1, []
+            for index, scholarship in enumerate(self._sorted()):
+                items.append(scholarship)
+                if len(items) == self.page_size:
+                    self._write_page(shards, page, pages, items)
+                    page, items = page + 1, []
+                if json_file:
+                    json_file.write((',\n' if index else '\n') + textwrap.indent(
+                        json.dumps(scholarship, indent=2, ensure_ascii=False), '  '))
+            if items or self.total == 0:
+                self._write_page(shards, page, pages, items)
+            if json_file:
+                json_file.write('\n]' if self.total else ']')
+        finally:
+            if json_file:
+                json_file.close()
+
+        manifest = {
+            'total': self.total,
+            'page_size': self.page_size,
+            'pages': pages,
+            'page_file': 'page-{page:04d}.json',
+            'sort': ['is_featured desc', 'deadline asc', 'name asc'],
+            'facets': {facet: dict(counts.most_common()) for facet, counts in self.facets.items()},
+        }
+        with open(os.path.join(shards, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        os.replace(os.path.join(self._work, 'records.ndjson'), self.ndjson_path)
+        if json_file:
+            os.replace(json_file.name, self.json_path)
+        previous = self._work + '-previous'
+        if os.path.exists(self.shard_dir):
+            os.rename(self.shard_dir, previous)
+        os.rename(shards, self.shard_dir)
+        shutil.rmtree(self._work)
+        shutil.rmtree(previous, ignore_errors=True)
+        return manifest
+
+    def _write_page(self, shards: str, page: int, pages: int, items: List[Dict]):
+        path = os.path.join(shards, f'page-{page:04d}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'page': page, 'pages': pages, 'total': self.total, 'items': items}, f,
+                      ensure_ascii=False, separators=(',', ':'))
+
+    def abort(self):
+        """Drop everything written so far, leaving the published files as they were"""
+        self._ndjson.close()
+        shutil.rmtree(self._work, ignore_errors=True)
+
+
 class ScholarshipScraper:
     """Scrapes scholarships from various sources"""
     
@@ -26,20 +180,23 @@ class ScholarshipScraper:
     
     def scrape_all(self) -> List[Dict]:
         """Scrape scholarships from all sources"""
+        self.scholarships = list(self.iter_scholarships())
+        return self.scholarships
+    
+    def iter_scholarships(self) -> Iterator[Dict]:
+        """Yield scholarships from all sources as they are scraped"""
         logger.info("Starting scholarship scraping...")
         
         # Add more scholarships to existing mock data
-        self.scholarships = self.get_mock_scholarships()
+        yield from self.get_mock_scholarships()
         
         try:
             logger.info("Attempting to scrape from various sources...")
             # Add real scraped data here (when available)
-            # self.scholarships.extend(self.scrape_scholarships_com())
-            # self.scholarships.extend(self.scrape_fasaid())
+            # yield from self.scrape_scholarships_com()
+            # yield from self.scrape_fasaid()
         except Exception as e:
             logger.warning(f"Error during scraping: {e}. Using mock data fallback.")
-        
-        return self.scholarships
     
     def get_mock_scholarships(self) -> List[Dict]:
         """Return comprehensive mock scholarship data"""
@@ -236,15 +393,43 @@ class ScholarshipScraper:
         except Exception as e:
             logger.error(f"Error saving to JSON: {e}")
             return False
+    
+    def save_shards(self, ndjson_path: str = 'scholarships.ndjson', shard_dir: str = 'scholarships',
+                    json_path: str = 'scholarships.json', page_size: int = 50):
+        """Stream scholarships to NDJSON, sorted page shards and a manifest as they are scraped"""
+        try:
+            with ShardWriter(ndjson_path, shard_dir, json_path, page_size) as writer:
+                for scholarship in self.iter_scholarships():
+                    writer.write(scholarship)
+            logger.info(f"Saved {writer.total} scholarships to {ndjson_path} and "
+                        f"{shard_dir}/ in pages of {page_size}")
+            return writer.total
+        except Exception as e:
+            logger.error(f"Error saving shards: {e}")
+            return None
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Scrape scholarships to static JSON files')
+    parser.add_argument('--output', choices=['json', 'shards'], default='json',
+                        help="'shards': stream to NDJSON plus sorted page shards and a manifest")
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
     scraper = ScholarshipScraper()
+    if args.output == 'shards':
+        total = scraper.save_shards(page_size=args.page_size)
+        if total is None:
+            return 1
+        logger.info(f"Scraping complete! Found {total} scholarships.")
+        return 0
+
     scholarships = scraper.scrape_all()
     scraper.save_to_json('scholarships.json')
     logger.info(f"Scraping complete! Found {len(scholarships)} scholarships.")
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    raise SystemExit(main())
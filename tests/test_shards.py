@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from scraper_github_actions import ShardWriter
+
+
+def scholarship(name, deadline=None, featured=False, country='UK'):
+    return {'name': name, 'deadline': deadline, 'is_featured': featured, 'country': country}
+
+
+RECORDS = [
+    scholarship('Delta', '2025-03-01'),
+    scholarship('Alpha'),
+    scholarship('Charlie', '2025-01-15', country='USA'),
+    scholarship('Bravo', '2025-03-01', featured=True),
+    scholarship('Echo', '2025-01-15'),
+]
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_all(tmp_path, records, **options):
+    writer = ShardWriter(str(tmp_path / 'scholarships.ndjson'), str(tmp_path / 'shards'),
+                         str(tmp_path / 'scholarships.json'), **options)
+    with writer:
+        for record in records:
+            writer.write(record)
+    return writer
+
+
+def test_pages_are_sorted_across_spilled_runs(tmp_path):
+    write_all(tmp_path, RECORDS, page_size=2, run_size=2)
+    pages = [read(tmp_path / 'shards' / f'page-{page:04d}.json') for page in (1, 2, 3)]
+    names = [item['name'] for page in pages for item in page['items']]
+    assert names == ['Bravo', 'Charlie', 'Echo', 'Delta', 'Alpha']
+    assert [(page['page'], page['pages'], page['total']) for page in pages] == [
+        (1, 3, 5), (2, 3, 5), (3, 3, 5)]
+    assert [item['name'] for item in read(tmp_path / 'scholarships.json')] == names
+
+
+def test_ndjson_keeps_scrape_order_and_manifest_counts_facets(tmp_path):
+    write_all(tmp_path, RECORDS, page_size=2)
+    with open(tmp_path / 'scholarships.ndjson', encoding='utf-8') as f:
+        assert [json.loads(line)['name'] for line in f] == [r['name'] for r in RECORDS]
+    manifest = read(tmp_path / 'shards' / 'manifest.json')
+    assert (manifest['total'], manifest['pages'], manifest['page_size']) == (5, 3, 2)
+    assert manifest['facets']['country'] == {'UK': 4, 'USA': 1}
+
+
+def test_no_records_still_publish_one_empty_page(tmp_path):
+    write_all(tmp_path, [])
+    assert read(tmp_path / 'shards' / 'page-0001.json')['items'] == []
+    assert read(tmp_path / 'scholarships.json') == []
+
+
+def test_a_failed_run_leaves_the_published_files(tmp_path):
+    write_all(tmp_path, RECORDS[:1])
+    with pytest.raises(RuntimeError):
+        with ShardWriter(str(tmp_path / 'scholarships.ndjson'), str(tmp_path / 'shards'),
+                         str(tmp_path / 'scholarships.json')) as writer:
+            writer.write(RECORDS[1])
+            raise RuntimeError('scrape failed')
+    assert [item['name'] for item in read(tmp_path / 'scholarships.json')] == ['Delta']
+    assert sorted(os.listdir(tmp_path)) == ['scholarships.json', 'scholarships.ndjson', 'shards']